@@ -0,0 +1,40 @@
+"""add versioned predictive model artifacts"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_model_artifacts"
+down_revision = "0002_connector_framework"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "model_artifacts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")
+        ),
+        sa.Column("trained_on", sa.Date(), nullable=False),
+        sa.Column("last_full_refit_on", sa.Date(), nullable=False),
+        sa.Column("window_start", sa.Date(), nullable=False),
+        sa.Column("window_end", sa.Date(), nullable=False),
+        sa.Column("solver", sa.String(length=20), nullable=False),
+        sa.Column("weights_json", sa.JSON(), nullable=False),
+        sa.Column("bias", sa.Float(), nullable=False),
+        sa.Column("feature_mean_json", sa.JSON(), nullable=False),
+        sa.Column("feature_std_json", sa.JSON(), nullable=False),
+        sa.Column("metrics_json", sa.JSON(), nullable=False),
+    )
+    op.create_index("ix_model_artifacts_version", "model_artifacts", ["version"], unique=True)
+    op.create_index(
+        "ix_model_artifacts_trained_on", "model_artifacts", ["trained_on"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_model_artifacts_trained_on", table_name="model_artifacts")
+    op.drop_index("ix_model_artifacts_version", table_name="model_artifacts")
+    op.drop_table("model_artifacts")
@@ -0,0 +1,85 @@
+"""add precomputed predictive result tables"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_predictive_results"
+down_revision = "0003_model_artifacts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "data_generation",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("generation", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")
+        ),
+    )
+
+    op.create_table(
+        "predictive_runs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("as_of_date", sa.Date(), nullable=False),
+        sa.Column("data_generation", sa.Integer(), nullable=False),
+        sa.Column(
+            "computed_at",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.Column("model_version", sa.Integer(), nullable=True),
+        sa.Column("model_accuracy", sa.Float(), nullable=False),
+        sa.Column("brier_score", sa.Float(), nullable=False),
+        sa.Column("tracked_drift_machines", sa.Integer(), nullable=False),
+        sa.Column("retrain_recommended_on", sa.Date(), nullable=False),
+        sa.Column("last_trained_on", sa.Date(), nullable=False),
+        sa.UniqueConstraint(
+            "as_of_date", "data_generation", name="uq_predictive_runs_date_generation"
+        ),
+    )
+    op.create_index(
+        "ix_predictive_runs_as_of_date", "predictive_runs", ["as_of_date"], unique=False
+    )
+
+    op.create_table(
+        "machine_risk_results",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "run_id",
+            sa.Integer(),
+            sa.ForeignKey("predictive_runs.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("machine_code", sa.String(length=50), nullable=False),
+        sa.Column("rolling_downtime_variance", sa.Float(), nullable=False),
+        sa.Column("anomaly_frequency", sa.Float(), nullable=False),
+        sa.Column("output_degradation_trend", sa.Float(), nullable=False),
+        sa.Column("scrap_variance", sa.Float(), nullable=False),
+        sa.Column("downtime_trend", sa.Float(), nullable=False),
+        sa.Column("scrap_trend", sa.Float(), nullable=False),
+        sa.Column("shift_scrap_correlation", sa.Float(), nullable=False),
+        sa.Column("health_score", sa.Float(), nullable=False),
+        sa.Column("data_points", sa.Integer(), nullable=False),
+        sa.Column("failure_probability_next_7_days", sa.Float(), nullable=True),
+        sa.Column("confidence_score", sa.Float(), nullable=True),
+        sa.Column("concept_drift_score", sa.Float(), nullable=True),
+        sa.Column("concept_drift_detected", sa.Boolean(), nullable=True),
+        sa.Column("baseline_deviation_detected", sa.Boolean(), nullable=True),
+        sa.Column("change_point_detected", sa.Boolean(), nullable=True),
+        sa.Column("change_point_date", sa.Date(), nullable=True),
+        sa.Column("recommendations_json", sa.JSON(), nullable=False),
+    )
+    op.create_index(
+        "ix_machine_risk_results_run_id", "machine_risk_results", ["run_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_machine_risk_results_run_id", table_name="machine_risk_results")
+    op.drop_table("machine_risk_results")
+    op.drop_index("ix_predictive_runs_as_of_date", table_name="predictive_runs")
+    op.drop_table("predictive_runs")
+    op.drop_table("data_generation")
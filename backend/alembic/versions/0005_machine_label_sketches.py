@@ -0,0 +1,17 @@
+"""add per-machine label threshold sketches"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_machine_label_sketches"
+down_revision = "0004_predictive_results"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("machines", sa.Column("label_sketch_json", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("machines", "label_sketch_json")
@@ -0,0 +1,17 @@
+"""add per-machine rolling feature states"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_machine_feature_states"
+down_revision = "0005_machine_label_sketches"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("machines", sa.Column("feature_state_json", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("machines", "feature_state_json")
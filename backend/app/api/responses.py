@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import pydantic_core
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+JSON_LAYOUTS = ("rows", "columns")
+
+
+def dto_list_response(
+    items: Sequence[BaseModel], dto: type[BaseModel], layout: str = "rows"
+) -> Response:
+    """JSON for DTOs the use case has already validated, encoded in one pass by pydantic-core.
+
+    Returning a ``Response`` makes FastAPI skip its ``response_model`` validation
+    and encoding; the route's ``response_model`` still documents the ``rows``
+    shape. ``columns`` sends one array per field instead of one object per row.
+    """
+    if layout == "rows":
+        return Response(pydantic_core.to_json(items), media_type="application/json")
+    if layout == "columns":
+        columns = {name: [getattr(item, name) for item in items] for name in dto.model_fields}
+        return Response(pydantic_core.to_json(columns), media_type="application/json")
+    raise HTTPException(status_code=400, detail=f"layout must be one of {', '.join(JSON_LAYOUTS)}")
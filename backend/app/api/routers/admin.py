@@ -0,0 +1,206 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+
+from app.api.dependencies.auth import require_admin
+from app.application.exports import (
+    EXPORT_EXTENSIONS,
+    EXPORT_MEDIA_TYPES,
+    ExportSlots,
+    check_export_format,
+    gzip_csv_chunks,
+    parquet_chunks,
+)
+from app.config import get_settings
+from app.infrastructure.db.session import get_db, query_log
+from app.infrastructure.profiling import PROFILE_ENGINES, memory_snapshots, profiler
+from app.infrastructure.repositories.export_repository import EXPORT_COLUMNS, ExportRepository
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+settings = get_settings()
+export_slots = ExportSlots(settings.export_max_concurrent)
+
+
+@router.get("/export/{table}")
+def export_table(
+    table: str,
+    format: str = Query(default="csv"),
+    from_date: date | None = Query(default=None, alias="from"),
+    to_date: date | None = Query(default=None, alias="to"),
+    machine_id: str | None = Query(default=None),
+    dataset_id: int | None = Query(default=None),
+    batch_size: int | None = Query(default=None, ge=1, le=100_000),
+    _: object = Depends(require_admin),
+    db: Session = Depends(get_db),
+):
+    if table not in EXPORT_COLUMNS:
+        raise HTTPException(status_code=404, detail=f"Unknown export table {table!r}")
+    try:
+        check_export_format(format)
+        if from_date and to_date and from_date > to_date:
+            raise ValueError("from must be on or before to")
+        if dataset_id is not None and table != "production_records":
+            raise ValueError("dataset_id filter applies only to production_records")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    slot = export_slots.try_acquire()
+    if slot is None:
+        raise HTTPException(
+            status_code=429, detail="Too many exports in progress", headers={"Retry-After": "30"}
+        )
+    batches = ExportRepository(db).iter_batches(
+        table,
+        start=from_date,
+        end=to_date,
+        machine_id=machine_id,
+        dataset_id=dataset_id,
+        batch_size=batch_size or settings.export_batch_size,
+    )
+    encode = gzip_csv_chunks if format == "csv" else parquet_chunks
+    return StreamingResponse(
+        slot.guard(encode(EXPORT_COLUMNS[table], batches)),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{table}.{EXPORT_EXTENSIONS[format]}"'
+        },
+        # Frees the slot even when the client goes away before the stream starts.
+        background=BackgroundTask(slot.release),
+    )
+
+
+@router.get("/diagnostics/queries")
+def query_diagnostics(
+    limit: int = Query(default=50, ge=1, le=500),
+    order_by: str = Query(default="total_ms"),
+    _: object = Depends(require_admin),
+) -> dict:
+    try:
+        statements = query_log.snapshot(limit=limit, order_by=order_by)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {
+        "threshold_ms": query_log.threshold_seconds * 1000,
+        "explain": query_log.explain,
+        "statements": statements,
+    }
+
+
+@router.delete("/diagnostics/queries", status_code=204)
+def reset_query_diagnostics(_: object = Depends(require_admin)) -> None:
+    query_log.reset()
+
+
+def _start_profile(start, engine: str) -> dict:
+    try:
+        if engine not in PROFILE_ENGINES:
+            raise ValueError(f"engine must be one of {', '.join(PROFILE_ENGINES)}")
+        session_id = start()
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    return {
+        "id": session_id,
+        "status": "running",
+        "result": f"/admin/profile/sessions/{session_id}",
+    }
+
+
+@router.post("/profile/window", status_code=202)
+def profile_window(
+    seconds: float = Query(default=10.0, gt=0, le=120),
+    engine: str = Query(default="sampling"),
+    interval_ms: float = Query(default=5.0, ge=1, le=1000),
+    _: object = Depends(require_admin),
+) -> dict:
+    """Starts profiling the whole process for ``seconds``; poll the returned session for it."""
+    return _start_profile(
+        lambda: profiler.start_window(seconds, engine, interval_ms / 1000), engine
+    )
+
+
+@router.post("/profile/requests", status_code=202)
+def profile_requests(
+    route: str = Query(description="Route template, e.g. /risk/panel"),
+    count: int = Query(default=5, ge=1, le=100),
+    timeout: float = Query(default=60.0, gt=0, le=600),
+    engine: str = Query(default="cprofile"),
+    interval_ms: float = Query(default=5.0, ge=1, le=1000),
+    _: object = Depends(require_admin),
+) -> dict:
+    """Starts profiling the next ``count`` requests to ``route``, ending after ``timeout``."""
+    return _start_profile(
+        lambda: profiler.start_requests(route, count, timeout, engine, interval_ms / 1000),
+        engine,
+    )
+
+
+@router.get("/profile/sessions/{session_id}")
+def profile_result(
+    session_id: int,
+    output: str | None = Query(default=None),
+    limit: int = Query(default=60, ge=1, le=1000),
+    _: object = Depends(require_admin),
+) -> Response:
+    """202 while the session runs, then its result in ``output`` (see ``PROFILE_FORMATS``)."""
+    try:
+        result = profiler.result(session_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    if result is None:
+        return JSONResponse(
+            {"id": session_id, "status": "running"}, status_code=202, headers={"Retry-After": "1"}
+        )
+    output = output or ("text" if result.engine == "cprofile" else "collapsed")
+    try:
+        profiler.check(result.engine, output)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    headers = {
+        "X-Profile-Seconds": f"{result.seconds:.3f}",
+        "X-Profiled-Requests": str(result.requests),
+    }
+    if output == "pstats":
+        headers["Content-Disposition"] = 'attachment; filename="profile.pstats"'
+        return Response(
+            result.render(output), media_type="application/octet-stream", headers=headers
+        )
+    return Response(result.render(output, limit), media_type="text/plain", headers=headers)
+
+
+@router.delete("/profile/sessions/{session_id}", status_code=204)
+def stop_profile(session_id: int, _: object = Depends(require_admin)) -> None:
+    try:
+        profiler.stop(session_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@router.post("/profile/memory/snapshots")
+def take_memory_snapshot(
+    limit: int = Query(default=20, ge=1, le=200),
+    _: object = Depends(require_admin),
+) -> dict:
+    return memory_snapshots.take(limit)
+
+
+@router.get("/profile/memory/diff")
+def diff_memory_snapshots(
+    from_id: int = Query(alias="from"),
+    to_id: int = Query(alias="to"),
+    limit: int = Query(default=20, ge=1, le=200),
+    _: object = Depends(require_admin),
+) -> list[dict]:
+    try:
+        return memory_snapshots.diff(from_id, to_id, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.delete("/profile/memory", status_code=204)
+def stop_memory_tracing(_: object = Depends(require_admin)) -> None:
+    memory_snapshots.stop()
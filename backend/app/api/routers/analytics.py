@@ -1,19 +1,25 @@
 from datetime import date
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
+from app.api.responses import dto_list_response
 from app.api.schemas.common import AnomalyOut
+from app.api.streaming import resolve_stream_format, stream_rows
 from app.application.dtos import (
+    DailyInsightDTO,
     DayAggregateDTO,
     DriftSignalDTO,
     FailureRiskDTO,
     KPIOverviewDTO,
+    MachineForecastDTO,
     MachineHealthScoreDTO,
     MachineTimeseriesPointDTO,
     ModelMonitoringDTO,
     RecommendationDTO,
+    RiskDashboardDTO,
     RiskPanelDTO,
+    RiskTrendPointDTO,
     ShiftAggregateDTO,
 )
 from app.application.use_cases import AnalyticsUseCase
@@ -28,26 +34,58 @@ def kpi_overview(date: date, db: Session = Depends(get_db)):
     return AnalyticsUseCase(AnalyticsRepository(db)).overview(date)
 
 
+@router.get("/kpi/overview/range", response_model=list[KPIOverviewDTO])
+def kpi_overview_range(
+    from_date: date = Query(alias="from"),
+    to_date: date = Query(alias="to"),
+    layout: str = Query(default="rows"),
+    db: Session = Depends(get_db),
+):
+    try:
+        days = AnalyticsUseCase(AnalyticsRepository(db)).overview_range(from_date, to_date)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return dto_list_response(days, KPIOverviewDTO, layout)
+
+
 @router.get("/kpi/machines", response_model=list[MachineTimeseriesPointDTO])
 def machine_kpis(
+    request: Request,
     from_date: date = Query(alias="from"),
     to_date: date = Query(alias="to"),
     machine_id: str | None = Query(default=None),
+    format: str | None = Query(default=None),
+    layout: str = Query(default="rows"),
     db: Session = Depends(get_db),
 ):
     use_case = AnalyticsUseCase(AnalyticsRepository(db))
-    return use_case.machine_timeseries(start=from_date, end=to_date, machine_id=machine_id)
+    stream_format = resolve_stream_format(request, format, layout)
+    if stream_format != "json":
+        rows = use_case.iter_machine_timeseries(start=from_date, end=to_date, machine_id=machine_id)
+        return stream_rows(
+            rows, stream_format, list(MachineTimeseriesPointDTO.model_fields), "machine_kpis"
+        )
+    rows = use_case.machine_timeseries(start=from_date, end=to_date, machine_id=machine_id)
+    return dto_list_response(rows, MachineTimeseriesPointDTO, layout)
 
 
 @router.get("/kpi/shifts", response_model=list[ShiftAggregateDTO])
 def shift_kpis(
+    request: Request,
     from_date: date = Query(alias="from"),
     to_date: date = Query(alias="to"),
     machine_id: str | None = Query(default=None),
+    format: str | None = Query(default=None),
+    layout: str = Query(default="rows"),
     db: Session = Depends(get_db),
 ):
     use_case = AnalyticsUseCase(AnalyticsRepository(db))
-    return use_case.shift_aggregates(start=from_date, end=to_date, machine_id=machine_id)
+    stream_format = resolve_stream_format(request, format, layout)
+    if stream_format != "json":
+        rows = use_case.iter_shift_aggregates(start=from_date, end=to_date, machine_id=machine_id)
+        return stream_rows(rows, stream_format, list(ShiftAggregateDTO.model_fields), "shift_kpis")
+    rows = use_case.shift_aggregates(start=from_date, end=to_date, machine_id=machine_id)
+    return dto_list_response(rows, ShiftAggregateDTO, layout)
 
 
 @router.get("/kpi/days", response_model=list[DayAggregateDTO])
@@ -55,10 +93,12 @@ def day_kpis(
     from_date: date = Query(alias="from"),
     to_date: date = Query(alias="to"),
     machine_id: str | None = Query(default=None),
+    layout: str = Query(default="rows"),
     db: Session = Depends(get_db),
 ):
     use_case = AnalyticsUseCase(AnalyticsRepository(db))
-    return use_case.day_aggregates(start=from_date, end=to_date, machine_id=machine_id)
+    rows = use_case.day_aggregates(start=from_date, end=to_date, machine_id=machine_id)
+    return dto_list_response(rows, DayAggregateDTO, layout)
 
 
 @router.get("/anomalies", response_model=list[AnomalyOut])
@@ -81,11 +121,44 @@ def forecasts(machine_id: str, horizon_days: int = Query(default=1, ge=1, le=7),
     return AnalyticsUseCase(AnalyticsRepository(db)).forecast(machine_id, horizon_days)
 
 
+@router.get("/forecasts/batch", response_model=list[MachineForecastDTO])
+def batch_forecasts(
+    machine_ids: str | None = Query(
+        default=None, description="Comma-separated machine codes; all by default"
+    ),
+    horizon_days: int = Query(default=1, ge=1, le=7),
+    history_days: int = Query(default=56, ge=2, le=365),
+    method: str = Query(default="holt", description="naive or holt"),
+    db: Session = Depends(get_db),
+):
+    selected = [m.strip() for m in machine_ids.split(",") if m.strip()] if machine_ids else None
+    try:
+        return AnalyticsUseCase(AnalyticsRepository(db)).forecast_batch(
+            selected, horizon_days, history_days, method
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
 @router.get("/insights")
 def insights(date: date, db: Session = Depends(get_db)):
     return AnalyticsUseCase(AnalyticsRepository(db)).insights(date)
 
 
+@router.get("/insights/range", response_model=list[DailyInsightDTO])
+def insights_range(
+    from_date: date = Query(alias="from"),
+    to_date: date = Query(alias="to"),
+    layout: str = Query(default="rows"),
+    db: Session = Depends(get_db),
+):
+    try:
+        days = AnalyticsUseCase(AnalyticsRepository(db)).insights_range(from_date, to_date)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return dto_list_response(days, DailyInsightDTO, layout)
+
+
 @router.get("/risk/health-scores", response_model=list[MachineHealthScoreDTO])
 def machine_health_scores(date: date, db: Session = Depends(get_db)):
     return AnalyticsUseCase(AnalyticsRepository(db)).machine_health_scores(date)
@@ -114,3 +187,31 @@ def risk_panel(date: date, db: Session = Depends(get_db)):
 @router.get("/risk/model-monitoring", response_model=ModelMonitoringDTO)
 def model_monitoring(date: date, db: Session = Depends(get_db)):
     return AnalyticsUseCase(AnalyticsRepository(db)).model_monitoring(date)
+
+
+@router.get("/risk/dashboard", response_model=RiskDashboardDTO)
+def risk_dashboard(
+    date: date,
+    sections: str | None = Query(
+        default=None, description="Comma-separated subset of sections; all by default"
+    ),
+    db: Session = Depends(get_db),
+):
+    selected = [s.strip() for s in sections.split(",") if s.strip()] if sections else None
+    try:
+        return AnalyticsUseCase(AnalyticsRepository(db)).risk_dashboard(date, selected)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.get("/risk/trend", response_model=list[RiskTrendPointDTO])
+def risk_trend(
+    machine_id: str,
+    from_date: date = Query(alias="from"),
+    to_date: date = Query(alias="to"),
+    db: Session = Depends(get_db),
+):
+    try:
+        return AnalyticsUseCase(AnalyticsRepository(db)).risk_trend(machine_id, from_date, to_date)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
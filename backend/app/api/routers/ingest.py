@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 
 from app.api.dependencies.auth import require_admin
 from app.api.schemas.common import DatasetOut
+from app.application.use_cases import AnalyticsUseCase
 from app.config import get_settings
 from app.infrastructure.metrics.prometheus import upload_counter
 from app.infrastructure.db.session import get_db
@@ -37,6 +38,7 @@ def upload_csv(
     ingest_repo = IngestRepository(db)
     dataset = ingest_repo.ingest_dataframe(file.filename or "upload.csv", df)
     AnalyticsRepository(db).recompute_daily_aggregates()
+    AnalyticsUseCase.invalidate_predictive_cache()
     upload_counter.inc()
     return DatasetOut.model_validate(dataset, from_attributes=True)
 
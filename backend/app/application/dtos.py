@@ -42,10 +42,23 @@ class ForecastDTO(BaseModel):
     values: list[float]
 
 
+class MachineForecastDTO(BaseModel):
+    machine_id: str
+    metric: str
+    method: str
+    last_date: date
+    history_points: int
+    values: list[float]
+
+
 class InsightDTO(BaseModel):
     summary: str
 
 
+class DailyInsightDTO(InsightDTO):
+    date: date
+
+
 class MachineHealthScoreDTO(BaseModel):
     machine_id: str
     as_of_date: date
@@ -96,3 +109,25 @@ class ModelMonitoringDTO(BaseModel):
     tracked_drift_machines: int
     retrain_recommended_on: date
     last_trained_on: date
+
+
+class RiskTrendPointDTO(BaseModel):
+    machine_id: str
+    date: date
+    health_score: float
+    failure_probability_next_7_days: float
+    confidence_score: float
+    rolling_downtime_variance: float
+    anomaly_frequency: float
+    output_degradation_trend: float
+    scrap_variance: float
+
+
+class RiskDashboardDTO(BaseModel):
+    as_of_date: date
+    health_scores: list[MachineHealthScoreDTO] | None = None
+    failure_probabilities: list[FailureRiskDTO] | None = None
+    drift_signals: list[DriftSignalDTO] | None = None
+    recommendations: list[RecommendationDTO] | None = None
+    panel: RiskPanelDTO | None = None
+    model_monitoring: ModelMonitoringDTO | None = None
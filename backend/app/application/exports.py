@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import csv
+import io
+import threading
+import zlib
+from collections.abc import Iterable, Iterator, Mapping
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: pip install .[parquet]
+    pa = None
+    pq = None
+
+EXPORT_FORMATS = ("csv", "parquet")
+EXPORT_MEDIA_TYPES = {"csv": "application/gzip", "parquet": "application/vnd.apache.parquet"}
+EXPORT_EXTENSIONS = {"csv": "csv.gz", "parquet": "parquet"}
+
+
+def check_export_format(export_format: str) -> None:
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if export_format == "parquet" and pq is None:
+        raise ValueError("Parquet export requires pyarrow; install the 'parquet' extra")
+
+
+def gzip_csv_chunks(columns: Iterable[str], batches: Iterable[list[tuple]]) -> Iterator[bytes]:
+    """A gzip stream of CSV text, one compressed chunk per batch of rows."""
+    compressor = zlib.compressobj(wbits=31)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(batch)
+        chunk = compressor.compress(buffer.getvalue().encode())
+        buffer.seek(0)
+        buffer.truncate()
+        if chunk:
+            yield chunk
+    chunk = compressor.compress(buffer.getvalue().encode()) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back out in pieces while keeping the true offset."""
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def arrow_schema(columns: Mapping[str, str]) -> pa.Schema:
+    """The Arrow schema of export columns typed int, float, str, date or datetime."""
+    types = {
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "str": pa.string(),
+        "date": pa.date32(),
+        "datetime": pa.timestamp("us"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns.items()])
+
+
+def parquet_chunks(columns: Mapping[str, str], batches: Iterable[list[tuple]]) -> Iterator[bytes]:
+    """A Parquet file written one row group per batch, yielded as each row group is finished.
+
+    Every batch is converted with the same schema, so a column that is all
+    null in one batch keeps its type.
+    """
+    check_export_format("parquet")
+    schema = arrow_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for batch in batches:
+            arrays = [
+                pa.array(values, type=field.type)
+                for field, values in zip(schema, zip(*batch, strict=True), strict=True)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            chunk = sink.take()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    chunk = sink.take()
+    if chunk:
+        yield chunk
+
+
+class ExportSlots:
+    """Caps how many exports stream at once so they cannot take over the connection pool."""
+
+    def __init__(self, limit: int) -> None:
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def try_acquire(self) -> ExportSlot | None:
+        return ExportSlot(self._semaphore) if self._semaphore.acquire(blocking=False) else None
+
+
+class ExportSlot:
+    def __init__(self, semaphore: threading.BoundedSemaphore) -> None:
+        self._semaphore = semaphore
+        self._lock = threading.Lock()
+        self._held = True
+
+    def release(self) -> None:
+        """Safe to call more than once; only the first call frees the slot."""
+        with self._lock:
+            if not self._held:
+                return
+            self._held = False
+        self._semaphore.release()
+
+    def guard(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Yields ``chunks`` and frees the slot when they run out or the stream is abandoned."""
+        try:
+            yield from chunks
+        finally:
+            self.release()
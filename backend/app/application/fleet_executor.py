@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import pairwise
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+import numpy as np
+
+from app.domain.columnar import MachineDailyFrame
+
+_COLUMNS = (
+    ("downtime_minutes", np.float64),
+    ("scrap_units", np.float64),
+    ("output_units", np.float64),
+    ("scrap_percent", np.float64),
+    ("machine_index", np.int32),
+    ("date_ordinal", np.int32),
+)
+
+
+@dataclass(frozen=True)
+class SharedFrameHandle:
+    """What a worker needs to map a frame that lives in shared memory."""
+
+    name: str
+    n_rows: int
+    machine_ids: tuple[str, ...]
+    offsets: np.ndarray
+
+
+class SharedFrame:
+    """Copies a frame's columns into one shared memory block for the duration of a ``with``."""
+
+    def __init__(self, frame: MachineDailyFrame) -> None:
+        self.frame = frame
+        self._shm: SharedMemory | None = None
+
+    def __enter__(self) -> SharedFrameHandle:
+        frame = self.frame
+        size = sum(frame.n_rows * np.dtype(dtype).itemsize for _, dtype in _COLUMNS)
+        self._shm = SharedMemory(create=True, size=max(size, 1))
+        for name, view in _column_views(self._shm, frame.n_rows):
+            view[:] = getattr(frame, name)
+            del view
+        return SharedFrameHandle(self._shm.name, frame.n_rows, frame.machine_ids, frame.offsets)
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+def _column_views(shm: SharedMemory, n_rows: int):
+    position = 0
+    for name, dtype in _COLUMNS:
+        yield name, np.ndarray((n_rows,), dtype=dtype, buffer=shm.buf, offset=position)
+        position += n_rows * np.dtype(dtype).itemsize
+
+
+def _attach(name: str) -> SharedMemory:
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the block again, but spawned
+        # workers share the parent's resource tracker, so the parent's unlink
+        # still clears the single registration.
+        return SharedMemory(name=name)
+
+
+def _run_shard(
+    fn: Callable[..., Any], handle: SharedFrameHandle, start: int, stop: int, kwargs: dict
+) -> Any:
+    row_start, row_stop = int(handle.offsets[start]), int(handle.offsets[stop])
+    shm = _attach(handle.name)
+    try:
+        columns = {}
+        for name, view in _column_views(shm, handle.n_rows):
+            columns[name] = view[row_start:row_stop].copy()
+            del view
+    finally:
+        shm.close()
+    columns["machine_index"] -= start
+    shard = MachineDailyFrame.from_sorted(machine_ids=handle.machine_ids[start:stop], **columns)
+    return fn(shard, **kwargs)
+
+
+class FleetExecutor:
+    """Runs a per-machine function over machine shards in a process pool.
+
+    Shards are contiguous machine ranges balanced by row count. Workers map the
+    frame from shared memory and results come back in shard order, so merged
+    output matches a single-process run exactly. Fleets smaller than
+    ``min_machines`` are left to the caller to run in-process.
+    """
+
+    def __init__(
+        self, max_workers: int, min_machines: int = 256, start_method: str = "spawn"
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.min_machines = min_machines
+        self.start_method = start_method
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                )
+            return self._pool
+
+    def accepts(self, frame: MachineDailyFrame) -> bool:
+        return self.max_workers > 1 and frame.n_machines >= self.min_machines
+
+    def shard_bounds(self, frame: MachineDailyFrame) -> list[tuple[int, int]]:
+        shards = min(self.max_workers, frame.n_machines)
+        targets = np.linspace(0, frame.n_rows, shards + 1)[1:-1]
+        cuts = np.searchsorted(frame.offsets, targets).tolist()
+        bounds = [0, *cuts, frame.n_machines]
+        return [(a, b) for a, b in pairwise(bounds) if b > a]
+
+    def map_shards(
+        self, fn: Callable[..., Any], frame: MachineDailyFrame, **kwargs: Any
+    ) -> list[Any]:
+        """``fn(shard, **kwargs)`` per shard, in shard order; ``fn`` must pickle by reference."""
+        pool = self._get_pool()
+        with SharedFrame(frame) as handle:
+            futures = [
+                pool.submit(_run_shard, fn, handle, start, stop, kwargs)
+                for start, stop in self.shard_bounds(frame)
+            ]
+            return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from app.infrastructure.metrics.prometheus import (
+    predictive_cache_hits,
+    predictive_cache_misses,
+    predictive_state_compute_seconds,
+)
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class PredictiveStateCache:
+    """Bounded LRU of predictive results with single-flight computation per key.
+
+    Concurrent callers asking for a key that is being computed wait for that
+    computation instead of starting their own. A computation that started
+    before ``invalidate()`` still answers its waiters but is not cached.
+    ``name`` labels the cache's hit, miss and compute-time metrics.
+    """
+
+    def __init__(self, max_entries: int, name: str = "state") -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.name = name
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._inflight: dict[Hashable, _Flight] = {}
+        self._epoch = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                predictive_cache_hits.labels(cache=self.name).inc()
+                return self._entries[key]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                epoch = self._epoch
+            predictive_cache_misses.labels(cache=self.name).inc()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        start = time.perf_counter()
+        try:
+            flight.result = compute()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            predictive_state_compute_seconds.labels(cache=self.name).observe(
+                time.perf_counter() - start
+            )
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                if flight.error is None and epoch == self._epoch:
+                    self._entries[key] = flight.result
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.result
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._inflight.clear()
+            self._epoch += 1
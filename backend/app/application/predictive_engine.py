@@ -1,11 +1,21 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import deque
+from collections.abc import Mapping
+from dataclasses import dataclass, field
 from datetime import date, timedelta
-from math import exp
+from typing import TYPE_CHECKING
 
 import numpy as np
 
+from app.application.predictive_cache import PredictiveStateCache
+from app.domain.columnar import MachineDailyFrame
+from app.domain.feature_state import MachineFeatureState
+from app.infrastructure.metrics.stages import stage
+
+if TYPE_CHECKING:
+    from app.application.fleet_executor import FleetExecutor
+
 
 @dataclass(frozen=True)
 class MachineSnapshot:
@@ -53,37 +63,179 @@ class TrainingData:
     machine_ids: list[str]
     X: np.ndarray
     y: np.ndarray
+    label_dates: np.ndarray = field(default_factory=lambda: np.empty((0,), dtype=np.int32))
+    closed_after: date | None = None
 
 
 class LogisticRegressionLite:
-    def __init__(self, learning_rate: float = 0.08, epochs: int = 500, l2: float = 0.01) -> None:
+    """L2-regularized logistic regression for the engine's four risk features.
+
+    ``solver="gd"`` runs full-batch gradient descent for up to ``epochs`` steps.
+    ``solver="newton"`` runs damped Newton (IRLS) steps, which converge in a
+    handful of iterations for this small feature count. Both minimize the same
+    objective, stop once the largest gradient component drops below ``tol``,
+    and record ``n_iter``, ``converged`` and ``final_loss`` after each fit.
+    A fit given ``anchor`` weights adds ``prior_strength / 2 * |w - anchor|**2``
+    to the objective, so a prior shapes the optimum rather than only the start.
+    """
+
+    SOLVERS = ("gd", "newton")
+    MAX_NEWTON_STEP = 5.0
+
+    def __init__(
+        self,
+        learning_rate: float = 0.08,
+        epochs: int = 500,
+        l2: float = 0.01,
+        solver: str = "gd",
+        tol: float = 1e-6,
+        max_iter: int | None = None,
+        prior_strength: float = 0.0,
+    ) -> None:
+        if solver not in self.SOLVERS:
+            raise ValueError(f"Unknown solver: {solver}")
         self.learning_rate = learning_rate
         self.epochs = epochs
         self.l2 = l2
+        self.solver = solver
+        self.tol = tol
+        self.max_iter = max_iter if max_iter is not None else (epochs if solver == "gd" else 50)
+        self.prior_strength = prior_strength
+        # Weights the prior penalty pulls toward; only set while ``fit`` runs.
+        self.anchor: np.ndarray | None = None
         self.weights: np.ndarray | None = None
         self.bias: float = 0.0
+        self.n_iter: int = 0
+        self.converged: bool = False
+        self.final_loss: float | None = None
 
     @staticmethod
     def _sigmoid(z: np.ndarray) -> np.ndarray:
         z = np.clip(z, -40.0, 40.0)
         return 1.0 / (1.0 + np.exp(-z))
 
-    def fit(self, X: np.ndarray, y: np.ndarray, reset: bool = True) -> None:
+    def loss(self, X: np.ndarray, y: np.ndarray) -> float:
+        """Mean log-loss plus the L2 penalty on the weights, and the prior's while fitting."""
+        weights = self.weights if self.weights is not None else np.zeros(X.shape[1], dtype=float)
+        linear = X @ weights + self.bias
+        log_loss = float(np.mean(np.logaddexp(0.0, linear) - y * linear))
+        penalty = 0.5 * self.l2 * float(weights @ weights)
+        if self.anchor is not None:
+            offset = weights - self.anchor
+            penalty += 0.5 * self.prior_strength * float(offset @ offset)
+        return log_loss + penalty
+
+    def _gradient(self, X: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, float, np.ndarray]:
+        preds = self._sigmoid(X @ self.weights + self.bias)
+        error = preds - y
+        dw = (X.T @ error) / X.shape[0] + self.l2 * self.weights
+        if self.anchor is not None:
+            dw += self.prior_strength * (self.weights - self.anchor)
+        db = float(np.mean(error))
+        return dw, db, preds
+
+    def fit(
+        self, X: np.ndarray, y: np.ndarray, reset: bool = True, anchor: np.ndarray | None = None
+    ) -> None:
         if X.size == 0 or y.size == 0:
             return
-        n_samples, n_features = X.shape
+        n_features = X.shape[1]
         if reset or self.weights is None or self.weights.shape[0] != n_features:
             self.weights = np.zeros(n_features, dtype=float)
             self.bias = 0.0
 
-        for _ in range(self.epochs):
-            linear = X @ self.weights + self.bias
-            preds = self._sigmoid(linear)
-            error = preds - y
-            dw = (X.T @ error) / n_samples + self.l2 * self.weights
-            db = float(np.mean(error))
+        self.anchor = None if anchor is None else np.array(anchor, dtype=float)
+        try:
+            if self.solver == "newton":
+                self._fit_newton(X, y)
+            else:
+                self._fit_gradient_descent(X, y)
+            self.final_loss = self.loss(X, y)
+        finally:
+            self.anchor = None
+
+    def _fit_gradient_descent(self, X: np.ndarray, y: np.ndarray) -> None:
+        self.converged = False
+        self.n_iter = 0
+        for _ in range(self.max_iter):
+            dw, db, _ = self._gradient(X, y)
+            if max(float(np.max(np.abs(dw))), abs(db)) < self.tol:
+                self.converged = True
+                break
             self.weights -= self.learning_rate * dw
             self.bias -= self.learning_rate * db
+            self.n_iter += 1
+
+    def _fit_newton(self, X: np.ndarray, y: np.ndarray) -> None:
+        n_samples, n_features = X.shape
+        design = np.hstack([X, np.ones((n_samples, 1))])
+        penalty = np.full(n_features + 1, self.l2)
+        if self.anchor is not None:
+            penalty[:-1] += self.prior_strength
+        penalty[-1] = 1e-10
+        self.converged = False
+        self.n_iter = 0
+        loss = self.loss(X, y)
+        for _ in range(self.max_iter):
+            dw, db, preds = self._gradient(X, y)
+            gradient = np.append(dw, db)
+            if float(np.max(np.abs(gradient))) < self.tol:
+                self.converged = True
+                break
+            curvature = preds * (1.0 - preds)
+            hessian = (design.T * curvature) @ design / n_samples + np.diag(penalty)
+            try:
+                step = np.linalg.solve(hessian, gradient)
+            except np.linalg.LinAlgError:
+                step = np.linalg.lstsq(hessian, gradient, rcond=None)[0]
+            largest = float(np.max(np.abs(step)))
+            if largest > self.MAX_NEWTON_STEP:
+                step *= self.MAX_NEWTON_STEP / largest
+
+            weights, bias = self.weights, self.bias
+            scale = 1.0
+            for _ in range(30):
+                self.weights = weights - scale * step[:-1]
+                self.bias = bias - scale * float(step[-1])
+                candidate = self.loss(X, y)
+                if candidate <= loss:
+                    break
+                scale *= 0.5
+            else:
+                self.weights, self.bias = weights, bias
+                break
+            loss = candidate
+            self.n_iter += 1
+
+    def partial_fit(
+        self, X: np.ndarray, y: np.ndarray, batch_size: int = 32, epochs: int = 5
+    ) -> None:
+        """Warm-started mini-batch SGD over new samples only.
+
+        Keeps the current weights and bias and takes ``epochs`` passes of
+        ``batch_size`` steps over a seeded shuffle of ``X``, so the cost is
+        proportional to the number of new samples.
+        """
+        if X.size == 0 or y.size == 0:
+            return
+        n_samples, n_features = X.shape
+        if self.weights is None or self.weights.shape[0] != n_features:
+            self.weights = np.zeros(n_features, dtype=float)
+            self.bias = 0.0
+
+        rng = np.random.default_rng(n_samples)
+        steps = 0
+        for _ in range(epochs):
+            order = rng.permutation(n_samples)
+            for start in range(0, n_samples, batch_size):
+                batch = order[start : start + batch_size]
+                dw, db, _ = self._gradient(X[batch], y[batch])
+                self.weights -= self.learning_rate * dw
+                self.bias -= self.learning_rate * db
+                steps += 1
+        self.n_iter = steps
+        self.converged = False
+        self.final_loss = self.loss(X, y)
 
     def predict_proba(self, X: np.ndarray) -> np.ndarray:
         if X.size == 0:
@@ -99,107 +251,257 @@ class PredictiveIntelligenceEngine:
     ANOMALY_WEIGHT = 0.25
     OUTPUT_WEIGHT = 0.25
     SCRAP_WEIGHT = 0.15
-
-    def __init__(self) -> None:
-        self.model = LogisticRegressionLite()
+    ROLLING_WINDOW_DAYS = 14
+    DRIFT_RECENT_DAYS = 14
+    DRIFT_BASELINE_DAYS = 30
+    CHANGE_POINT_WINDOW_DAYS = 30
+    CHANGE_POINT_MIN_SEGMENT = 5
+    CUSUM_DRIFT_ALLOWANCE = 0.5
+    CUSUM_THRESHOLD = 8.0
+    LABEL_HORIZON_DAYS = 7
+    FULL_REFIT_INTERVAL_DAYS = 7
+    ROLLING_METRIC_SAMPLES = 200
+    PRIOR_SEED = 20240601
+    PRIOR_SAMPLES = 300
+    PRIOR_SIGNATURE_DIGITS = 3
+    PRIOR_CACHE_MAX_ENTRIES = 64
+    PRIOR_STRENGTH = 0.1
+
+    def __init__(
+        self,
+        executor: FleetExecutor | None = None,
+        solver: str = "newton",
+        prior_cache: PredictiveStateCache | None = None,
+    ) -> None:
+        """Full refits start from the synthetic prior and penalize distance from it with
+        ``PRIOR_STRENGTH``, so either solver converges to the same prior-regularized optimum.
+
+        Fitted priors are kept in ``prior_cache``; pass one to share it between engines.
+        """
+        self.executor = executor
+        if prior_cache is None:
+            prior_cache = PredictiveStateCache(self.PRIOR_CACHE_MAX_ENTRIES, name="prior")
+        self.prior_cache = prior_cache
+        self.model = LogisticRegressionLite(solver=solver, prior_strength=self.PRIOR_STRENGTH)
         self.feature_mean: np.ndarray | None = None
         self.feature_std: np.ndarray | None = None
         self.last_trained_on: date | None = None
+        self.last_full_refit_on: date | None = None
+        self.last_accuracy = 0.0
+        self.last_brier = 0.25
+        # Correctness and squared error of the latest scored samples, oldest first.
+        self.recent_hits: deque[float] = deque(maxlen=self.ROLLING_METRIC_SAMPLES)
+        self.recent_sq_errors: deque[float] = deque(maxlen=self.ROLLING_METRIC_SAMPLES)
+        self.model_version: int | None = None
 
     @staticmethod
-    def _safe_ratio(num: float, den: float) -> float:
-        if den == 0:
-            return 0.0
-        return num / den
+    def _as_frame(rows: MachineDailyFrame | list[dict]) -> MachineDailyFrame:
+        if isinstance(rows, MachineDailyFrame):
+            return rows
+        return MachineDailyFrame.from_records(rows)
 
     @staticmethod
-    def _slope(values: list[float]) -> float:
-        if len(values) < 2:
-            return 0.0
-        x = np.arange(len(values), dtype=float)
-        y = np.array(values, dtype=float)
-        x_center = x - np.mean(x)
-        y_center = y - np.mean(y)
-        den = float(np.sum(x_center**2))
-        if den == 0:
-            return 0.0
-        return float(np.sum(x_center * y_center) / den)
+    def _trailing_window(
+        frame: MachineDailyFrame, width: int, align_left: bool = False
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Row indices of every machine's last ``width`` days plus a validity mask.
+
+        Windows are right-aligned unless ``align_left`` is set, in which case each
+        machine's first day in the window lands in column 0.
+        """
+        ends = frame.offsets[1:]
+        if align_left:
+            counts = np.minimum(frame.lengths, width)
+            rows = (ends - counts)[:, None] + np.arange(width)[None, :]
+            mask = np.arange(width)[None, :] < counts[:, None]
+        else:
+            rows = ends[:, None] - width + np.arange(width)[None, :]
+            mask = rows >= frame.offsets[:-1][:, None]
+        return np.where(mask, rows, 0), mask
 
     @staticmethod
-    def _normalized_variance(values: list[float]) -> float:
-        if len(values) < 2:
-            return 0.0
-        mean_value = float(np.mean(values))
-        variance = float(np.var(values))
-        return min(1.0, variance / ((abs(mean_value) + 1.0) ** 2))
-
-    def _build_snapshot(
-        self,
-        machine_id: str,
-        as_of_date: date,
-        history: list[dict],
-        shift_scrap_correlation: float,
-    ) -> MachineSnapshot:
-        downtime_series = [float(r["downtime_minutes"]) for r in history]
-        output_series = [float(r["output_units"]) for r in history]
-        scrap_series = [float(r["scrap_units"]) for r in history]
-
-        rolling_window = history[-14:] if len(history) >= 14 else history
-        rolling_downtime = [float(r["downtime_minutes"]) for r in rolling_window]
-        rolling_scrap = [float(r["scrap_units"]) for r in rolling_window]
-        rolling_output = [float(r["output_units"]) for r in rolling_window]
-
-        downtime_variance = self._normalized_variance(rolling_downtime)
-        scrap_variance = self._normalized_variance(rolling_scrap)
-
-        output_slope = self._slope(rolling_output)
-        output_mean = abs(float(np.mean(rolling_output))) if rolling_output else 1.0
-        output_degradation = min(1.0, max(0.0, -self._safe_ratio(output_slope, output_mean)))
-
-        downtime_mu = float(np.mean(downtime_series)) if downtime_series else 0.0
-        downtime_sigma = float(np.std(downtime_series)) if downtime_series else 0.0
-        scrap_mu = float(np.mean(scrap_series)) if scrap_series else 0.0
-        scrap_sigma = float(np.std(scrap_series)) if scrap_series else 0.0
-
-        anomaly_hits = 0
-        for row in rolling_window:
-            downtime = float(row["downtime_minutes"])
-            scrap = float(row["scrap_units"])
-            downtime_z = 0.0 if downtime_sigma == 0 else abs((downtime - downtime_mu) / downtime_sigma)
-            scrap_z = 0.0 if scrap_sigma == 0 else abs((scrap - scrap_mu) / scrap_sigma)
-            if downtime_z >= 2.0 or scrap_z >= 2.0:
-                anomaly_hits += 1
-        anomaly_frequency = self._safe_ratio(anomaly_hits, max(len(rolling_window), 1))
+    def _gather(column: np.ndarray, rows: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        if column.size == 0:
+            return np.zeros(rows.shape, dtype=float)
+        return np.where(mask, column[rows], 0.0)
+
+    @staticmethod
+    def _masked_moments(
+        values: np.ndarray, mask: np.ndarray, counts: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        safe_counts = np.maximum(counts, 1)
+        mean = np.sum(np.where(mask, values, 0.0), axis=1) / safe_counts
+        centered = np.where(mask, values - mean[:, None], 0.0)
+        variance = np.sum(centered**2, axis=1) / safe_counts
+        return mean, variance
+
+    @staticmethod
+    def _masked_slope(
+        values: np.ndarray, mask: np.ndarray, counts: np.ndarray, mean: np.ndarray
+    ) -> np.ndarray:
+        x = np.cumsum(mask, axis=1) - 1.0
+        x_center = np.where(mask, x - ((counts - 1) / 2.0)[:, None], 0.0)
+        y_center = np.where(mask, values - mean[:, None], 0.0)
+        den = np.sum(x_center**2, axis=1)
+        num = np.sum(x_center * y_center, axis=1)
+        slope = np.zeros_like(num)
+        np.divide(num, den, out=slope, where=(den != 0) & (counts >= 2))
+        return slope
+
+    @staticmethod
+    def _masked_normalized_variance(
+        mean: np.ndarray, variance: np.ndarray, counts: np.ndarray
+    ) -> np.ndarray:
+        normalized = np.minimum(1.0, variance / ((np.abs(mean) + 1.0) ** 2))
+        return np.where(counts >= 2, normalized, 0.0)
+
+    @staticmethod
+    def _zscore_hits(
+        values: np.ndarray, mu: np.ndarray, sigma: np.ndarray, threshold: float = 2.0
+    ) -> np.ndarray:
+        z = np.zeros_like(values)
+        np.divide(np.abs(values - mu[:, None]), sigma[:, None], out=z, where=sigma[:, None] != 0)
+        return z >= threshold
+
+    @staticmethod
+    def _segment_moments(
+        frame: MachineDailyFrame, column: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Per-machine population mean and variance of ``column`` over each full history."""
+        lengths = frame.lengths
+        mean = np.zeros(frame.n_machines, dtype=float)
+        variance = np.zeros(frame.n_machines, dtype=float)
+        present = lengths > 0
+        if not np.any(present):
+            return mean, variance
+        starts = frame.offsets[:-1][present]
+        counts = lengths[present]
+        mean[present] = np.add.reduceat(column, starts) / counts
+        centered = column - np.repeat(mean, lengths)
+        variance[present] = np.add.reduceat(centered * centered, starts) / counts
+        return mean, variance
 
+    @staticmethod
+    def _output_degradation(output_slope: np.ndarray, output_mean: np.ndarray) -> np.ndarray:
+        output_mean = np.abs(output_mean)
+        output_ratio = np.zeros_like(output_slope)
+        np.divide(output_slope, output_mean, out=output_ratio, where=output_mean != 0)
+        return np.clip(-output_ratio, 0.0, 1.0)
+
+    @classmethod
+    def _health_score(
+        cls,
+        downtime_variance: np.ndarray,
+        anomaly_frequency: np.ndarray,
+        output_degradation: np.ndarray,
+        scrap_variance: np.ndarray,
+    ) -> np.ndarray:
         health_score = (
-            self.DOWNTIME_WEIGHT * downtime_variance
-            + self.ANOMALY_WEIGHT * anomaly_frequency
-            + self.OUTPUT_WEIGHT * output_degradation
-            + self.SCRAP_WEIGHT * scrap_variance
+            cls.DOWNTIME_WEIGHT * downtime_variance
+            + cls.ANOMALY_WEIGHT * anomaly_frequency
+            + cls.OUTPUT_WEIGHT * output_degradation
+            + cls.SCRAP_WEIGHT * scrap_variance
         ) * 100.0
+        return np.clip(health_score, 0.0, 100.0)
+
+    def _fleet_snapshot_features(self, frame: MachineDailyFrame) -> dict[str, np.ndarray]:
+        """Computes every machine's snapshot features at once from a machines x days matrix."""
+        window = self.ROLLING_WINDOW_DAYS
+        lengths = frame.lengths
+        downtime_mu, downtime_var = self._segment_moments(frame, frame.downtime_minutes)
+        scrap_mu, scrap_var = self._segment_moments(frame, frame.scrap_units)
+
+        rolling_counts = np.minimum(lengths, window)
+        rolling_rows, rolling_mask = self._trailing_window(frame, window)
+        rolling_downtime = self._gather(frame.downtime_minutes, rolling_rows, rolling_mask)
+        rolling_scrap = self._gather(frame.scrap_units, rolling_rows, rolling_mask)
+        rolling_output = self._gather(frame.output_units, rolling_rows, rolling_mask)
+
+        return self._window_features(
+            np.stack([rolling_downtime, rolling_scrap, rolling_output]),
+            rolling_mask,
+            rolling_counts,
+            np.stack([downtime_mu, scrap_mu]),
+            np.stack([downtime_var, scrap_var]),
+            lengths,
+        )
 
-        return MachineSnapshot(
-            machine_id=machine_id,
-            as_of_date=as_of_date,
-            rolling_downtime_variance=round(downtime_variance, 4),
-            anomaly_frequency=round(anomaly_frequency, 4),
-            output_degradation_trend=round(output_degradation, 4),
-            scrap_variance=round(scrap_variance, 4),
-            downtime_trend=round(max(0.0, self._slope(rolling_downtime)), 4),
-            scrap_trend=round(max(0.0, self._slope(rolling_scrap)), 4),
-            shift_scrap_correlation=round(shift_scrap_correlation, 4),
-            health_score=round(max(0.0, min(100.0, health_score)), 2),
-            data_points=len(history),
+    def _state_snapshot_features(self, states: list[MachineFeatureState]) -> dict[str, np.ndarray]:
+        """The features of ``_fleet_snapshot_features``, from running moments and recent rows."""
+        window = self.ROLLING_WINDOW_DAYS
+        if any(state.rolling_days != window for state in states):
+            raise ValueError(f"Feature states must track a {window}-day rolling window")
+        counts = np.array([state.data_points for state in states], dtype=np.int64)
+        baseline_mu = np.array([state.mean for state in states], dtype=float).reshape(-1, 2)
+        baseline_m2 = np.array([state.m2 for state in states], dtype=float).reshape(-1, 2)
+        baseline_var = baseline_m2 / np.maximum(counts, 1)[:, None]
+
+        rolling_counts = np.array([len(state.recent) for state in states], dtype=np.int64)
+        rolling_values = np.zeros((3, len(states), window), dtype=float)
+        for i, state in enumerate(states):
+            rows = state.rolling_rows()
+            if rows:
+                rolling_values[:, i, window - len(rows) :] = np.array(rows, dtype=float)[:, 1:].T
+        # Right-aligned like ``_trailing_window`` so both paths sum in the same order.
+        rolling_mask = np.arange(window)[None, :] >= (window - rolling_counts)[:, None]
+        return self._window_features(
+            rolling_values, rolling_mask, rolling_counts, baseline_mu.T, baseline_var.T, counts
         )
 
-    @staticmethod
-    def _group_by_machine(rows: list[dict]) -> dict[str, list[dict]]:
-        grouped: dict[str, list[dict]] = {}
-        for row in rows:
-            grouped.setdefault(str(row["machine_id"]), []).append(row)
-        for machine_rows in grouped.values():
-            machine_rows.sort(key=lambda r: r["date"])
-        return grouped
+    def _window_features(
+        self,
+        rolling: np.ndarray,
+        rolling_mask: np.ndarray,
+        rolling_counts: np.ndarray,
+        baseline_mu: np.ndarray,
+        baseline_var: np.ndarray,
+        data_points: np.ndarray,
+    ) -> dict[str, np.ndarray]:
+        """Snapshot features from the rolling downtime, scrap and output matrices in ``rolling``
+        and the downtime and scrap baselines, one row per machine.
+        """
+        rolling_downtime, rolling_scrap, rolling_output = rolling
+        r_downtime_mean, r_downtime_var = self._masked_moments(
+            rolling_downtime, rolling_mask, rolling_counts
+        )
+        r_scrap_mean, r_scrap_var = self._masked_moments(
+            rolling_scrap, rolling_mask, rolling_counts
+        )
+        r_output_mean, _ = self._masked_moments(rolling_output, rolling_mask, rolling_counts)
+
+        downtime_variance = self._masked_normalized_variance(
+            r_downtime_mean, r_downtime_var, rolling_counts
+        )
+        scrap_variance = self._masked_normalized_variance(r_scrap_mean, r_scrap_var, rolling_counts)
+
+        output_slope = self._masked_slope(
+            rolling_output, rolling_mask, rolling_counts, r_output_mean
+        )
+        output_degradation = self._output_degradation(output_slope, r_output_mean)
+
+        anomalies = rolling_mask & (
+            self._zscore_hits(rolling_downtime, baseline_mu[0], np.sqrt(baseline_var[0]))
+            | self._zscore_hits(rolling_scrap, baseline_mu[1], np.sqrt(baseline_var[1]))
+        )
+        anomaly_frequency = np.count_nonzero(anomalies, axis=1) / np.maximum(rolling_counts, 1)
+
+        return {
+            "rolling_downtime_variance": downtime_variance,
+            "anomaly_frequency": anomaly_frequency,
+            "output_degradation_trend": output_degradation,
+            "scrap_variance": scrap_variance,
+            "downtime_trend": np.maximum(
+                0.0,
+                self._masked_slope(rolling_downtime, rolling_mask, rolling_counts, r_downtime_mean),
+            ),
+            "scrap_trend": np.maximum(
+                0.0, self._masked_slope(rolling_scrap, rolling_mask, rolling_counts, r_scrap_mean)
+            ),
+            "health_score": self._health_score(
+                downtime_variance, anomaly_frequency, output_degradation, scrap_variance
+            ),
+            "data_points": data_points,
+        }
 
     @staticmethod
     def _shift_scrap_correlation(shift_rows: list[dict]) -> dict[str, float]:
@@ -220,100 +522,420 @@ class PredictiveIntelligenceEngine:
             correlation[machine_id] = max(0.0, min(1.0, (high - low) / max(high, 1.0)))
         return correlation
 
-    def machine_health_scores(self, rows: list[dict], shift_rows: list[dict], as_of_date: date) -> list[MachineSnapshot]:
-        grouped = self._group_by_machine(rows)
-        shift_corr = self._shift_scrap_correlation(shift_rows)
+    def _map_shards(self, stage: str, frame: MachineDailyFrame, **kwargs: object) -> list | None:
+        """Runs the ``stage`` classmethod on machine shards in the executor, or returns None.
+
+        Workers get the classmethod alone, not an engine, so no caches or fitted
+        state are built per shard. None means the caller runs the stage in-process.
+        Only training data generation is sharded: health scores and drift are
+        vectorized over the fleet and lose more to pickling than they gain.
+        """
+        if self.executor is None or not self.executor.accepts(frame):
+            return None
+        return self.executor.map_shards(getattr(type(self), stage), frame, **kwargs)
+
+    def machine_health_scores(
+        self, rows: MachineDailyFrame | list[dict], shift_rows: list[dict], as_of_date: date
+    ) -> list[MachineSnapshot]:
+        with stage("machine_health_scores") as span:
+            frame = self._as_frame(rows)
+            span.record(rows=frame.n_rows, machines=len(frame.machine_ids))
+            shift_corr = self._shift_scrap_correlation(shift_rows)
+            features = self._fleet_snapshot_features(frame)
+            return self._snapshots(frame.machine_ids, features, shift_corr, as_of_date)
+
+    def machine_health_scores_from_state(
+        self, states: Mapping[str, MachineFeatureState], shift_rows: list[dict], as_of_date: date
+    ) -> list[MachineSnapshot]:
+        """Same snapshots as ``machine_health_scores``, read from per-machine feature states.
+
+        Every state's window must end on ``as_of_date``.
+        """
+        with stage("machine_health_scores_from_state") as span:
+            machine_ids = sorted(states)
+            span.record(machines=len(machine_ids))
+            if any(states[machine_id].window_end != as_of_date for machine_id in machine_ids):
+                raise ValueError("Feature states must end on the as-of date")
+            features = self._state_snapshot_features([states[m] for m in machine_ids])
+            return self._snapshots(
+                machine_ids, features, self._shift_scrap_correlation(shift_rows), as_of_date
+            )
+
+    @staticmethod
+    def _snapshots(
+        machine_ids: list[str],
+        features: dict[str, np.ndarray],
+        shift_corr: dict[str, float],
+        as_of_date: date,
+    ) -> list[MachineSnapshot]:
         snapshots: list[MachineSnapshot] = []
-        for machine_id, history in grouped.items():
-            if not history:
+        for machine_id, d_var, anomaly, out_deg, s_var, d_trend, s_trend, health, points in zip(
+            machine_ids,
+            features["rolling_downtime_variance"].tolist(),
+            features["anomaly_frequency"].tolist(),
+            features["output_degradation_trend"].tolist(),
+            features["scrap_variance"].tolist(),
+            features["downtime_trend"].tolist(),
+            features["scrap_trend"].tolist(),
+            features["health_score"].tolist(),
+            features["data_points"].tolist(),
+            strict=True,
+        ):
+            if points == 0:
                 continue
             snapshots.append(
-                self._build_snapshot(
+                MachineSnapshot(
                     machine_id=machine_id,
                     as_of_date=as_of_date,
-                    history=history,
-                    shift_scrap_correlation=shift_corr.get(machine_id, 0.0),
+                    rolling_downtime_variance=round(d_var, 4),
+                    anomaly_frequency=round(anomaly, 4),
+                    output_degradation_trend=round(out_deg, 4),
+                    scrap_variance=round(s_var, 4),
+                    downtime_trend=round(d_trend, 4),
+                    scrap_trend=round(s_trend, 4),
+                    shift_scrap_correlation=round(shift_corr.get(machine_id, 0.0), 4),
+                    health_score=round(health, 2),
+                    data_points=points,
                 )
             )
         snapshots.sort(key=lambda s: s.health_score, reverse=True)
         return snapshots
 
     @staticmethod
-    def _sample_features(history: list[dict], idx: int) -> list[float]:
-        window_start = max(0, idx - 13)
-        hist_window = history[window_start : idx + 1]
-        downtime = [float(r["downtime_minutes"]) for r in hist_window]
-        scrap = [float(r["scrap_units"]) for r in hist_window]
-        output = [float(r["output_units"]) for r in hist_window]
-
-        d_var = PredictiveIntelligenceEngine._normalized_variance(downtime)
-        s_var = PredictiveIntelligenceEngine._normalized_variance(scrap)
-        out_mean = abs(float(np.mean(output))) if output else 1.0
-        out_slope = PredictiveIntelligenceEngine._slope(output)
-        out_deg = min(1.0, max(0.0, -PredictiveIntelligenceEngine._safe_ratio(out_slope, out_mean)))
-
-        d_mu = float(np.mean(downtime)) if downtime else 0.0
-        d_sigma = float(np.std(downtime)) if downtime else 0.0
-        s_mu = float(np.mean(scrap)) if scrap else 0.0
-        s_sigma = float(np.std(scrap)) if scrap else 0.0
-        anomaly = 0
-        for row in hist_window:
-            dz = 0.0 if d_sigma == 0 else abs((float(row["downtime_minutes"]) - d_mu) / d_sigma)
-            sz = 0.0 if s_sigma == 0 else abs((float(row["scrap_units"]) - s_mu) / s_sigma)
-            if dz >= 2.0 or sz >= 2.0:
-                anomaly += 1
-        anomaly_ratio = PredictiveIntelligenceEngine._safe_ratio(anomaly, max(len(hist_window), 1))
-
-        return [d_var, anomaly_ratio, out_deg, s_var]
+    def _prefix_sums(values: np.ndarray) -> np.ndarray:
+        sums = np.zeros(values.size + 1, dtype=float)
+        np.cumsum(values, out=sums[1:])
+        return sums
+
+    @classmethod
+    def _range_moments(
+        cls, values: np.ndarray, starts: np.ndarray, ends: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Mean, population variance and index-slope of ``values[start:end]`` for every range.
+
+        Values are centered on their overall mean first so the prefix sums of
+        squares do not lose precision to cancellation.
+        """
+        shift = float(np.mean(values)) if values.size else 0.0
+        centered = values - shift
+        total = cls._prefix_sums(centered)
+        squares = cls._prefix_sums(centered * centered)
+        weighted = cls._prefix_sums(np.arange(values.size) * centered)
+
+        counts = (ends - starts).astype(float)
+        safe_counts = np.maximum(counts, 1.0)
+        sums = total[ends] - total[starts]
+        mean = sums / safe_counts
+        variance = np.maximum((squares[ends] - squares[starts]) / safe_counts - mean * mean, 0.0)
+
+        # Sum of (j - start) * y_j over the range, against positions 0..n-1.
+        sum_xy = (weighted[ends] - weighted[starts]) - starts * sums
+        sum_xx = counts * (counts * counts - 1.0) / 12.0
+        num = sum_xy - (counts - 1.0) / 2.0 * sums
+        slope = np.zeros_like(mean)
+        np.divide(num, sum_xx, out=slope, where=(sum_xx != 0) & (counts >= 2))
+        return mean + shift, variance, slope
+
+    def machine_health_trend(
+        self,
+        rows: MachineDailyFrame | list[dict],
+        machine_id: str,
+        start: date,
+        end: date,
+        history_days: int = 120,
+    ) -> list[MachineSnapshot]:
+        """One machine's snapshot for every date in ``[start, end]``, as scored on that date.
+
+        Each date sees its trailing ``history_days`` like the daily pipeline. All
+        windows come from prefix sums over the machine's series, so a long range
+        costs little more than a single date. Shift scrap correlation is not
+        tracked historically and is reported as 0.
+        """
+        frame = self._as_frame(rows)
+        if machine_id not in frame.machine_ids or start > end:
+            return []
+        history = frame.machine_slice(frame.machine_ids.index(machine_id))
+        dates = frame.date_ordinal[history]
+        downtime = frame.downtime_minutes[history]
+        scrap = frame.scrap_units[history]
+        output = frame.output_units[history]
+
+        as_of = np.arange(start.toordinal(), end.toordinal() + 1)
+        seg_start = np.searchsorted(dates, as_of - history_days, "left")
+        seg_end = np.searchsorted(dates, as_of, "right")
+        present = seg_end > seg_start
+        as_of, seg_start, seg_end = as_of[present], seg_start[present], seg_end[present]
+        window_start = np.maximum(seg_start, seg_end - self.ROLLING_WINDOW_DAYS)
+        rolling_counts = seg_end - window_start
+
+        downtime_mu, downtime_var, _ = self._range_moments(downtime, seg_start, seg_end)
+        scrap_mu, scrap_var, _ = self._range_moments(scrap, seg_start, seg_end)
+        r_downtime_mean, r_downtime_var, downtime_slope = self._range_moments(
+            downtime, window_start, seg_end
+        )
+        r_scrap_mean, r_scrap_var, scrap_slope = self._range_moments(scrap, window_start, seg_end)
+        r_output_mean, _, output_slope = self._range_moments(output, window_start, seg_end)
 
-    @staticmethod
-    def _failure_label(history: list[dict], idx: int, machine_downtime_p85: float, machine_scrap_p85: float) -> int:
-        current_output_window = [float(r["output_units"]) for r in history[max(0, idx - 6) : idx + 1]]
-        output_baseline = float(np.mean(current_output_window)) if current_output_window else 0.0
-        future = history[idx + 1 : idx + 8]
-        for row in future:
-            downtime_flag = float(row["downtime_minutes"]) > machine_downtime_p85
-            scrap_flag = float(row["scrap_percent"]) > machine_scrap_p85
-            output_flag = output_baseline > 0 and float(row["output_units"]) < (0.7 * output_baseline)
-            if downtime_flag or scrap_flag or output_flag:
-                return 1
-        return 0
-
-    def build_training_data(self, rows: list[dict]) -> TrainingData:
-        grouped = self._group_by_machine(rows)
-        machine_ids: list[str] = []
-        feature_rows: list[list[float]] = []
-        labels: list[int] = []
+        downtime_variance = self._masked_normalized_variance(
+            r_downtime_mean, r_downtime_var, rolling_counts
+        )
+        scrap_variance = self._masked_normalized_variance(r_scrap_mean, r_scrap_var, rolling_counts)
+        output_degradation = self._output_degradation(output_slope, r_output_mean)
+
+        rolling_rows = window_start[:, None] + np.arange(self.ROLLING_WINDOW_DAYS)[None, :]
+        rolling_mask = rolling_rows < seg_end[:, None]
+        rolling_rows = np.where(rolling_mask, rolling_rows, 0)
+        anomalies = rolling_mask & (
+            self._zscore_hits(
+                self._gather(downtime, rolling_rows, rolling_mask),
+                downtime_mu,
+                np.sqrt(downtime_var),
+            )
+            | self._zscore_hits(
+                self._gather(scrap, rolling_rows, rolling_mask), scrap_mu, np.sqrt(scrap_var)
+            )
+        )
+        anomaly_frequency = np.count_nonzero(anomalies, axis=1) / np.maximum(rolling_counts, 1)
 
-        for machine_id, history in grouped.items():
-            if len(history) < 15:
-                continue
-            machine_downtime_p85 = float(
-                np.percentile([float(r["downtime_minutes"]) for r in history], 85)
+        health_score = self._health_score(
+            downtime_variance, anomaly_frequency, output_degradation, scrap_variance
+        )
+
+        return [
+            MachineSnapshot(
+                machine_id=machine_id,
+                as_of_date=date.fromordinal(day),
+                rolling_downtime_variance=round(d_var, 4),
+                anomaly_frequency=round(anomaly, 4),
+                output_degradation_trend=round(out_deg, 4),
+                scrap_variance=round(s_var, 4),
+                downtime_trend=round(d_trend, 4),
+                scrap_trend=round(s_trend, 4),
+                shift_scrap_correlation=0.0,
+                health_score=round(health, 2),
+                data_points=points,
             )
-            machine_scrap_p85 = float(np.percentile([float(r["scrap_percent"]) for r in history], 85))
+            for day, d_var, anomaly, out_deg, s_var, d_trend, s_trend, health, points in zip(
+                as_of.tolist(),
+                downtime_variance.tolist(),
+                anomaly_frequency.tolist(),
+                output_degradation.tolist(),
+                scrap_variance.tolist(),
+                np.maximum(downtime_slope, 0.0).tolist(),
+                np.maximum(scrap_slope, 0.0).tolist(),
+                health_score.tolist(),
+                (seg_end - seg_start).tolist(),
+                strict=True,
+            )
+        ]
+
+    @classmethod
+    def _sample_features(
+        cls,
+        downtime: np.ndarray,
+        scrap: np.ndarray,
+        output: np.ndarray,
+        idx: np.ndarray,
+        starts: np.ndarray | int = 0,
+    ) -> np.ndarray:
+        """Feature rows for the rolling windows ending at each ``idx``.
+
+        ``starts`` holds the first row of each sample's machine so that windows
+        never reach into the previous machine's history.
+        """
+        width = cls.ROLLING_WINDOW_DAYS
+        rows = idx[:, None] - (width - 1) + np.arange(width)[None, :]
+        mask = rows >= np.broadcast_to(starts, idx.shape)[:, None]
+        rows = np.where(mask, rows, 0)
+        counts = np.count_nonzero(mask, axis=1)
+        d_window = cls._gather(downtime, rows, mask)
+        s_window = cls._gather(scrap, rows, mask)
+        o_window = cls._gather(output, rows, mask)
+
+        d_mean, d_var = cls._masked_moments(d_window, mask, counts)
+        s_mean, s_var = cls._masked_moments(s_window, mask, counts)
+        o_mean, _ = cls._masked_moments(o_window, mask, counts)
+
+        o_slope = cls._masked_slope(o_window, mask, counts, o_mean)
+        o_abs_mean = np.abs(o_mean)
+        o_ratio = np.zeros_like(o_slope)
+        np.divide(o_slope, o_abs_mean, out=o_ratio, where=o_abs_mean != 0)
+
+        anomalies = mask & (
+            cls._zscore_hits(d_window, d_mean, np.sqrt(d_var))
+            | cls._zscore_hits(s_window, s_mean, np.sqrt(s_var))
+        )
+        return np.column_stack(
+            [
+                cls._masked_normalized_variance(d_mean, d_var, counts),
+                np.count_nonzero(anomalies, axis=1) / np.maximum(counts, 1),
+                np.clip(-o_ratio, 0.0, 1.0),
+                cls._masked_normalized_variance(s_mean, s_var, counts),
+            ]
+        )
 
-            for idx in range(7, len(history) - 7):
-                feature_rows.append(self._sample_features(history, idx))
-                labels.append(self._failure_label(history, idx, machine_downtime_p85, machine_scrap_p85))
-                machine_ids.append(machine_id)
+    @classmethod
+    def _failure_labels(
+        cls,
+        downtime: np.ndarray,
+        scrap_percent: np.ndarray,
+        output: np.ndarray,
+        idx: np.ndarray,
+        machine_downtime_p85: float | np.ndarray,
+        machine_scrap_p85: float | np.ndarray,
+        starts: np.ndarray | int = 0,
+    ) -> np.ndarray:
+        """1 where any of the ``LABEL_HORIZON_DAYS`` rows after ``idx`` breaches a threshold.
+
+        Thresholds and ``starts`` are scalars or one value per ``idx``. Every
+        ``idx`` must have a full horizon of rows of the same machine after it.
+        """
+        baseline_rows = idx[:, None] - 6 + np.arange(7)[None, :]
+        baseline_mask = baseline_rows >= np.broadcast_to(starts, idx.shape)[:, None]
+        baseline_counts = np.count_nonzero(baseline_mask, axis=1)
+        baseline, _ = cls._masked_moments(
+            cls._gather(output, np.where(baseline_mask, baseline_rows, 0), baseline_mask),
+            baseline_mask,
+            baseline_counts,
+        )
+        future = idx[:, None] + 1 + np.arange(cls.LABEL_HORIZON_DAYS)[None, :]
+        output_flag = (output[future] < 0.7 * baseline[:, None]) & (baseline > 0)[:, None]
+        downtime_limit = np.broadcast_to(machine_downtime_p85, idx.shape)[:, None]
+        scrap_limit = np.broadcast_to(machine_scrap_p85, idx.shape)[:, None]
+        flags = (
+            (downtime[future] > downtime_limit)
+            | (scrap_percent[future] > scrap_limit)
+            | output_flag
+        )
+        return np.any(flags, axis=1).astype(int)
+
+    def build_training_data(
+        self,
+        rows: MachineDailyFrame | list[dict],
+        closed_after: date | None = None,
+        label_thresholds: Mapping[str, tuple[float, float]] | None = None,
+    ) -> TrainingData:
+        """Labelled feature windows for every machine with at least 15 days of history.
+
+        A sample's label looks ``LABEL_HORIZON_DAYS`` rows ahead, so it becomes
+        available on the date of that last row. With ``closed_after`` only samples
+        whose look-ahead closed after that date are built. ``label_thresholds``
+        supplies (downtime, scrap percent) 85th percentiles per machine, e.g. from
+        persisted sketches; other machines use exact percentiles of their history.
+        """
+        with stage("build_training_data") as span:
+            frame = self._as_frame(rows)
+            span.record(machines=len(frame.machine_ids))
+            shards = self._map_shards(
+                "_machine_training_data",
+                frame,
+                closed_after=closed_after,
+                label_thresholds=label_thresholds,
+            )
+            if shards is None:
+                training = self._machine_training_data(frame, closed_after, label_thresholds)
+            else:
+                shards = [shard for shard in shards if shard.machine_ids] or shards[:1]
+                training = TrainingData(
+                    machine_ids=[
+                        machine_id for shard in shards for machine_id in shard.machine_ids
+                    ],
+                    X=np.concatenate([shard.X for shard in shards]),
+                    y=np.concatenate([shard.y for shard in shards]),
+                    label_dates=np.concatenate([shard.label_dates for shard in shards]),
+                    closed_after=closed_after,
+                )
+            span.record(
+                rows=int(training.X.shape[0]), arrays=(training.X, training.y, training.label_dates)
+            )
+            return training
+
+    @classmethod
+    def _machine_training_data(
+        cls,
+        frame: MachineDailyFrame,
+        closed_after: date | None = None,
+        label_thresholds: Mapping[str, tuple[float, float]] | None = None,
+    ) -> TrainingData:
+        horizon = cls.LABEL_HORIZON_DAYS
+        machine_ids: list[str] = []
+        sample_blocks: list[np.ndarray] = []
+        start_blocks: list[np.ndarray] = []
+        downtime_p85_blocks: list[np.ndarray] = []
+        scrap_p85_blocks: list[np.ndarray] = []
+
+        for machine, machine_id in enumerate(frame.machine_ids):
+            history = frame.machine_slice(machine)
+            n_days = history.stop - history.start
+            if n_days < 15:
+                continue
+            dates = frame.date_ordinal[history]
+            first_idx = 7
+            if closed_after is not None:
+                first_idx = max(
+                    first_idx,
+                    int(np.searchsorted(dates, closed_after.toordinal(), "right")) - horizon,
+                )
+            if first_idx >= n_days - horizon:
+                continue
+            count = n_days - horizon - first_idx
+            sample_blocks.append(np.arange(history.start + first_idx, history.stop - horizon))
+            start_blocks.append(np.full(count, history.start))
+            if label_thresholds is not None and machine_id in label_thresholds:
+                downtime_p85, scrap_p85 = label_thresholds[machine_id]
+            else:
+                downtime_p85 = np.percentile(frame.downtime_minutes[history], 85)
+                scrap_p85 = np.percentile(frame.scrap_percent[history], 85)
+            downtime_p85_blocks.append(np.full(count, downtime_p85))
+            scrap_p85_blocks.append(np.full(count, scrap_p85))
+            machine_ids.extend([machine_id] * count)
+
+        if not sample_blocks:
+            return TrainingData(
+                machine_ids=[],
+                X=np.empty((0, 4), dtype=float),
+                y=np.empty((0,), dtype=float),
+                closed_after=closed_after,
+            )
 
-        if not feature_rows:
-            return TrainingData(machine_ids=[], X=np.empty((0, 4), dtype=float), y=np.empty((0,), dtype=float))
+        idx = np.concatenate(sample_blocks)
+        starts = np.concatenate(start_blocks)
+        X = cls._sample_features(
+            frame.downtime_minutes, frame.scrap_units, frame.output_units, idx, starts
+        )
+        y = cls._failure_labels(
+            frame.downtime_minutes,
+            frame.scrap_percent,
+            frame.output_units,
+            idx,
+            np.concatenate(downtime_p85_blocks),
+            np.concatenate(scrap_p85_blocks),
+            starts,
+        )
+        return TrainingData(
+            machine_ids=machine_ids,
+            X=X,
+            y=y.astype(float),
+            label_dates=frame.date_ordinal[idx + horizon].astype(np.int32),
+            closed_after=closed_after,
+        )
 
-        X = np.array(feature_rows, dtype=float)
-        y = np.array(labels, dtype=float)
-        return TrainingData(machine_ids=machine_ids, X=X, y=y)
+    def incremental_cutoff(self, as_of_date: date) -> date | None:
+        """Date after which new training windows suffice, or None when a full refit is due."""
+        if self.model.weights is None or self.feature_mean is None or self.feature_std is None:
+            return None
+        if self.last_trained_on is None or self.last_full_refit_on is None:
+            return None
+        if as_of_date <= self.last_trained_on:
+            return None
+        if (as_of_date - self.last_full_refit_on).days >= self.FULL_REFIT_INTERVAL_DAYS:
+            return None
+        return self.last_trained_on
 
     @staticmethod
     def _standardize(X: np.ndarray, mean: np.ndarray, std: np.ndarray) -> np.ndarray:
         return (X - mean) / std
 
-    @staticmethod
-    def _sigmoid_scalar(x: float) -> float:
-        x = max(-40.0, min(40.0, x))
-        return 1.0 / (1.0 + exp(-x))
-
     def _fit_feature_scaler(self, X: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
         mean = np.mean(X, axis=0)
         std = np.std(X, axis=0)
@@ -322,39 +944,91 @@ class PredictiveIntelligenceEngine:
         self.feature_std = std
         return mean, std
 
-    def _make_synthetic_training(self, X_real: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    @classmethod
+    def _prior_signature(
+        cls, X_real: np.ndarray
+    ) -> tuple[tuple[float, ...], tuple[float, ...]] | None:
+        """Feature mean and std rounded to a few significant digits; None without real data."""
         if X_real.size == 0:
-            X_syn = np.random.uniform(0.0, 1.0, (300, 4))
+            return None
+        digits = cls.PRIOR_SIGNATURE_DIGITS
+        mean = tuple(float(f"{v:.{digits}g}") for v in np.mean(X_real, axis=0))
+        std = tuple(float(f"{v:.{digits}g}") for v in np.std(X_real, axis=0))
+        return mean, std
+
+    @classmethod
+    def _make_synthetic_training(
+        cls, signature: tuple[tuple[float, ...], tuple[float, ...]] | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Seeded prior samples around the signature's mean and std, labelled by fixed weights."""
+        rng = np.random.default_rng(cls.PRIOR_SEED)
+        if signature is None:
+            X_syn = rng.uniform(0.0, 1.0, (cls.PRIOR_SAMPLES, 4))
         else:
-            real_mean = np.mean(X_real, axis=0)
-            real_std = np.std(X_real, axis=0)
-            real_std = np.where(real_std == 0, 0.1, real_std)
-            sample_count = max(300, X_real.shape[0] * 2)
-            X_syn = np.random.normal(loc=real_mean, scale=real_std, size=(sample_count, X_real.shape[1]))
-            X_syn = np.clip(X_syn, 0.0, 1.5)
-
-        logits = (
-            1.9 * X_syn[:, 0]
-            + 1.6 * X_syn[:, 1]
-            + 1.3 * X_syn[:, 2]
-            + 1.2 * X_syn[:, 3]
-            - 2.5
-        )
-        probs = np.array([self._sigmoid_scalar(float(v)) for v in logits], dtype=float)
-        y_syn = (probs > 0.5).astype(float)
+            mean = np.array(signature[0])
+            std = np.array(signature[1])
+            std = np.where(std == 0, 0.1, std)
+            X_syn = np.clip(
+                rng.normal(loc=mean, scale=std, size=(cls.PRIOR_SAMPLES, mean.size)), 0.0, 1.5
+            )
+
+        logits = X_syn @ np.array([1.9, 1.6, 1.3, 1.2]) - 2.5
+        y_syn = (LogisticRegressionLite._sigmoid(logits) > 0.5).astype(float)
         return X_syn, y_syn
 
+    def _fit_prior(self, signature: tuple[tuple[float, ...], tuple[float, ...]] | None) -> None:
+        """Sets the model to the prior fitted for ``signature``, fitting it only on a cache miss.
+
+        The prior is standardized with the signature's own scaler, so it depends
+        on nothing but the signature and the model's hyperparameters.
+        """
+        model = self.model
+        key = (
+            signature,
+            model.solver,
+            model.learning_rate,
+            model.epochs,
+            model.l2,
+            model.tol,
+            model.max_iter,
+        )
+
+        def fit() -> tuple[np.ndarray, float, int, bool, float | None]:
+            X_syn, y_syn = self._make_synthetic_training(signature)
+            if signature is None:
+                mean, std = np.mean(X_syn, axis=0), np.std(X_syn, axis=0)
+            else:
+                mean, std = np.array(signature[0]), np.array(signature[1])
+            model.fit(
+                self._standardize(X_syn, mean, np.where(std == 0, 1.0, std)), y_syn, reset=True
+            )
+            return model.weights.copy(), model.bias, model.n_iter, model.converged, model.final_loss
+
+        weights, model.bias, model.n_iter, model.converged, model.final_loss = (
+            self.prior_cache.get_or_compute(key, fit)
+        )
+        model.weights = weights.copy()
+
     def train(self, training: TrainingData, as_of_date: date) -> tuple[float, float]:
+        with stage("train") as span:
+            span.record(rows=int(training.X.shape[0]), arrays=(training.X, training.y))
+            if (
+                training.closed_after is not None
+                and self.incremental_cutoff(as_of_date) is not None
+            ):
+                return self._train_incremental(training, as_of_date)
+            return self._train_full(training, as_of_date)
+
+    def _train_full(self, training: TrainingData, as_of_date: date) -> tuple[float, float]:
         X_real = training.X
         y_real = training.y
 
-        X_syn, y_syn = self._make_synthetic_training(X_real)
-
-        scaler_source = X_real if X_real.size else X_syn
-        mean, std = self._fit_feature_scaler(scaler_source)
-
-        X_syn_scaled = self._standardize(X_syn, mean, std)
-        self.model.fit(X_syn_scaled, y_syn, reset=True)
+        with stage("train.fit_prior"):
+            signature = self._prior_signature(X_real)
+            self._fit_prior(signature)
+        mean, std = self._fit_feature_scaler(
+            X_real if X_real.size else self._make_synthetic_training(None)[0]
+        )
 
         accuracy = 0.0
         brier = 0.25
@@ -365,23 +1039,108 @@ class PredictiveIntelligenceEngine:
             y_train, y_valid = y_real[:split], y_real[split:]
 
             if X_train.size and y_train.size:
-                self.model.fit(X_train, y_train, reset=False)
+                with stage("train.fit") as span:
+                    span.record(rows=int(X_train.shape[0]), arrays=(X_real, X_real_scaled))
+                    self.model.fit(X_train, y_train, reset=False, anchor=self.model.weights)
 
             if X_valid.size and y_valid.size:
                 preds = self.model.predict_proba(X_valid)
                 pred_labels = (preds >= 0.5).astype(float)
                 accuracy = float(np.mean(pred_labels == y_valid))
                 brier = float(np.mean((preds - y_valid) ** 2))
+                self._reset_rolling_metrics(pred_labels == y_valid, (preds - y_valid) ** 2)
             else:
                 preds = self.model.predict_proba(X_train)
                 pred_labels = (preds >= 0.5).astype(float)
                 accuracy = float(np.mean(pred_labels == y_train)) if y_train.size else 0.0
                 brier = float(np.mean((preds - y_train) ** 2)) if y_train.size else 0.25
+                self._reset_rolling_metrics(pred_labels == y_train, (preds - y_train) ** 2)
+        else:
+            self._reset_rolling_metrics(np.empty(0), np.empty(0))
 
         self.last_trained_on = as_of_date
-        return round(accuracy, 4), round(brier, 4)
+        self.last_full_refit_on = as_of_date
+        self.last_accuracy = round(accuracy, 4)
+        self.last_brier = round(brier, 4)
+        return self.last_accuracy, self.last_brier
+
+    def _reset_rolling_metrics(self, hits: np.ndarray, sq_errors: np.ndarray) -> None:
+        """Seeds the rolling window with the latest holdout samples of a full refit."""
+        self.recent_hits.clear()
+        self.recent_sq_errors.clear()
+        self.recent_hits.extend(hits.astype(float).tolist())
+        self.recent_sq_errors.extend(sq_errors.astype(float).tolist())
+
+    def _train_incremental(self, training: TrainingData, as_of_date: date) -> tuple[float, float]:
+        """Scores the new windows with the current model, then folds them in with partial_fit.
+
+        The scaler stays fixed between full refits. The new windows are scored
+        before the update (test-then-train) and added to the rolling window of
+        the last ``ROLLING_METRIC_SAMPLES`` scored samples, which the reported
+        accuracy and Brier score are measured on, so a handful of new windows
+        cannot swing them on their own.
+        """
+        if training.X.size and training.y.size:
+            X_scaled = self._standardize(training.X, self.feature_mean, self.feature_std)
+            preds = self.model.predict_proba(X_scaled)
+            pred_labels = (preds >= 0.5).astype(float)
+            self.recent_hits.extend((pred_labels == training.y).astype(float).tolist())
+            self.recent_sq_errors.extend(((preds - training.y) ** 2).tolist())
+            self.last_accuracy = round(float(np.mean(self.recent_hits)), 4)
+            self.last_brier = round(float(np.mean(self.recent_sq_errors)), 4)
+            self.model.partial_fit(X_scaled, training.y)
+        self.last_trained_on = as_of_date
+        return self.last_accuracy, self.last_brier
+
+    def export_state(self) -> dict[str, object]:
+        """Trained weights, scaler and metrics as plain values for a persisted artifact."""
+        if self.model.weights is None or self.feature_mean is None or self.feature_std is None:
+            raise ValueError("Model has not been trained")
+        return {
+            "trained_on": self.last_trained_on,
+            "last_full_refit_on": self.last_full_refit_on or self.last_trained_on,
+            "solver": self.model.solver,
+            "weights_json": self.model.weights.tolist(),
+            "bias": float(self.model.bias),
+            "feature_mean_json": self.feature_mean.tolist(),
+            "feature_std_json": self.feature_std.tolist(),
+            "metrics_json": {
+                "accuracy": self.last_accuracy,
+                "brier": self.last_brier,
+                "n_iter": self.model.n_iter,
+                "converged": self.model.converged,
+                "final_loss": self.model.final_loss,
+                "recent_hits": list(self.recent_hits),
+                "recent_sq_errors": list(self.recent_sq_errors),
+            },
+        }
+
+    def restore_state(self, version: int, state: dict[str, object]) -> None:
+        """Loads an artifact produced by export_state, replacing the in-memory model."""
+        metrics = dict(state.get("metrics_json") or {})
+        self.model.weights = np.array(state["weights_json"], dtype=float)
+        self.model.bias = float(state["bias"])
+        self.model.n_iter = int(metrics.get("n_iter", 0))
+        self.model.converged = bool(metrics.get("converged", False))
+        self.model.final_loss = metrics.get("final_loss")
+        self.feature_mean = np.array(state["feature_mean_json"], dtype=float)
+        self.feature_std = np.array(state["feature_std_json"], dtype=float)
+        self.last_trained_on = state["trained_on"]
+        self.last_full_refit_on = state["last_full_refit_on"]
+        self.last_accuracy = float(metrics.get("accuracy", 0.0))
+        self.last_brier = float(metrics.get("brier", 0.25))
+        self.recent_hits = deque(metrics.get("recent_hits", []), maxlen=self.ROLLING_METRIC_SAMPLES)
+        self.recent_sq_errors = deque(
+            metrics.get("recent_sq_errors", []), maxlen=self.ROLLING_METRIC_SAMPLES
+        )
+        self.model_version = version
 
     def infer_machine_risk(self, snapshots: list[MachineSnapshot]) -> list[MachineRisk]:
+        with stage("infer_machine_risk") as span:
+            span.record(machines=len(snapshots))
+            return self._infer_machine_risk(snapshots)
+
+    def _infer_machine_risk(self, snapshots: list[MachineSnapshot]) -> list[MachineRisk]:
         if not snapshots:
             return []
         if self.feature_mean is None or self.feature_std is None:
@@ -424,65 +1183,147 @@ class PredictiveIntelligenceEngine:
             )
         return risks
 
-    @staticmethod
-    def detect_drift(rows: list[dict]) -> list[DriftSignal]:
-        grouped = PredictiveIntelligenceEngine._group_by_machine(rows)
-        signals: list[DriftSignal] = []
-
-        for machine_id, history in grouped.items():
-            if len(history) < 20:
-                continue
-
-            recent = history[-14:]
-            baseline = history[:-14]
-            baseline = baseline[-30:] if len(baseline) > 30 else baseline
-            if len(baseline) < 7:
-                continue
+    @classmethod
+    def _split_change_points(
+        cls, values: np.ndarray, mask: np.ndarray, counts: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Best mean-shift split of each left-aligned window, scanned with prefix sums."""
+        segment = cls.CHANGE_POINT_MIN_SEGMENT
+        _, variance = cls._masked_moments(values, mask, counts)
+        pooled_std = np.sqrt(variance)
+        pooled_std = np.where(pooled_std == 0, 1.0, pooled_std)
+
+        prefix = np.cumsum(values, axis=1)
+        total = prefix[np.arange(values.shape[0]), np.maximum(counts - 1, 0)]
+        split = np.arange(1, values.shape[1] + 1)[None, :]
+        valid = (split >= segment) & (split < counts[:, None] - segment)
+        right_size = np.where(valid, counts[:, None] - split, 1)
+        left_mean = prefix / split
+        right_mean = (total[:, None] - prefix) / right_size
+        scores = np.where(valid, np.abs(right_mean - left_mean) / pooled_std[:, None], 0.0)
+
+        best_column = np.argmax(scores, axis=1)
+        best_score = scores[np.arange(values.shape[0]), best_column]
+        return best_score, best_column + 1
+
+    @classmethod
+    def _cusum_change_points(
+        cls,
+        metrics: list[np.ndarray],
+        mask: np.ndarray,
+        reference: list[tuple[np.ndarray, np.ndarray]],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Earliest two-sided Page CUSUM alarm over several metrics and its estimated onset.
+
+        Each metric is standardized against its baseline mean and deviation. The
+        CUSUM statistic ``S_t = max(0, S_{t-1} + z_t - k)`` equals ``C_t - min(C_0..C_t)``
+        for the running sum ``C_t`` of ``z - k``, so the whole fleet is evaluated
+        with cumulative sums and running minimums instead of a per-day loop.
+        """
+        n_machines, width = mask.shape
+        positions = np.arange(width + 1)[None, :]
+        first_alarm = np.full(n_machines, width, dtype=np.int64)
+        onset = np.zeros(n_machines, dtype=np.int64)
+
+        for values, (mean, std) in zip(metrics, reference, strict=True):
+            std = np.where(std == 0, 1.0, std)
+            z = np.where(mask, (values - mean[:, None]) / std[:, None], 0.0)
+            for direction in (z, -z):
+                steps = np.where(mask, direction - cls.CUSUM_DRIFT_ALLOWANCE, 0.0)
+                cumulative = np.concatenate(
+                    [np.zeros((n_machines, 1)), np.cumsum(steps, axis=1)], axis=1
+                )
+                running_min = np.minimum.accumulate(cumulative, axis=1)
+                last_min = np.maximum.accumulate(
+                    np.where(cumulative == running_min, positions, 0), axis=1
+                )
+                alarms = (cumulative - running_min > cls.CUSUM_THRESHOLD)[:, 1:] & mask
+                has_alarm = alarms.any(axis=1)
+                alarm_at = np.where(has_alarm, np.argmax(alarms, axis=1), width)
+                earlier = alarm_at < first_alarm
+                first_alarm = np.where(earlier, alarm_at, first_alarm)
+                alarm_onset = last_min[np.arange(n_machines), np.minimum(alarm_at + 1, width)]
+                onset = np.where(earlier, alarm_onset, onset)
+
+        return first_alarm < width, onset
+
+    def detect_drift(
+        self, rows: MachineDailyFrame | list[dict], method: str = "split"
+    ) -> list[DriftSignal]:
+        """Concept drift, baseline deviation and change points for every machine.
+
+        ``method="split"`` searches the downtime series for the split with the
+        largest mean shift. ``method="cusum"`` runs a two-sided Page CUSUM over
+        downtime, scrap percent and output against the baseline window instead.
+        Both scan each machine once, so cost grows linearly with the window.
+        """
+        if method not in {"split", "cusum"}:
+            raise ValueError(f"Unknown drift detection method: {method}")
+        with stage("detect_drift") as span:
+            frame = self._as_frame(rows)
+            span.record(rows=frame.n_rows, machines=len(frame.machine_ids))
+            return self._fleet_drift(frame, method)
+
+    @classmethod
+    def _fleet_drift(cls, frame: MachineDailyFrame, method: str = "split") -> list[DriftSignal]:
+        recent_days = cls.DRIFT_RECENT_DAYS
+        lengths = frame.lengths
+        baseline_counts = np.clip(lengths - recent_days, 0, cls.DRIFT_BASELINE_DAYS)
+        eligible = (lengths >= 20) & (baseline_counts >= 7)
+        if not np.any(eligible):
+            return []
 
-            def metric(arr: list[dict], key: str) -> np.ndarray:
-                return np.array([float(r[key]) for r in arr], dtype=float)
-
-            concept_score = 0.0
-            baseline_deviation_detected = False
-            for key in ("downtime_minutes", "scrap_percent", "output_units"):
-                recent_values = metric(recent, key)
-                baseline_values = metric(baseline, key)
-                b_mean = float(np.mean(baseline_values))
-                r_mean = float(np.mean(recent_values))
-                b_std = float(np.std(baseline_values)) or 1.0
-                mean_shift = abs(r_mean - b_mean) / b_std
-                concept_score += mean_shift
-                if mean_shift >= 2.0:
-                    baseline_deviation_detected = True
-
-            concept_drift_detected = concept_score >= 3.0
-
-            downtime_values = [float(r["downtime_minutes"]) for r in history[-30:]]
-            best_score = 0.0
-            best_idx: int | None = None
-            for split in range(5, len(downtime_values) - 5):
-                left = np.array(downtime_values[:split], dtype=float)
-                right = np.array(downtime_values[split:], dtype=float)
-                pooled_std = float(np.std(downtime_values)) or 1.0
-                score = abs(float(np.mean(right)) - float(np.mean(left))) / pooled_std
-                if score > best_score:
-                    best_score = score
-                    best_idx = split
-
-            change_point_detected = best_score >= 1.5 and best_idx is not None
-            change_point_date = None
-            if change_point_detected and best_idx is not None:
-                history_30 = history[-30:]
-                change_point_date = history_30[best_idx]["date"]
+        width = recent_days + cls.DRIFT_BASELINE_DAYS
+        rows_idx, history_mask = cls._trailing_window(frame, width)
+        recent_mask = np.zeros_like(history_mask)
+        recent_mask[:, -recent_days:] = history_mask[:, -recent_days:]
+        baseline_mask = history_mask & ~recent_mask
+        recent_counts = np.minimum(lengths, recent_days)
+
+        columns = (frame.downtime_minutes, frame.scrap_percent, frame.output_units)
+        concept_score = np.zeros(frame.n_machines, dtype=float)
+        baseline_deviation = np.zeros(frame.n_machines, dtype=bool)
+        reference: list[tuple[np.ndarray, np.ndarray]] = []
+        for column in columns:
+            values = cls._gather(column, rows_idx, history_mask)
+            b_mean, b_var = cls._masked_moments(values, baseline_mask, baseline_counts)
+            r_mean, _ = cls._masked_moments(values, recent_mask, recent_counts)
+            b_std = np.sqrt(b_var)
+            reference.append((b_mean, b_std))
+            mean_shift = np.abs(r_mean - b_mean) / np.where(b_std == 0, 1.0, b_std)
+            concept_score += mean_shift
+            baseline_deviation |= mean_shift >= 2.0
+
+        cp_rows, cp_mask = cls._trailing_window(
+            frame, cls.CHANGE_POINT_WINDOW_DAYS, align_left=True
+        )
+        cp_counts = np.minimum(lengths, cls.CHANGE_POINT_WINDOW_DAYS)
+        if method == "split":
+            best_score, best_split = cls._split_change_points(
+                cls._gather(frame.downtime_minutes, cp_rows, cp_mask), cp_mask, cp_counts
+            )
+            change_point = best_score >= 1.5
+        else:
+            change_point, best_split = cls._cusum_change_points(
+                [cls._gather(column, cp_rows, cp_mask) for column in columns], cp_mask, reference
+            )
+        change_row = cp_rows[
+            np.arange(frame.n_machines), np.minimum(best_split, cls.CHANGE_POINT_WINDOW_DAYS - 1)
+        ]
 
+        signals: list[DriftSignal] = []
+        for machine in np.flatnonzero(eligible).tolist():
+            change_point_detected = bool(change_point[machine])
             signals.append(
                 DriftSignal(
-                    machine_id=machine_id,
-                    concept_drift_score=round(concept_score, 4),
-                    concept_drift_detected=concept_drift_detected,
-                    baseline_deviation_detected=baseline_deviation_detected,
+                    machine_id=frame.machine_ids[machine],
+                    concept_drift_score=round(float(concept_score[machine]), 4),
+                    concept_drift_detected=bool(concept_score[machine] >= 3.0),
+                    baseline_deviation_detected=bool(baseline_deviation[machine]),
                     change_point_detected=change_point_detected,
-                    change_point_date=change_point_date,
+                    change_point_date=frame.date_at(change_row[machine])
+                    if change_point_detected
+                    else None,
                 )
             )
 
@@ -1,92 +1,189 @@
 from __future__ import annotations
 
+import threading
+from collections.abc import Iterator
 from datetime import date, timedelta
 
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+
 from app.application.dtos import (
+    DailyInsightDTO,
     DayAggregateDTO,
     DriftSignalDTO,
     FailureRiskDTO,
     ForecastDTO,
     InsightDTO,
     KPIOverviewDTO,
+    MachineForecastDTO,
     MachineHealthScoreDTO,
     MachineTimeseriesPointDTO,
     ModelMonitoringDTO,
     RecommendationDTO,
+    RiskDashboardDTO,
     RiskPanelDTO,
     RiskPanelItemDTO,
+    RiskTrendPointDTO,
     ShiftAggregateDTO,
 )
-from app.application.predictive_engine import PredictiveIntelligenceEngine
+from app.application.fleet_executor import FleetExecutor
+from app.application.predictive_cache import PredictiveStateCache
+from app.application.predictive_engine import (
+    DriftSignal,
+    MachineRisk,
+    MachineSnapshot,
+    MonitoringSnapshot,
+    PredictiveIntelligenceEngine,
+)
+from app.config import get_settings
+from app.domain.columnar import MachineDailyFrame
+from app.domain.forecasting import (
+    FORECAST_METHODS,
+    holt_forecast,
+    naive_trend_forecast,
+    trailing_matrix,
+)
 from app.domain.services import detect_zscore_anomalies, rolling_forecast
-from app.infrastructure.db.models import Anomaly, DailyAggregate
+from app.infrastructure.db.models import (
+    Anomaly,
+    DailyAggregate,
+    MachineRiskResult,
+    ModelArtifact,
+    PredictiveRun,
+)
+from app.infrastructure.metrics.stages import stage
 from app.infrastructure.repositories.analytics_repository import AnalyticsRepository
+from app.infrastructure.repositories.model_artifact_repository import ModelArtifactRepository
+from app.infrastructure.repositories.predictive_result_repository import PredictiveResultRepository
+
+
+def _build_predictive_engine() -> PredictiveIntelligenceEngine:
+    return PredictiveIntelligenceEngine(solver=get_settings().predictive_solver)
 
 
 class AnalyticsUseCase:
     SHIFT_PLANNED_PRODUCTION_MINUTES = 8 * 60
-    _predictive_engine = PredictiveIntelligenceEngine()
-    _predictive_cache_date: date | None = None
-    _predictive_cache: dict | None = None
+    PREDICTIVE_HISTORY_DAYS = 120
+    FEATURE_STATE_TOLERANCES = {
+        "rolling_downtime_variance": 1e-3,
+        "anomaly_frequency": 1e-3,
+        "output_degradation_trend": 1e-3,
+        "scrap_variance": 1e-3,
+        "downtime_trend": 1e-3,
+        "scrap_trend": 1e-3,
+        "health_score": 0.02,
+    }
+    RISK_TREND_MAX_DAYS = 366
+    FORECAST_MAX_HISTORY_DAYS = 365
+    KPI_RANGE_MAX_DAYS = 366
+    RISK_DASHBOARD_SECTIONS = (
+        "health_scores",
+        "failure_probabilities",
+        "drift_signals",
+        "recommendations",
+        "panel",
+        "model_monitoring",
+    )
+    _predictive_engine = _build_predictive_engine()
+    _predictive_cache = PredictiveStateCache(
+        max_entries=get_settings().predictive_cache_max_entries
+    )
+    _forecast_cache = PredictiveStateCache(
+        max_entries=get_settings().forecast_cache_max_entries, name="forecast"
+    )
+    _engine_lock = threading.Lock()
 
     def __init__(self, repo: AnalyticsRepository) -> None:
         self.repo = repo
 
     def overview(self, report_date: date) -> KPIOverviewDTO:
-        downtime, scrap, output, shift_entries = self.repo.get_overview(report_date)
-        downtime = downtime or 0
-        scrap = scrap or 0
-        output = output or 0
-        shift_entries = shift_entries or 0
-        planned_minutes = max(shift_entries * self.SHIFT_PLANNED_PRODUCTION_MINUTES, 0)
+        return self.overview_range(report_date, report_date)[0]
+
+    def overview_range(self, start: date, end: date) -> list[KPIOverviewDTO]:
+        """KPI overview for every date in ``[start, end]`` from one grouped query.
 
-        availability = 0.0
-        if planned_minutes > 0:
-            availability = max(0.0, (planned_minutes - downtime) / planned_minutes)
+        Dates without data read zero.
+        """
+        if start > end:
+            raise ValueError("from must not be after to")
+        days = (end - start).days + 1
+        if days > self.KPI_RANGE_MAX_DAYS:
+            raise ValueError(f"Overview range cannot exceed {self.KPI_RANGE_MAX_DAYS} days")
 
+        downtime = np.zeros(days)
+        scrap = np.zeros(days)
+        output = np.zeros(days)
+        shift_entries = np.zeros(days)
+        for report_date, *totals in self.repo.get_overview_range(start, end):
+            i = (report_date - start).days
+            downtime[i], scrap[i], output[i], shift_entries[i] = totals
+
+        planned_minutes = shift_entries * self.SHIFT_PLANNED_PRODUCTION_MINUTES
+        availability = np.zeros(days)
+        np.divide(
+            planned_minutes - downtime, planned_minutes, out=availability, where=planned_minutes > 0
+        )
+        availability = np.maximum(availability, 0.0)
         total_units = output + scrap
-        scrap_percent = (scrap / total_units) if total_units > 0 else 0.0
+        scrap_percent = np.zeros(days)
+        np.divide(scrap, total_units, out=scrap_percent, where=total_units > 0)
         oee_proxy = availability * (1 - scrap_percent)
 
-        return KPIOverviewDTO(
-            date=report_date,
-            availability_percent=round(availability * 100, 2),
-            scrap_percent=round(scrap_percent * 100, 2),
-            downtime_minutes=round(downtime, 2),
-            throughput_units=round(output, 2),
-            oee_proxy=round(oee_proxy * 100, 2),
-        )
+        return [
+            KPIOverviewDTO(
+                date=start + timedelta(days=i),
+                availability_percent=round(a * 100, 2),
+                scrap_percent=round(s * 100, 2),
+                downtime_minutes=round(d, 2),
+                throughput_units=round(o, 2),
+                oee_proxy=round(e * 100, 2),
+            )
+            for i, (a, s, d, o, e) in enumerate(
+                zip(
+                    availability.tolist(),
+                    scrap_percent.tolist(),
+                    downtime.tolist(),
+                    output.tolist(),
+                    oee_proxy.tolist(),
+                    strict=True,
+                )
+            )
+        ]
 
     def machine_timeseries(
         self, start: date, end: date, machine_id: str | None = None
     ) -> list[MachineTimeseriesPointDTO]:
         rows = self.repo.get_machine_timeseries(start=start, end=end, machine_id=machine_id)
-        return [
-            MachineTimeseriesPointDTO(
-                date=row["date"],
-                machine_id=row["machine_id"],
-                downtime_minutes=round(float(row["downtime_minutes"]), 2),
-                throughput_units=round(float(row["throughput_units"]), 2),
-                scrap_percent=round(float(row["scrap_percent"]), 2),
-            )
-            for row in rows
-        ]
+        return [MachineTimeseriesPointDTO(**self._rounded_kpis(row)) for row in rows]
+
+    def iter_machine_timeseries(
+        self, start: date, end: date, machine_id: str | None = None
+    ) -> Iterator[dict]:
+        """``machine_timeseries`` rows as plain dicts, produced while the cursor is read."""
+        for row in self.repo.iter_machine_timeseries(start=start, end=end, machine_id=machine_id):
+            yield self._rounded_kpis(row)
 
     def shift_aggregates(
         self, start: date, end: date, machine_id: str | None = None
     ) -> list[ShiftAggregateDTO]:
         rows = self.repo.get_shift_aggregates(start=start, end=end, machine_id=machine_id)
-        return [
-            ShiftAggregateDTO(
-                date=row["date"],
-                shift=row["shift"],
-                machine_id=row["machine_id"],
-                downtime_minutes=round(float(row["downtime_minutes"]), 2),
-                throughput_units=round(float(row["throughput_units"]), 2),
-                scrap_percent=round(float(row["scrap_percent"]), 2),
-            )
-            for row in rows
-        ]
+        return [ShiftAggregateDTO(**self._rounded_kpis(row)) for row in rows]
+
+    def iter_shift_aggregates(
+        self, start: date, end: date, machine_id: str | None = None
+    ) -> Iterator[dict]:
+        """``shift_aggregates`` rows as plain dicts, produced while the database cursor is read."""
+        for row in self.repo.iter_shift_aggregates(start=start, end=end, machine_id=machine_id):
+            yield self._rounded_kpis(row)
+
+    @staticmethod
+    def _rounded_kpis(row: dict) -> dict:
+        return {
+            **row,
+            "downtime_minutes": round(float(row["downtime_minutes"]), 2),
+            "throughput_units": round(float(row["throughput_units"]), 2),
+            "scrap_percent": round(float(row["scrap_percent"]), 2),
+        }
 
     def day_aggregates(self, start: date, end: date, machine_id: str | None = None) -> list[DayAggregateDTO]:
         rows = self.repo.get_day_aggregates(start=start, end=end, machine_id=machine_id)
@@ -152,8 +249,77 @@ class AnalyticsUseCase:
             ),
         ]
 
+    def forecast_batch(
+        self,
+        machine_ids: list[str] | None,
+        horizon_days: int,
+        history_days: int = 56,
+        method: str = "holt",
+    ) -> list[MachineForecastDTO]:
+        """Downtime and output forecasts for many machines from their last ``history_days`` days.
+
+        The window ends on the latest report date. Results are cached per data generation.
+        """
+        if method not in FORECAST_METHODS:
+            raise ValueError(f"Unknown forecast method: {method}")
+        if not 2 <= history_days <= self.FORECAST_MAX_HISTORY_DAYS:
+            raise ValueError(f"history_days must be between 2 and {self.FORECAST_MAX_HISTORY_DAYS}")
+        selected = tuple(sorted(set(machine_ids))) if machine_ids else None
+        key = (self.repo.data_generation(), selected, horizon_days, history_days, method)
+        return self._forecast_cache.get_or_compute(
+            key, lambda: self._compute_batch_forecast(selected, horizon_days, history_days, method)
+        )
+
+    def _compute_batch_forecast(
+        self, machine_ids: tuple[str, ...] | None, horizon_days: int, history_days: int, method: str
+    ) -> list[MachineForecastDTO]:
+        end = self.repo.latest_report_date()
+        if end is None:
+            return []
+        frame = self.repo.get_machine_daily_metrics(
+            start=end - timedelta(days=history_days - 1), end=end, machine_ids=machine_ids
+        )
+        if frame.n_machines == 0:
+            return []
+        width = int(frame.lengths.max())
+        last_dates = [frame.date_at(int(row) - 1) for row in frame.offsets[1:]]
+        model = holt_forecast if method == "holt" else naive_trend_forecast
+        forecasts: list[MachineForecastDTO] = []
+        for metric, column in (
+            ("downtime", frame.downtime_minutes),
+            ("output", frame.output_units),
+        ):
+            values, counts = trailing_matrix(frame, column, width)
+            predicted = model(values, counts, horizon_days)
+            forecasts.extend(
+                MachineForecastDTO(
+                    machine_id=machine_id,
+                    metric=metric,
+                    method=method,
+                    last_date=last_date,
+                    history_points=points,
+                    values=row,
+                )
+                for machine_id, last_date, points, row in zip(
+                    frame.machine_ids, last_dates, counts.tolist(), predicted.tolist(), strict=True
+                )
+            )
+        return forecasts
+
     def insights(self, report_date: date) -> InsightDTO:
-        overview = self.overview(report_date)
+        return self.insights_from_overview(self.overview(report_date))
+
+    def insights_range(self, start: date, end: date) -> list[DailyInsightDTO]:
+        """The insight for every date in ``[start, end]``, from one ``overview_range`` query."""
+        return [
+            DailyInsightDTO(
+                date=overview.date, summary=self.insights_from_overview(overview).summary
+            )
+            for overview in self.overview_range(start, end)
+        ]
+
+    @staticmethod
+    def insights_from_overview(overview: KPIOverviewDTO) -> InsightDTO:
         if overview.downtime_minutes > 600:
             msg = "Downtime is elevated; prioritize maintenance on worst-performing assets."
         elif overview.scrap_percent > 8:
@@ -162,47 +328,322 @@ class AnalyticsUseCase:
             msg = "Factory performance is stable with no major risk flags."
         return InsightDTO(summary=msg)
 
+    def load_latest_model(self) -> int | None:
+        """Loads the newest persisted model artifact into the shared engine, if any."""
+        with self._engine_lock:
+            self._sync_model_artifact(ModelArtifactRepository(self.repo.db))
+            return self._predictive_engine.model_version
+
+    def _sync_model_artifact(self, artifacts: ModelArtifactRepository) -> None:
+        latest_version = artifacts.latest_version()
+        if latest_version is None or latest_version == self._predictive_engine.model_version:
+            return
+        artifact = artifacts.latest()
+        if artifact is None:
+            return
+        state = {
+            column.name: getattr(artifact, column.name)
+            for column in ModelArtifact.__table__.columns
+        }
+        self._predictive_engine.restore_state(artifact.version, state)
+
+    def _train_predictive_model(
+        self, frame: MachineDailyFrame, start_date: date, as_of_date: date
+    ) -> tuple[float, float]:
+        """Reuses the shared model artifact for this date or trains and publishes a new version.
+
+        Models trained for a date older than the latest artifact are kept in
+        memory only, so replicas always converge on the newest version.
+        """
+        engine = self._predictive_engine
+        artifacts = ModelArtifactRepository(self.repo.db)
+        self._sync_model_artifact(artifacts)
+        if engine.model_version is not None and engine.last_trained_on == as_of_date:
+            return engine.last_accuracy, engine.last_brier
+
+        latest_trained_on = engine.last_trained_on if engine.model_version is not None else None
+        training_data = engine.build_training_data(
+            frame,
+            closed_after=engine.incremental_cutoff(as_of_date),
+            label_thresholds=self.repo.get_label_thresholds(
+                as_of_date, self.PREDICTIVE_HISTORY_DAYS
+            ),
+        )
+        accuracy, brier = engine.train(training_data, as_of_date)
+        engine.model_version = None
+        if latest_trained_on is None or as_of_date > latest_trained_on:
+            fields = {**engine.export_state(), "window_start": start_date, "window_end": as_of_date}
+            try:
+                artifact = artifacts.save(
+                    fields, keep_versions=get_settings().model_artifact_keep_versions
+                )
+                engine.model_version = artifact.version
+            except IntegrityError:
+                self.repo.db.rollback()
+        return accuracy, brier
+
+    @classmethod
+    def start_fleet_executor(cls) -> None:
+        """Shards training data over ``predictive_workers`` processes.
+
+        Only the worker calls this, so the API process never starts a pool.
+        """
+        settings = get_settings()
+        if settings.predictive_workers > 1 and cls._predictive_engine.executor is None:
+            cls._predictive_engine.executor = FleetExecutor(
+                max_workers=settings.predictive_workers,
+                min_machines=settings.predictive_parallel_min_machines,
+            )
+
+    @classmethod
+    def invalidate_predictive_cache(cls) -> None:
+        cls._predictive_cache.invalidate()
+        cls._forecast_cache.invalidate()
+
     def _predictive_state(self, as_of_date: date) -> dict:
-        if self._predictive_cache_date == as_of_date and self._predictive_cache is not None:
-            return self._predictive_cache
+        """The state for the current data generation, computing each key at most once at a time."""
+        generation = self.repo.data_generation()
+        return self._predictive_cache.get_or_compute(
+            (as_of_date, generation), lambda: self._load_predictive_state(as_of_date, generation)
+        )
 
-        start_date = as_of_date - timedelta(days=120)
+    def _load_predictive_state(self, as_of_date: date, generation: int) -> dict:
+        results = PredictiveResultRepository(self.repo.db)
+        run = results.get_run(as_of_date, generation)
+        if run is not None:
+            with stage("load_predictive_results") as span:
+                rows = results.list_machine_results(run.id)
+                span.record(machines=len(rows))
+                return self._state_from_results(run, rows)
+        state = self._compute_predictive_state(as_of_date)
+        self._store_predictive_state(results, as_of_date, generation, state)
+        return state
+
+    def refresh_predictive_results(self, as_of_date: date) -> bool:
+        """Precomputes and stores the state for ``as_of_date`` unless this generation has it."""
+        generation = self.repo.data_generation()
+        results = PredictiveResultRepository(self.repo.db)
+        if results.get_run(as_of_date, generation) is not None:
+            return False
+        state = self._compute_predictive_state(as_of_date)
+        return self._store_predictive_state(results, as_of_date, generation, state)
+
+    def _compute_predictive_state(self, as_of_date: date) -> dict:
+        start_date = as_of_date - timedelta(days=self.PREDICTIVE_HISTORY_DAYS)
         shift_start = as_of_date - timedelta(days=30)
-        rows = self.repo.get_machine_daily_metrics(start=start_date, end=as_of_date)
-        shift_rows = self.repo.get_machine_shift_scrap(start=shift_start, end=as_of_date)
+        with stage("get_machine_daily_metrics") as span:
+            frame = self.repo.get_machine_daily_metrics(start=start_date, end=as_of_date)
+            span.record(
+                rows=frame.n_rows,
+                machines=len(frame.machine_ids),
+                arrays=(
+                    frame.machine_index,
+                    frame.date_ordinal,
+                    frame.downtime_minutes,
+                    frame.scrap_units,
+                    frame.output_units,
+                ),
+            )
+        with stage("get_machine_shift_scrap") as span:
+            shift_rows = self.repo.get_machine_shift_scrap(start=shift_start, end=as_of_date)
+            span.record(rows=len(shift_rows))
 
-        snapshots = self._predictive_engine.machine_health_scores(rows, shift_rows, as_of_date)
-        training_data = self._predictive_engine.build_training_data(rows)
-        accuracy, brier = self._predictive_engine.train(training_data, as_of_date)
-        risks = self._predictive_engine.infer_machine_risk(snapshots)
-        risk_map = {risk.machine_id: risk for risk in risks}
-        drift_signals = self._predictive_engine.detect_drift(rows)
+        snapshots = self._fleet_snapshots(frame, shift_rows, as_of_date)
+        drift_signals = self._predictive_engine.detect_drift(frame)
         drift_map = {signal.machine_id: signal for signal in drift_signals}
 
-        recommendations: dict[str, list[str]] = {}
-        for snapshot in snapshots:
-            recommendations[snapshot.machine_id] = self._predictive_engine.recommend(snapshot)
+        with stage("recommend") as span:
+            span.record(machines=len(snapshots))
+            recommendations: dict[str, list[str]] = {}
+            for snapshot in snapshots:
+                recommendations[snapshot.machine_id] = self._predictive_engine.recommend(snapshot)
 
-        monitoring = self._predictive_engine.monitoring_snapshot(
-            drift_signals=drift_signals,
-            accuracy=accuracy,
-            brier=brier,
-            as_of_date=as_of_date,
+        # The shared engine's model is trained in place, so different dates must not interleave.
+        with self._engine_lock:
+            accuracy, brier = self._train_predictive_model(frame, start_date, as_of_date)
+            risks = self._predictive_engine.infer_machine_risk(snapshots)
+            monitoring = self._predictive_engine.monitoring_snapshot(
+                drift_signals=drift_signals,
+                accuracy=accuracy,
+                brier=brier,
+                as_of_date=as_of_date,
+            )
+            model_version = self._predictive_engine.model_version
+        risk_map = {risk.machine_id: risk for risk in risks}
+
+        return {
+            "snapshots": snapshots,
+            "risk_map": risk_map,
+            "drift_map": drift_map,
+            "recommendations": recommendations,
+            "monitoring": monitoring,
+            "model_version": model_version,
+        }
+
+    def _fleet_snapshots(
+        self, frame: MachineDailyFrame, shift_rows: list[dict], as_of_date: date
+    ) -> list[MachineSnapshot]:
+        """Snapshots from stored feature states if all end on ``as_of_date``, else from frame."""
+        engine = self._predictive_engine
+        with stage("get_feature_states") as span:
+            states = self.repo.get_feature_states(self.PREDICTIVE_HISTORY_DAYS, as_of_date)
+            span.record(machines=len(states))
+        if states and all(
+            state.rolling_days == engine.ROLLING_WINDOW_DAYS and state.window_end == as_of_date
+            for state in states.values()
+        ):
+            return engine.machine_health_scores_from_state(states, shift_rows, as_of_date)
+        return engine.machine_health_scores(frame, shift_rows, as_of_date)
+
+    def feature_state_mismatches(self, as_of_date: date) -> list[str]:
+        """Machines whose stored feature state disagrees with a full recompute."""
+        engine = self._predictive_engine
+        states = self.repo.get_feature_states(self.PREDICTIVE_HISTORY_DAYS, as_of_date)
+        frame = self.repo.get_machine_daily_metrics(
+            start=as_of_date - timedelta(days=self.PREDICTIVE_HISTORY_DAYS), end=as_of_date
         )
+        expected = {s.machine_id: s for s in engine.machine_health_scores(frame, [], as_of_date)}
+        usable = {
+            machine_id: state
+            for machine_id, state in states.items()
+            if state.rolling_days == engine.ROLLING_WINDOW_DAYS and state.window_end == as_of_date
+        }
+        actual = {
+            s.machine_id: s for s in engine.machine_health_scores_from_state(usable, [], as_of_date)
+        }
+        mismatched = []
+        for machine_id in sorted(set(expected) | set(actual)):
+            want, got = expected.get(machine_id), actual.get(machine_id)
+            if (
+                want is None
+                or got is None
+                or want.data_points != got.data_points
+                or any(
+                    abs(getattr(want, name) - getattr(got, name)) > tolerance
+                    for name, tolerance in self.FEATURE_STATE_TOLERANCES.items()
+                )
+            ):
+                mismatched.append(machine_id)
+        return mismatched
 
-        state = {
+    def _store_predictive_state(
+        self, results: PredictiveResultRepository, as_of_date: date, generation: int, state: dict
+    ) -> bool:
+        monitor = state["monitoring"]
+        run_fields = {
+            "model_version": state["model_version"],
+            "model_accuracy": monitor.model_accuracy,
+            "brier_score": monitor.brier_score,
+            "tracked_drift_machines": monitor.tracked_drift_machines,
+            "retrain_recommended_on": monitor.retrain_recommended_on,
+            "last_trained_on": monitor.last_trained_on,
+        }
+        machine_rows = []
+        for snapshot in state["snapshots"]:
+            risk = state["risk_map"].get(snapshot.machine_id)
+            drift = state["drift_map"].get(snapshot.machine_id)
+            machine_rows.append(
+                {
+                    "machine_code": snapshot.machine_id,
+                    "rolling_downtime_variance": snapshot.rolling_downtime_variance,
+                    "anomaly_frequency": snapshot.anomaly_frequency,
+                    "output_degradation_trend": snapshot.output_degradation_trend,
+                    "scrap_variance": snapshot.scrap_variance,
+                    "downtime_trend": snapshot.downtime_trend,
+                    "scrap_trend": snapshot.scrap_trend,
+                    "shift_scrap_correlation": snapshot.shift_scrap_correlation,
+                    "health_score": snapshot.health_score,
+                    "data_points": snapshot.data_points,
+                    "failure_probability_next_7_days": risk.failure_probability_next_7_days
+                    if risk
+                    else None,
+                    "confidence_score": risk.confidence_score if risk else None,
+                    "concept_drift_score": drift.concept_drift_score if drift else None,
+                    "concept_drift_detected": drift.concept_drift_detected if drift else None,
+                    "baseline_deviation_detected": drift.baseline_deviation_detected
+                    if drift
+                    else None,
+                    "change_point_detected": drift.change_point_detected if drift else None,
+                    "change_point_date": drift.change_point_date if drift else None,
+                    "recommendations_json": state["recommendations"].get(snapshot.machine_id, []),
+                }
+            )
+        try:
+            results.save(
+                as_of_date,
+                generation,
+                run_fields,
+                machine_rows,
+                keep_runs=get_settings().predictive_keep_runs,
+            )
+        except IntegrityError:
+            # Another process stored this generation first; its results are equivalent.
+            self.repo.db.rollback()
+            return False
+        return True
+
+    @staticmethod
+    def _state_from_results(run: PredictiveRun, rows: list[MachineRiskResult]) -> dict:
+        snapshots = []
+        risk_map: dict[str, MachineRisk] = {}
+        drift_map: dict[str, DriftSignal] = {}
+        recommendations: dict[str, list[str]] = {}
+        for row in rows:
+            snapshots.append(
+                MachineSnapshot(
+                    machine_id=row.machine_code,
+                    as_of_date=run.as_of_date,
+                    rolling_downtime_variance=row.rolling_downtime_variance,
+                    anomaly_frequency=row.anomaly_frequency,
+                    output_degradation_trend=row.output_degradation_trend,
+                    scrap_variance=row.scrap_variance,
+                    downtime_trend=row.downtime_trend,
+                    scrap_trend=row.scrap_trend,
+                    shift_scrap_correlation=row.shift_scrap_correlation,
+                    health_score=row.health_score,
+                    data_points=row.data_points,
+                )
+            )
+            if row.failure_probability_next_7_days is not None:
+                risk_map[row.machine_code] = MachineRisk(
+                    machine_id=row.machine_code,
+                    failure_probability_next_7_days=row.failure_probability_next_7_days,
+                    confidence_score=row.confidence_score,
+                )
+            recommendations[row.machine_code] = list(row.recommendations_json)
+
+        for row in sorted(rows, key=lambda r: r.machine_code):
+            if row.concept_drift_score is not None:
+                drift_map[row.machine_code] = DriftSignal(
+                    machine_id=row.machine_code,
+                    concept_drift_score=row.concept_drift_score,
+                    concept_drift_detected=row.concept_drift_detected,
+                    baseline_deviation_detected=row.baseline_deviation_detected,
+                    change_point_detected=row.change_point_detected,
+                    change_point_date=row.change_point_date,
+                )
+
+        monitoring = MonitoringSnapshot(
+            model_accuracy=run.model_accuracy,
+            brier_score=run.brier_score,
+            tracked_drift_machines=run.tracked_drift_machines,
+            retrain_recommended_on=run.retrain_recommended_on,
+            last_trained_on=run.last_trained_on,
+        )
+        return {
             "snapshots": snapshots,
             "risk_map": risk_map,
             "drift_map": drift_map,
             "recommendations": recommendations,
             "monitoring": monitoring,
+            "model_version": run.model_version,
         }
-        self.__class__._predictive_cache_date = as_of_date
-        self.__class__._predictive_cache = state
-        return state
 
     def machine_health_scores(self, as_of_date: date) -> list[MachineHealthScoreDTO]:
-        state = self._predictive_state(as_of_date)
+        return self._health_scores_from_state(self._predictive_state(as_of_date))
+
+    @staticmethod
+    def _health_scores_from_state(state: dict) -> list[MachineHealthScoreDTO]:
         return [
             MachineHealthScoreDTO(
                 machine_id=s.machine_id,
@@ -217,7 +658,10 @@ class AnalyticsUseCase:
         ]
 
     def failure_probabilities(self, as_of_date: date) -> list[FailureRiskDTO]:
-        state = self._predictive_state(as_of_date)
+        return self._failure_probabilities_from_state(self._predictive_state(as_of_date))
+
+    @staticmethod
+    def _failure_probabilities_from_state(state: dict) -> list[FailureRiskDTO]:
         risks = sorted(state["risk_map"].values(), key=lambda r: r.failure_probability_next_7_days, reverse=True)
         return [
             FailureRiskDTO(
@@ -229,7 +673,10 @@ class AnalyticsUseCase:
         ]
 
     def drift_signals(self, as_of_date: date) -> list[DriftSignalDTO]:
-        state = self._predictive_state(as_of_date)
+        return self._drift_signals_from_state(self._predictive_state(as_of_date))
+
+    @staticmethod
+    def _drift_signals_from_state(state: dict) -> list[DriftSignalDTO]:
         return [
             DriftSignalDTO(
                 machine_id=signal.machine_id,
@@ -243,14 +690,20 @@ class AnalyticsUseCase:
         ]
 
     def recommendations(self, as_of_date: date) -> list[RecommendationDTO]:
-        state = self._predictive_state(as_of_date)
+        return self._recommendations_from_state(self._predictive_state(as_of_date))
+
+    @staticmethod
+    def _recommendations_from_state(state: dict) -> list[RecommendationDTO]:
         return [
             RecommendationDTO(machine_id=machine_id, recommendations=recs)
             for machine_id, recs in sorted(state["recommendations"].items())
         ]
 
     def risk_panel(self, as_of_date: date) -> RiskPanelDTO:
-        state = self._predictive_state(as_of_date)
+        return self._risk_panel_from_state(self._predictive_state(as_of_date), as_of_date)
+
+    @staticmethod
+    def _risk_panel_from_state(state: dict, as_of_date: date) -> RiskPanelDTO:
         scored_rows: list[tuple[str, float, float, float, list[str]]] = []
 
         for snapshot in state["snapshots"]:
@@ -279,7 +732,10 @@ class AnalyticsUseCase:
         return RiskPanelDTO(as_of_date=as_of_date, top_risk_machines=items)
 
     def model_monitoring(self, as_of_date: date) -> ModelMonitoringDTO:
-        state = self._predictive_state(as_of_date)
+        return self._model_monitoring_from_state(self._predictive_state(as_of_date))
+
+    @staticmethod
+    def _model_monitoring_from_state(state: dict) -> ModelMonitoringDTO:
         monitor = state["monitoring"]
         return ModelMonitoringDTO(
             model_accuracy=monitor.model_accuracy,
@@ -288,3 +744,63 @@ class AnalyticsUseCase:
             retrain_recommended_on=monitor.retrain_recommended_on,
             last_trained_on=monitor.last_trained_on,
         )
+
+    def risk_dashboard(
+        self, as_of_date: date, sections: list[str] | None = None
+    ) -> RiskDashboardDTO:
+        """Builds the requested risk views (all by default) from one predictive state lookup."""
+        selected = set(sections or self.RISK_DASHBOARD_SECTIONS)
+        unknown = selected - set(self.RISK_DASHBOARD_SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown risk dashboard sections: {', '.join(sorted(unknown))}")
+
+        state = self._predictive_state(as_of_date)
+        builders = {
+            "health_scores": lambda: self._health_scores_from_state(state),
+            "failure_probabilities": lambda: self._failure_probabilities_from_state(state),
+            "drift_signals": lambda: self._drift_signals_from_state(state),
+            "recommendations": lambda: self._recommendations_from_state(state),
+            "panel": lambda: self._risk_panel_from_state(state, as_of_date),
+            "model_monitoring": lambda: self._model_monitoring_from_state(state),
+        }
+        return RiskDashboardDTO(
+            as_of_date=as_of_date,
+            **{
+                section: builders[section]()
+                for section in self.RISK_DASHBOARD_SECTIONS
+                if section in selected
+            },
+        )
+
+    def risk_trend(self, machine_id: str, start: date, end: date) -> list[RiskTrendPointDTO]:
+        """Health score and failure probability of one machine per date, from the current model."""
+        if start > end:
+            raise ValueError("from must not be after to")
+        if (end - start).days + 1 > self.RISK_TREND_MAX_DAYS:
+            raise ValueError(f"Trend range cannot exceed {self.RISK_TREND_MAX_DAYS} days")
+
+        history_start = start - timedelta(days=self.PREDICTIVE_HISTORY_DAYS)
+        frame = self.repo.get_machine_daily_metrics(
+            start=history_start, end=end, machine_id=machine_id
+        )
+        snapshots = self._predictive_engine.machine_health_trend(
+            frame, machine_id, start, end, history_days=self.PREDICTIVE_HISTORY_DAYS
+        )
+        with self._engine_lock:
+            self._sync_model_artifact(ModelArtifactRepository(self.repo.db))
+            risks = self._predictive_engine.infer_machine_risk(snapshots)
+
+        return [
+            RiskTrendPointDTO(
+                machine_id=machine_id,
+                date=snapshot.as_of_date,
+                health_score=snapshot.health_score,
+                failure_probability_next_7_days=risk.failure_probability_next_7_days,
+                confidence_score=risk.confidence_score,
+                rolling_downtime_variance=snapshot.rolling_downtime_variance,
+                anomaly_frequency=snapshot.anomaly_frequency,
+                output_degradation_trend=snapshot.output_degradation_trend,
+                scrap_variance=snapshot.scrap_variance,
+            )
+            for snapshot, risk in zip(snapshots, risks, strict=True)
+        ]
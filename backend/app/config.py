@@ -21,6 +21,19 @@ class Settings(BaseSettings):
     worker_heartbeat_ttl_seconds: int = 180
     worker_heartbeat_interval_seconds: int = 30
     worker_analytics_interval_seconds: int = 300
+    model_artifact_keep_versions: int = 20
+    predictive_keep_runs: int = 60
+    predictive_cache_max_entries: int = 16
+    forecast_cache_max_entries: int = 32
+    predictive_solver: str = "newton"
+    predictive_workers: int = 1
+    predictive_parallel_min_machines: int = 256
+    stage_timing_enabled: bool = False
+    slow_query_threshold_ms: float = 200.0
+    slow_query_explain: bool = False
+    query_log_max_statements: int = 500
+    export_batch_size: int = 5000
+    export_max_concurrent: int = 2
     collector_input_dir: str = "/collector/inbox"
     collector_archive_dir: str = "/collector/archive"
     collector_error_dir: str = "/collector/error"
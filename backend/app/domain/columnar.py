@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class MachineDailyFrame:
+    """Machine-day metrics stored as struct-of-arrays.
+
+    Rows are sorted by machine and then by date, so the history of machine ``i``
+    is the contiguous slice ``offsets[i]:offsets[i + 1]`` of every column.
+    """
+
+    machine_ids: tuple[str, ...]
+    machine_index: np.ndarray
+    date_ordinal: np.ndarray
+    downtime_minutes: np.ndarray
+    scrap_units: np.ndarray
+    output_units: np.ndarray
+    scrap_percent: np.ndarray
+    offsets: np.ndarray
+
+    @classmethod
+    def empty(cls) -> MachineDailyFrame:
+        return cls.from_sorted(
+            machine_ids=(),
+            machine_index=np.empty(0, dtype=np.int32),
+            date_ordinal=np.empty(0, dtype=np.int32),
+            downtime_minutes=np.empty(0, dtype=float),
+            scrap_units=np.empty(0, dtype=float),
+            output_units=np.empty(0, dtype=float),
+            scrap_percent=np.empty(0, dtype=float),
+        )
+
+    @classmethod
+    def from_sorted(
+        cls,
+        machine_ids: Sequence[str],
+        machine_index: np.ndarray,
+        date_ordinal: np.ndarray,
+        downtime_minutes: np.ndarray,
+        scrap_units: np.ndarray,
+        output_units: np.ndarray,
+        scrap_percent: np.ndarray,
+    ) -> MachineDailyFrame:
+        """Wraps columns that are already sorted by (machine_index, date_ordinal)."""
+        machine_index = np.ascontiguousarray(machine_index, dtype=np.int32)
+        counts = np.bincount(machine_index, minlength=len(machine_ids))
+        offsets = np.zeros(len(machine_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(
+            machine_ids=tuple(machine_ids),
+            machine_index=machine_index,
+            date_ordinal=np.ascontiguousarray(date_ordinal, dtype=np.int32),
+            downtime_minutes=np.ascontiguousarray(downtime_minutes, dtype=float),
+            scrap_units=np.ascontiguousarray(scrap_units, dtype=float),
+            output_units=np.ascontiguousarray(output_units, dtype=float),
+            scrap_percent=np.ascontiguousarray(scrap_percent, dtype=float),
+            offsets=offsets,
+        )
+
+    @classmethod
+    def from_records(cls, rows: Iterable[dict]) -> MachineDailyFrame:
+        """Builds a frame from machine-day dicts in any order."""
+        records = list(rows)
+        if not records:
+            return cls.empty()
+        codes = np.array([str(r["machine_id"]) for r in records], dtype=object)
+        machine_ids, machine_index = np.unique(codes, return_inverse=True)
+        date_ordinal = np.array([r["date"].toordinal() for r in records], dtype=np.int32)
+        order = np.lexsort((date_ordinal, machine_index))
+
+        def column(key: str) -> np.ndarray:
+            return np.array([float(r[key]) for r in records], dtype=float)[order]
+
+        return cls.from_sorted(
+            machine_ids=[str(m) for m in machine_ids],
+            machine_index=machine_index[order],
+            date_ordinal=date_ordinal[order],
+            downtime_minutes=column("downtime_minutes"),
+            scrap_units=column("scrap_units"),
+            output_units=column("output_units"),
+            scrap_percent=column("scrap_percent"),
+        )
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.machine_index.shape[0])
+
+    @property
+    def n_machines(self) -> int:
+        return len(self.machine_ids)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def machine_slice(self, machine: int) -> slice:
+        return slice(int(self.offsets[machine]), int(self.offsets[machine + 1]))
+
+    def date_at(self, row: int) -> date:
+        return date.fromordinal(int(self.date_ordinal[row]))
+
+    def between(self, start: date, end: date) -> MachineDailyFrame:
+        """Rows dated within ``[start, end]``; machines without rows keep an empty slice."""
+        keep = (self.date_ordinal >= start.toordinal()) & (self.date_ordinal <= end.toordinal())
+        return MachineDailyFrame.from_sorted(
+            machine_ids=self.machine_ids,
+            machine_index=self.machine_index[keep],
+            date_ordinal=self.date_ordinal[keep],
+            downtime_minutes=self.downtime_minutes[keep],
+            scrap_units=self.scrap_units[keep],
+            output_units=self.output_units[keep],
+            scrap_percent=self.scrap_percent[keep],
+        )
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import copy
+from collections import deque
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+
+@dataclass
+class MachineFeatureState:
+    """Running moments behind one machine's snapshot features, advanced one window at a time.
+
+    The z-score baselines are the count, mean and centered sum of squares
+    (Welford's ``m2``) of downtime and scrap over the days in
+    ``[window_end - window_days, window_end]``. The window itself is not kept:
+    days leaving it are read back and removed. ``recent`` holds only the last
+    ``rolling_days`` daily ``(ordinal, downtime, scrap, output)`` rows, from which
+    the rolling features are computed exactly. ``updates`` counts the days slid
+    since the moments were last computed from scratch.
+    """
+
+    window_days: int
+    rolling_days: int
+    window_end: date | None = None
+    count: int = 0
+    mean: list[float] = field(default_factory=lambda: [0.0, 0.0])
+    m2: list[float] = field(default_factory=lambda: [0.0, 0.0])
+    recent: deque[tuple[int, float, float, float]] = field(default_factory=deque)
+    updates: int = 0
+
+    @property
+    def window_start(self) -> date | None:
+        return self.window_end - timedelta(days=self.window_days) if self.window_end else None
+
+    @property
+    def last_date(self) -> date | None:
+        return date.fromordinal(self.recent[-1][0]) if self.recent else None
+
+    @property
+    def data_points(self) -> int:
+        return self.count
+
+    @classmethod
+    def build(
+        cls,
+        days: Iterable[tuple[date, float, float, float]],
+        window_days: int,
+        rolling_days: int,
+        window_end: date | None = None,
+    ) -> MachineFeatureState:
+        """Exact state over ``(day, downtime, scrap, output)`` rows given in date order.
+
+        ``window_end`` defaults to the last day; rows outside the window are skipped.
+        """
+        rows = [(day.toordinal(), downtime, scrap, output) for day, downtime, scrap, output in days]
+        if window_end is None and rows:
+            window_end = date.fromordinal(rows[-1][0])
+        state = cls(window_days=window_days, rolling_days=rolling_days, window_end=window_end)
+        if window_end is None:
+            return state
+        start, end = state.window_start.toordinal(), window_end.toordinal()
+        rows = [row for row in rows if start <= row[0] <= end]
+        state.count = len(rows)
+        if rows:
+            # Two passes, centered, so the stored m2 carries no cancellation error.
+            for i in range(2):
+                values = [row[i + 1] for row in rows]
+                mean = sum(values) / len(values)
+                state.mean[i] = mean
+                state.m2[i] = sum((value - mean) ** 2 for value in values)
+        state.recent = deque(rows[-rolling_days:])
+        return state
+
+    def slide_to(self, days: Mapping[date, Sequence[float]], window_end: date) -> None:
+        """Moves the window forward to end on ``window_end``.
+
+        ``days`` maps each day to its ``(downtime, scrap, output)`` totals and must
+        hold every day that leaves the window and every day after ``last_date`` up
+        to ``window_end``; other days in it are ignored.
+        """
+        if self.window_end is not None and window_end < self.window_end:
+            raise ValueError("Feature state windows only move forward")
+        cutoff = window_end - timedelta(days=self.window_days)
+        last = self.last_date
+        ordered = sorted(days)
+        if self.window_start is not None and last is not None:
+            for day in ordered:
+                if self.window_start <= day < cutoff and day <= last:
+                    self._remove(days[day][0], days[day][1])
+        for day in ordered:
+            if (last is None or day > last) and cutoff <= day <= window_end:
+                downtime, scrap, output = days[day][:3]
+                self._add(downtime, scrap)
+                self.recent.append((day.toordinal(), downtime, scrap, output))
+        while self.recent and (
+            len(self.recent) > self.rolling_days or self.recent[0][0] < cutoff.toordinal()
+        ):
+            self.recent.popleft()
+        if self.window_end is not None:
+            self.updates += (window_end - self.window_end).days
+        self.window_end = window_end
+
+    def _add(self, downtime: float, scrap: float) -> None:
+        self.count += 1
+        for i, value in enumerate((downtime, scrap)):
+            delta = value - self.mean[i]
+            self.mean[i] += delta / self.count
+            self.m2[i] += delta * (value - self.mean[i])
+
+    def _remove(self, downtime: float, scrap: float) -> None:
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, [0.0, 0.0], [0.0, 0.0]
+            return
+        self.count -= 1
+        for i, value in enumerate((downtime, scrap)):
+            delta = value - self.mean[i]
+            self.mean[i] -= delta / self.count
+            self.m2[i] = max(0.0, self.m2[i] - delta * (value - self.mean[i]))
+
+    def rolling_rows(self) -> list[tuple[int, float, float, float]]:
+        return list(self.recent)
+
+    def as_of(self, as_of_date: date, days: Mapping[date, Sequence[float]]) -> MachineFeatureState:
+        """A copy slid to end on ``as_of_date``; ``days`` is as for ``slide_to``."""
+        if self.window_end is not None and as_of_date < self.window_end:
+            raise ValueError("Feature state cannot be read before its window end")
+        if as_of_date == self.window_end:
+            return self
+        advanced = copy.deepcopy(self)
+        advanced.slide_to(days, as_of_date)
+        return advanced
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "window_days": self.window_days,
+            "rolling_days": self.rolling_days,
+            "window_end": self.window_end.isoformat() if self.window_end else None,
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "recent": [list(row) for row in self.recent],
+            "updates": self.updates,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> MachineFeatureState:
+        window_end = payload.get("window_end")
+        return cls(
+            window_days=int(payload["window_days"]),
+            rolling_days=int(payload["rolling_days"]),
+            window_end=date.fromisoformat(window_end) if window_end else None,
+            count=int(payload["count"]),
+            mean=[float(v) for v in payload["mean"]],
+            m2=[float(v) for v in payload["m2"]],
+            recent=deque(
+                (int(r[0]), float(r[1]), float(r[2]), float(r[3])) for r in payload["recent"]
+            ),
+            updates=int(payload["updates"]),
+        )
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.domain.columnar import MachineDailyFrame
+
+FORECAST_METHODS = ("naive", "holt")
+
+
+def trailing_matrix(
+    frame: MachineDailyFrame, column: np.ndarray, width: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Each machine's last ``width`` values of ``column``, left-aligned, and their count."""
+    counts = np.minimum(frame.lengths, width)
+    starts = frame.offsets[1:] - counts
+    positions = np.arange(width)[None, :]
+    mask = positions < counts[:, None]
+    rows = np.where(mask, starts[:, None] + positions, 0)
+    values = np.where(mask, column[rows], 0.0) if column.size else np.zeros(rows.shape, dtype=float)
+    return values, counts
+
+
+def naive_trend_forecast(
+    values: np.ndarray, counts: np.ndarray, horizon: int, window: int = 7
+) -> np.ndarray:
+    """``rolling_forecast`` for every row of a left-aligned matrix at once.
+
+    The mean of the last ``window`` values plus the first-to-last slope over
+    them, extended ``horizon`` steps and floored at zero. Rows without values
+    forecast zeros.
+    """
+    picked = np.arange(values.shape[0])
+    last = np.maximum(counts - 1, 0)
+    first = np.maximum(counts - window, 0)
+    span = counts - first
+    prefix = np.zeros((values.shape[0], values.shape[1] + 1), dtype=float)
+    np.cumsum(values, axis=1, out=prefix[:, 1:])
+    baseline = (prefix[picked, counts] - prefix[picked, first]) / np.maximum(span, 1)
+    trend = (values[picked, last] - values[picked, first]) / np.maximum(span - 1, 1)
+    steps = np.arange(1, horizon + 1)[None, :]
+    forecast = np.maximum(0.0, baseline[:, None] + trend[:, None] * steps)
+    return np.where(counts[:, None] > 0, forecast, 0.0)
+
+
+def holt_forecast(
+    values: np.ndarray, counts: np.ndarray, horizon: int, alpha: float = 0.5, beta: float = 0.3
+) -> np.ndarray:
+    """Holt's linear exponential smoothing for every row of a left-aligned matrix at once.
+
+    The level starts at the first value and the trend at the first difference;
+    each later value updates both. Forecasts are floored at zero, and rows
+    without values forecast zeros.
+    """
+    if not (0.0 < alpha <= 1.0 and 0.0 < beta <= 1.0):
+        raise ValueError("alpha and beta must be in (0, 1]")
+    n_rows, width = values.shape
+    level = values[:, 0].copy() if width else np.zeros(n_rows, dtype=float)
+    trend = (
+        np.where(counts >= 2, values[:, 1] - values[:, 0], 0.0) if width > 1 else np.zeros(n_rows)
+    )
+    for t in range(1, width):
+        active = counts > t
+        if not np.any(active):
+            break
+        new_level = alpha * values[:, t] + (1.0 - alpha) * (level + trend)
+        new_trend = beta * (new_level - level) + (1.0 - beta) * trend
+        level = np.where(active, new_level, level)
+        trend = np.where(active, new_trend, trend)
+    steps = np.arange(1, horizon + 1)[None, :]
+    forecast = np.maximum(0.0, level[:, None] + trend[:, None] * steps)
+    return np.where(counts[:, None] > 0, forecast, 0.0)
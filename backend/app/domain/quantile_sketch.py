@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import numpy as np
+
+
+class QuantileSketch:
+    """Mergeable streaming quantile sketch with a relative-error guarantee (DDSketch).
+
+    Non-negative values are counted in logarithmic buckets ``(gamma**(k-1), gamma**k]``
+    with ``gamma = (1 + alpha) / (1 - alpha)``. ``quantile(q)`` interpolates between
+    the order statistics at the ranks either side of ``q * (n - 1)``, like
+    ``np.percentile``, and returns an estimate ``x_hat`` of that value ``x`` with
+    ``|x_hat - x| <= alpha * x``. Values up to ``MIN_VALUE`` are kept exactly as zeros.
+    Adds, removals and merges are exact on the bucket counts, so a sliding window
+    stays within the bound no matter how long it has been maintained.
+    """
+
+    MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        if not 0.0 < relative_accuracy < 1.0:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1.0 + relative_accuracy) / (1.0 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.zero_count = 0
+        self.bins: dict[int, int] = {}
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.bins.values())
+
+    def _keys(self, values: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(values) / self._log_gamma).astype(np.int64)
+
+    def _update(self, values: Iterable[float] | np.ndarray, sign: int) -> None:
+        data = np.asarray(values, dtype=float).ravel()
+        if data.size == 0:
+            return
+        if np.any(data < 0) or not np.all(np.isfinite(data)):
+            raise ValueError("QuantileSketch only accepts finite non-negative values")
+        zeros = data <= self.MIN_VALUE
+        keys, counts = np.unique(self._keys(data[~zeros]), return_counts=True)
+        updates = dict(zip(keys.tolist(), (sign * counts).tolist(), strict=True))
+        zero_count = self.zero_count + sign * int(np.count_nonzero(zeros))
+        if zero_count < 0 or any(self.bins.get(k, 0) + c < 0 for k, c in updates.items()):
+            raise ValueError("Cannot remove values that were not added to the sketch")
+        self.zero_count = zero_count
+        for key, change in updates.items():
+            remaining = self.bins.get(key, 0) + change
+            if remaining:
+                self.bins[key] = remaining
+            else:
+                self.bins.pop(key, None)
+
+    def add(self, values: Iterable[float] | np.ndarray) -> None:
+        self._update(values, 1)
+
+    def remove(self, values: Iterable[float] | np.ndarray) -> None:
+        self._update(values, -1)
+
+    def merge(self, other: QuantileSketch) -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self.zero_count += other.zero_count
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+
+    def quantile(self, q: float) -> float:
+        if not 0.0 <= q <= 1.0:
+            raise ValueError("q must be between 0 and 1")
+        total = self.count
+        if total == 0:
+            return 0.0
+        position = q * (total - 1)
+        lower = math.floor(position)
+        upper = min(lower + 1, total - 1)
+        keys = sorted(self.bins)
+        ends = self.zero_count + np.cumsum([self.bins[key] for key in keys])
+
+        def value_at(rank: int) -> float:
+            if rank < self.zero_count:
+                return 0.0
+            key = keys[int(np.searchsorted(ends, rank, side="right"))]
+            return 2.0 * self.gamma**key / (self.gamma + 1.0)
+
+        low = value_at(lower)
+        return low + (position - lower) * (value_at(upper) - low)
+
+    def to_dict(self) -> dict[str, object]:
+        min_key = min(self.bins, default=0)
+        max_key = max(self.bins, default=-1)
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "zero_count": self.zero_count,
+            "min_key": min_key,
+            "counts": [self.bins.get(k, 0) for k in range(min_key, max_key + 1)],
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> QuantileSketch:
+        sketch = cls(float(payload["relative_accuracy"]))
+        sketch.zero_count = int(payload["zero_count"])
+        min_key = int(payload["min_key"])
+        sketch.bins = {min_key + i: int(c) for i, c in enumerate(payload["counts"]) if c}
+        return sketch
+
+
+@dataclass
+class LabelWindowSketch:
+    """Downtime and scrap-percent sketches over one machine's trailing ``window_days`` of days."""
+
+    window_end: date
+    window_days: int
+    downtime: QuantileSketch = field(default_factory=QuantileSketch)
+    scrap_percent: QuantileSketch = field(default_factory=QuantileSketch)
+
+    @property
+    def window_start(self) -> date:
+        return self.window_end - timedelta(days=self.window_days)
+
+    @classmethod
+    def build(cls, days: dict[date, tuple[float, float]], window_days: int) -> LabelWindowSketch:
+        sketch = cls(window_end=max(days), window_days=window_days)
+        sketch.add_days({d: v for d, v in days.items() if d >= sketch.window_start})
+        return sketch
+
+    def add_days(self, days: dict[date, tuple[float, float]]) -> None:
+        self.downtime.add([v[0] for v in days.values()])
+        self.scrap_percent.add([v[1] for v in days.values()])
+
+    def remove_days(self, days: dict[date, tuple[float, float]]) -> None:
+        self.downtime.remove([v[0] for v in days.values()])
+        self.scrap_percent.remove([v[1] for v in days.values()])
+
+    def slide_to(self, days: dict[date, tuple[float, float]], window_end: date) -> None:
+        """Moves the window forward, given daily values covering both the old and new window."""
+        if window_end < self.window_end:
+            raise ValueError("Label sketch windows only move forward")
+        new_start = window_end - timedelta(days=self.window_days)
+        expired_before = min(new_start, self.window_end + timedelta(days=1))
+        added_after = max(self.window_end, new_start - timedelta(days=1))
+        self.remove_days({d: v for d, v in days.items() if self.window_start <= d < expired_before})
+        self.add_days({d: v for d, v in days.items() if added_after < d <= window_end})
+        self.window_end = window_end
+
+    def thresholds(self, q: float = 0.85) -> tuple[float, float]:
+        return self.downtime.quantile(q), self.scrap_percent.quantile(q)
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "window_end": self.window_end.isoformat(),
+            "window_days": self.window_days,
+            "downtime_minutes": self.downtime.to_dict(),
+            "scrap_percent": self.scrap_percent.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> LabelWindowSketch:
+        return cls(
+            window_end=date.fromisoformat(str(payload["window_end"])),
+            window_days=int(payload["window_days"]),
+            downtime=QuantileSketch.from_dict(payload["downtime_minutes"]),
+            scrap_percent=QuantileSketch.from_dict(payload["scrap_percent"]),
+        )
@@ -1,6 +1,17 @@
-from datetime import datetime
-
-from sqlalchemy import JSON, Boolean, Date, DateTime, Float, ForeignKey, Integer, String, Text
+from datetime import date, datetime
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.infrastructure.db.base import Base
@@ -29,6 +40,8 @@ class Machine(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     machine_code: Mapped[str] = mapped_column(String(50), unique=True, index=True)
+    label_sketch_json: Mapped[dict[str, object] | None] = mapped_column(JSON, nullable=True)
+    feature_state_json: Mapped[dict[str, object] | None] = mapped_column(JSON, nullable=True)
 
 
 class Operator(Base):
@@ -126,3 +139,76 @@ class ConnectorState(Base):
     last_success_ts: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
     consecutive_failures: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class ModelArtifact(Base):
+    __tablename__ = "model_artifacts"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, unique=True, index=True, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    trained_on: Mapped[date] = mapped_column(Date, index=True, nullable=False)
+    last_full_refit_on: Mapped[date] = mapped_column(Date, nullable=False)
+    window_start: Mapped[date] = mapped_column(Date, nullable=False)
+    window_end: Mapped[date] = mapped_column(Date, nullable=False)
+    solver: Mapped[str] = mapped_column(String(20), nullable=False)
+    weights_json: Mapped[list[float]] = mapped_column(JSON, nullable=False)
+    bias: Mapped[float] = mapped_column(Float, nullable=False)
+    feature_mean_json: Mapped[list[float]] = mapped_column(JSON, nullable=False)
+    feature_std_json: Mapped[list[float]] = mapped_column(JSON, nullable=False)
+    metrics_json: Mapped[dict[str, object]] = mapped_column(JSON, default=dict, nullable=False)
+
+
+class DataGeneration(Base):
+    __tablename__ = "data_generation"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class PredictiveRun(Base):
+    __tablename__ = "predictive_runs"
+    __table_args__ = (
+        UniqueConstraint(
+            "as_of_date", "data_generation", name="uq_predictive_runs_date_generation"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    as_of_date: Mapped[date] = mapped_column(Date, index=True, nullable=False)
+    data_generation: Mapped[int] = mapped_column(Integer, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    model_version: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    model_accuracy: Mapped[float] = mapped_column(Float, nullable=False)
+    brier_score: Mapped[float] = mapped_column(Float, nullable=False)
+    tracked_drift_machines: Mapped[int] = mapped_column(Integer, nullable=False)
+    retrain_recommended_on: Mapped[date] = mapped_column(Date, nullable=False)
+    last_trained_on: Mapped[date] = mapped_column(Date, nullable=False)
+
+
+class MachineRiskResult(Base):
+    __tablename__ = "machine_risk_results"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    run_id: Mapped[int] = mapped_column(
+        ForeignKey("predictive_runs.id", ondelete="CASCADE"), index=True
+    )
+    machine_code: Mapped[str] = mapped_column(String(50), nullable=False)
+    rolling_downtime_variance: Mapped[float] = mapped_column(Float, nullable=False)
+    anomaly_frequency: Mapped[float] = mapped_column(Float, nullable=False)
+    output_degradation_trend: Mapped[float] = mapped_column(Float, nullable=False)
+    scrap_variance: Mapped[float] = mapped_column(Float, nullable=False)
+    downtime_trend: Mapped[float] = mapped_column(Float, nullable=False)
+    scrap_trend: Mapped[float] = mapped_column(Float, nullable=False)
+    shift_scrap_correlation: Mapped[float] = mapped_column(Float, nullable=False)
+    health_score: Mapped[float] = mapped_column(Float, nullable=False)
+    data_points: Mapped[int] = mapped_column(Integer, nullable=False)
+    failure_probability_next_7_days: Mapped[float | None] = mapped_column(Float, nullable=True)
+    confidence_score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    concept_drift_score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    concept_drift_detected: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    baseline_deviation_detected: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    change_point_detected: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    change_point_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    recommendations_json: Mapped[list[str]] = mapped_column(JSON, default=list, nullable=False)
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+import structlog
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = structlog.get_logger(__name__)
+
+OTHER_STATEMENTS = "<other>"
+SORT_KEYS = ("total_ms", "mean_ms", "max_ms", "calls", "slow_calls")
+_CALLER_PACKAGES = (
+    "app.infrastructure.repositories.",
+    "app.application.",
+    "app.api.",
+    "app.worker",
+)
+_PLACEHOLDER = r"(?:\?|%\(\w+\)s|%s|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class QueryStat:
+    caller: str
+    statement: str
+    calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    slow_calls: int = 0
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "caller": self.caller,
+            "statement": self.statement,
+            "calls": self.calls,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "mean_ms": round(self.total_seconds * 1000 / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 3),
+            "slow_calls": self.slow_calls,
+        }
+
+
+def normalize_statement(statement: str) -> str:
+    """One line per statement shape: whitespace collapsed, expanded IN lists folded to ``(...)``."""
+    return _PLACEHOLDER_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def redact_parameters(parameters: object, executemany: bool = False) -> object:
+    """Parameter types in place of values, so logs never carry production data."""
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def calling_function() -> str:
+    """``module:Class.method`` of the innermost application frame that issued the statement."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith(_CALLER_PACKAGES):
+            return f"{module.rsplit('.', 1)[-1]}:{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+class QueryLog:
+    """Per-statement timings attributed to the calling repository method, with a slow-query log.
+
+    Statements slower than ``threshold_ms`` are logged with their parameters
+    redacted and, when ``explain`` is set, the database's plan for them.
+    Counters are kept for up to ``max_statements`` distinct (caller, statement)
+    pairs; later ones are pooled under ``<other>``.
+    """
+
+    def __init__(
+        self, threshold_ms: float = 200.0, explain: bool = False, max_statements: int = 500
+    ) -> None:
+        self.threshold_seconds = threshold_ms / 1000.0
+        self.explain = explain
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._stats: dict[tuple[str, str], QueryStat] = {}
+
+    def install(self, engine: Engine) -> None:
+        if event.contains(engine, "before_cursor_execute", self._before_cursor_execute):
+            return
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        conn.info.setdefault("query_log_started", []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context) -> None:
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_log_started"):
+            conn.info["query_log_started"].pop()
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        elapsed = time.perf_counter() - conn.info["query_log_started"].pop()
+        caller = calling_function()
+        normalized = normalize_statement(statement)
+        slow = elapsed >= self.threshold_seconds
+        self._record(caller, normalized, elapsed, slow)
+        if not slow:
+            return
+        fields: dict[str, object] = {
+            "caller": caller,
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": normalized[:2000],
+            "parameters": redact_parameters(parameters, executemany),
+        }
+        if self.explain and not executemany:
+            fields["plan"] = self._explain(conn, statement, parameters)
+        logger.warning("slow_query", **fields)
+
+    def _record(self, caller: str, statement: str, elapsed: float, slow: bool) -> None:
+        with self._lock:
+            key = (caller, statement)
+            stat = self._stats.get(key)
+            if stat is None:
+                if len(self._stats) >= self.max_statements:
+                    key = (OTHER_STATEMENTS, OTHER_STATEMENTS)
+                    stat = self._stats.get(key)
+                if stat is None:
+                    stat = self._stats[key] = QueryStat(caller=key[0], statement=key[1])
+            stat.calls += 1
+            stat.total_seconds += elapsed
+            stat.max_seconds = max(stat.max_seconds, elapsed)
+            stat.slow_calls += int(slow)
+
+    @staticmethod
+    def _explain(conn, statement: str, parameters: object) -> list[str] | str:
+        """The estimated plan of a read: EXPLAIN on PostgreSQL, EXPLAIN QUERY PLAN on SQLite.
+
+        The statement is planned, not run again, inside a savepoint that is
+        rolled back, so a failed EXPLAIN cannot abort the caller's transaction.
+        """
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return "<not a read>"
+        dialect = conn.dialect.name
+        if dialect == "postgresql":
+            prefix = "EXPLAIN "
+        elif dialect == "sqlite":
+            prefix = "EXPLAIN QUERY PLAN "
+        else:
+            return f"<no plan for {dialect}>"
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT query_log_explain")
+            try:
+                cursor.execute(prefix + statement, parameters)
+                return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+            except Exception as exc:
+                return f"<explain failed: {exc.__class__.__name__}>"
+            finally:
+                cursor.execute("ROLLBACK TO SAVEPOINT query_log_explain")
+                cursor.execute("RELEASE SAVEPOINT query_log_explain")
+        except Exception as exc:
+            return f"<explain failed: {exc.__class__.__name__}>"
+        finally:
+            cursor.close()
+
+    def snapshot(self, limit: int = 50, order_by: str = "total_ms") -> list[dict[str, object]]:
+        if order_by not in SORT_KEYS:
+            raise ValueError(f"order_by must be one of {', '.join(SORT_KEYS)}")
+        with self._lock:
+            rows = [stat.as_dict() for stat in self._stats.values()]
+        return sorted(rows, key=lambda row: row[order_by], reverse=True)[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
@@ -4,9 +4,18 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import get_settings
+from app.infrastructure.db.query_log import QueryLog
+from app.infrastructure.metrics.request_stats import instrument_engine
 
 settings = get_settings()
 engine = create_engine(settings.database_url, pool_pre_ping=True)
+instrument_engine(engine)
+query_log = QueryLog(
+    threshold_ms=settings.slow_query_threshold_ms,
+    explain=settings.slow_query_explain,
+    max_statements=settings.query_log_max_statements,
+)
+query_log.install(engine)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, class_=Session)
 
 
@@ -1,4 +1,50 @@
-from prometheus_client import Counter
+from prometheus_client import Counter, Gauge, Histogram
 
 request_counter = Counter("shadowplant_http_requests_total", "Total HTTP requests", ["method", "path", "status"])
+request_latency_seconds = Histogram(
+    "shadowplant_http_request_duration_seconds",
+    "Time from receiving a request to sending its response headers, by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+request_db_seconds = Histogram(
+    "shadowplant_http_request_db_seconds",
+    "Time a request spent executing database statements, by route template",
+    ["method", "route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+request_db_queries = Histogram(
+    "shadowplant_http_request_db_queries",
+    "Database statements executed per request, by route template",
+    ["method", "route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+requests_in_progress = Gauge(
+    "shadowplant_http_requests_in_progress",
+    "Requests currently being served",
+    ["method"],
+)
 upload_counter = Counter("shadowplant_uploads_total", "Total dataset uploads")
+predictive_cache_hits = Counter(
+    "shadowplant_predictive_cache_hits_total", "Predictive cache hits", ["cache"]
+)
+predictive_cache_misses = Counter(
+    "shadowplant_predictive_cache_misses_total", "Predictive cache misses", ["cache"]
+)
+predictive_state_compute_seconds = Histogram(
+    "shadowplant_predictive_state_compute_seconds",
+    "Time spent loading or computing a predictive cache entry",
+    ["cache"],
+)
+pipeline_stage_seconds = Histogram(
+    "shadowplant_pipeline_stage_seconds",
+    "Time spent in one stage of the predictive pipeline",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+pipeline_stage_rows = Histogram(
+    "shadowplant_pipeline_stage_rows",
+    "Rows processed by one stage of the predictive pipeline",
+    ["stage"],
+    buckets=(10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+)
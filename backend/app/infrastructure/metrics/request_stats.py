@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+if TYPE_CHECKING:
+    from app.infrastructure.metrics.stages import StageSpan
+
+
+@dataclass
+class RequestStats:
+    """Database time, statement count and pipeline stages of the request being served.
+
+    ``trace_stages`` times the request's pipeline stages even when stage
+    timing is disabled process-wide.
+    """
+
+    db_seconds: float = 0.0
+    query_count: int = 0
+    stages: list[StageSpan] = field(default_factory=list)
+    trace_stages: bool = False
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def begin_request_stats(trace_stages: bool = False) -> tuple[RequestStats, Token]:
+    """Starts collecting for the current context; the request's worker threads share the stats."""
+    stats = RequestStats(trace_stages=trace_stages)
+    return stats, _current.set(stats)
+
+
+def end_request_stats(token: Token) -> None:
+    _current.reset(token)
+
+
+def current_request_stats() -> RequestStats | None:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("request_stats_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["request_stats_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.db_seconds += time.perf_counter() - started
+        stats.query_count += 1
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("request_stats_started"):
+        conn.info["request_stats_started"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Adds each statement's cursor time to the current request's ``RequestStats``."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import time
+
+import structlog
+
+from app.config import get_settings
+from app.infrastructure.metrics.prometheus import pipeline_stage_rows, pipeline_stage_seconds
+from app.infrastructure.metrics.request_stats import current_request_stats
+
+logger = structlog.get_logger(__name__)
+enabled = get_settings().stage_timing_enabled
+
+
+class StageSpan:
+    """One timed pipeline stage with the row, machine and array sizes it reported."""
+
+    __slots__ = ("name", "seconds", "rows", "machines", "peak_bytes", "_started")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.seconds = 0.0
+        self.rows: int | None = None
+        self.machines: int | None = None
+        self.peak_bytes: int | None = None
+
+    def record(
+        self, rows: int | None = None, machines: int | None = None, arrays: tuple = ()
+    ) -> None:
+        """Notes sizes seen in the stage; ``arrays`` alive together are summed into a peak."""
+        if rows is not None:
+            self.rows = rows
+        if machines is not None:
+            self.machines = machines
+        if arrays:
+            size = sum(int(array.nbytes) for array in arrays)
+            self.peak_bytes = size if self.peak_bytes is None else max(self.peak_bytes, size)
+
+    def __enter__(self) -> StageSpan:
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.seconds = time.perf_counter() - self._started
+        pipeline_stage_seconds.labels(stage=self.name).observe(self.seconds)
+        if self.rows is not None:
+            pipeline_stage_rows.labels(stage=self.name).observe(self.rows)
+        logger.debug("pipeline_stage", **self.as_dict(), failed=exc_type is not None)
+        stats = current_request_stats()
+        if stats is not None:
+            stats.stages.append(self)
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "stage": self.name,
+            "duration_ms": round(self.seconds * 1000, 3),
+            "rows": self.rows,
+            "machines": self.machines,
+            "peak_bytes": self.peak_bytes,
+        }
+
+    def server_timing(self) -> str:
+        """The span as one ``Server-Timing`` header entry."""
+        details = [
+            f"{key}={value}"
+            for key, value in (("rows", self.rows), ("machines", self.machines))
+            if value
+        ]
+        description = f';desc="{" ".join(details)}"' if details else ""
+        return f"{self.name};dur={self.seconds * 1000:.2f}{description}"
+
+
+class _DisabledSpan:
+    __slots__ = ()
+
+    def record(
+        self, rows: int | None = None, machines: int | None = None, arrays: tuple = ()
+    ) -> None:
+        pass
+
+    def __enter__(self) -> _DisabledSpan:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_DISABLED = _DisabledSpan()
+
+
+def stage(name: str) -> StageSpan | _DisabledSpan:
+    """Context manager timing one pipeline stage.
+
+    A shared no-op when stage timing is disabled, unless the current request
+    asked for its stages to be traced.
+    """
+    if enabled:
+        return StageSpan(name)
+    stats = current_request_stats()
+    return StageSpan(name) if stats is not None and stats.trace_stages else _DISABLED
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from starlette.routing import compile_path
+
+PROFILE_ENGINES = ("cprofile", "sampling")
+PROFILE_FORMATS = {"cprofile": ("text", "pstats"), "sampling": ("collapsed",)}
+_IDLE_MODULES = (
+    "threading",
+    "selectors",
+    "queue",
+    "asyncio.base_events",
+    "concurrent.futures.thread",
+)
+
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+
+def collapse_stack(frame) -> str | None:
+    """Root-to-leaf ``module:function`` names joined by ``;``, or None for an idle thread."""
+    if frame.f_globals.get("__name__", "") in _IDLE_MODULES:
+        return None
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """Samples the stacks of every other thread every ``interval`` seconds while ``active`` is set.
+
+    Threads blocked in ``threading``, ``queue``, ``selectors`` or the event
+    loop's poll are skipped, so idle workers do not drown out the busy ones.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.counts: Counter[str] = Counter()
+        self.samples = 0
+        self.active = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if not self.active.is_set():
+                continue
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = collapse_stack(frame)
+                if stack is not None:
+                    self.counts[stack] += 1
+
+    def collapsed(self) -> str:
+        """``stack count`` lines in the input format of flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+@dataclass
+class ProfileResult:
+    engine: str
+    seconds: float
+    requests: int = 0
+    profile: cProfile.Profile | None = None
+    sampler: SamplingProfiler | None = None
+
+    def render(self, output: str, limit: int = 60) -> bytes:
+        if output == "collapsed":
+            return self.sampler.collapsed().encode()
+        if not self.profile.getstats():
+            return marshal.dumps({}) if output == "pstats" else b"No calls were profiled.\n"
+        stats = pstats.Stats(self.profile, stream=io.StringIO())
+        if output == "pstats":
+            return marshal.dumps(stats.stats)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return stats.stream.getvalue().encode()
+
+
+@dataclass
+class _Session:
+    engine: str
+    id: int = 0
+    pattern: object | None = None
+    remaining: int = 0
+    in_flight: int = 0
+    requests: int = 0
+    profile: cProfile.Profile | None = None
+    sampler: SamplingProfiler | None = None
+    finished: threading.Event = field(default_factory=threading.Event)
+
+    def result(self, seconds: float) -> ProfileResult:
+        return ProfileResult(self.engine, seconds, self.requests, self.profile, self.sampler)
+
+
+class ProcessProfiler:
+    """One profiling session at a time: a window of the whole process, or requests to a route.
+
+    Sessions run on a background thread and are polled by id, so no request
+    waits for one; the results of the last ``keep`` sessions are kept.
+    ``cprofile`` follows every thread on Python 3.12+, where it runs on
+    ``sys.monitoring``; older interpreters only see the thread that enabled it.
+    ``sampling`` reads every thread's stack on any interpreter. Either way,
+    other requests running at the same time show up in the result too.
+    """
+
+    def __init__(self, keep: int = 5) -> None:
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._session: _Session | None = None
+        self._results: OrderedDict[int, ProfileResult | None] = OrderedDict()
+        self._next_id = 1
+        self.armed = False
+
+    @staticmethod
+    def check(engine: str, output: str) -> None:
+        if engine not in PROFILE_ENGINES:
+            raise ValueError(f"engine must be one of {', '.join(PROFILE_ENGINES)}")
+        if output not in PROFILE_FORMATS[engine]:
+            raise ValueError(f"{engine} output must be one of {', '.join(PROFILE_FORMATS[engine])}")
+
+    def _open(
+        self, engine: str, interval: float, pattern: object | None = None, count: int = 0
+    ) -> _Session:
+        session = _Session(engine=engine, pattern=pattern, remaining=count)
+        if engine == "cprofile":
+            session.profile = cProfile.Profile()
+        else:
+            session.sampler = SamplingProfiler(interval)
+            session.sampler.start()
+        with self._lock:
+            if self._session is not None:
+                if session.sampler is not None:
+                    session.sampler.stop()
+                raise RuntimeError("Another profiling session is running")
+            session.id = self._next_id
+            self._next_id += 1
+            self._results[session.id] = None
+            while len(self._results) > self.keep:
+                self._results.popitem(last=False)
+            self._session = session
+            self.armed = pattern is not None
+        return session
+
+    def _close(self, session: _Session, seconds: float) -> None:
+        with self._lock:
+            self.armed = False
+            self._session = None
+            if session.in_flight and session.profile is not None:
+                session.profile.disable()
+            if session.id in self._results:
+                self._results[session.id] = session.result(seconds)
+        if session.sampler is not None:
+            session.sampler.stop()
+
+    def _start(self, session: _Session, run: Callable[[], None]) -> int:
+        def target() -> None:
+            started = time.perf_counter()
+            try:
+                run()
+            finally:
+                self._close(session, time.perf_counter() - started)
+
+        threading.Thread(target=target, name=f"profile-{session.id}", daemon=True).start()
+        return session.id
+
+    def start_window(
+        self, seconds: float, engine: str = "sampling", interval: float = 0.005
+    ) -> int:
+        """Starts profiling the whole process for ``seconds``; returns the session id."""
+        session = self._open(engine, interval)
+
+        def run() -> None:
+            if session.profile is not None:
+                session.profile.enable()
+            else:
+                session.sampler.active.set()
+            try:
+                session.finished.wait(seconds)
+            finally:
+                if session.profile is not None:
+                    session.profile.disable()
+
+        return self._start(session, run)
+
+    def start_requests(
+        self,
+        route: str,
+        count: int,
+        timeout: float,
+        engine: str = "cprofile",
+        interval: float = 0.005,
+    ) -> int:
+        """Starts profiling the next ``count`` requests matching ``route``, or until ``timeout``."""
+        session = self._open(engine, interval, compile_path(route)[0], count)
+        return self._start(session, lambda: session.finished.wait(timeout))
+
+    def _check_known(self, session_id: int) -> None:
+        if session_id not in self._results:
+            raise ValueError(f"Unknown profile session {session_id}; kept: {list(self._results)}")
+
+    def result(self, session_id: int) -> ProfileResult | None:
+        """The finished session's result, or None while it is still running."""
+        with self._lock:
+            self._check_known(session_id)
+            return self._results[session_id]
+
+    def stop(self, session_id: int) -> None:
+        """Ends a running session early; its result covers the time profiled so far."""
+        with self._lock:
+            self._check_known(session_id)
+            session = self._session
+        if session is not None and session.id == session_id:
+            session.finished.set()
+
+    def request_started(self, path: str) -> _Session | None:
+        """Called for each request while armed; returns a ``request_finished`` token if profiled."""
+        with self._lock:
+            session = self._session
+            if session is None or session.pattern is None or session.remaining <= 0:
+                return None
+            if not session.pattern.match(path):
+                return None
+            session.remaining -= 1
+            session.in_flight += 1
+            if session.in_flight == 1:
+                if session.profile is not None:
+                    session.profile.enable()
+                else:
+                    session.sampler.active.set()
+            return session
+
+    def request_finished(self, session: _Session) -> None:
+        with self._lock:
+            session.in_flight -= 1
+            session.requests += 1
+            if session.in_flight == 0 and self._session is session:
+                if session.profile is not None:
+                    session.profile.disable()
+                else:
+                    session.sampler.active.clear()
+            if session.remaining <= 0 and session.in_flight == 0:
+                self.armed = False
+                session.finished.set()
+
+
+class MemorySnapshots:
+    """tracemalloc snapshots kept by id, so allocation sites can be diffed between two of them."""
+
+    def __init__(self, keep: int = 5, frames: int = 10) -> None:
+        self.keep = keep
+        self.frames = frames
+        self._lock = threading.Lock()
+        self._snapshots: OrderedDict[int, tracemalloc.Snapshot] = OrderedDict()
+        self._next_id = 1
+
+    def take(self, limit: int = 20) -> dict[str, object]:
+        """Starts tracing on first use; earlier allocations are not attributed."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                )
+            )
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots[snapshot_id] = snapshot
+            while len(self._snapshots) > self.keep:
+                self._snapshots.popitem(last=False)
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "id": snapshot_id,
+            "traced_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "top": [
+                {
+                    "location": str(stat.traceback),
+                    "size_kb": round(stat.size / 1024, 1),
+                    "count": stat.count,
+                }
+                for stat in snapshot.statistics("lineno")[:limit]
+            ],
+        }
+
+    def diff(self, from_id: int, to_id: int, limit: int = 20) -> list[dict[str, object]]:
+        with self._lock:
+            missing = [i for i in (from_id, to_id) if i not in self._snapshots]
+            if missing:
+                raise ValueError(f"Unknown snapshot ids: {missing}; kept: {list(self._snapshots)}")
+            older, newer = self._snapshots[from_id], self._snapshots[to_id]
+        return [
+            {
+                "location": str(stat.traceback),
+                "size_kb": round(stat.size / 1024, 1),
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in newer.compare_to(older, "lineno")[:limit]
+        ]
+
+    def stop(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+
+profiler = ProcessProfiler()
+memory_snapshots = MemorySnapshots()
@@ -1,18 +1,54 @@
-from datetime import date
+from array import array
+from collections import defaultdict
+from collections.abc import Collection, Iterator
+from datetime import date, datetime, timedelta
 
-from sqlalchemy import and_, func, select
+import numpy as np
+from sqlalchemy import and_, delete, func, insert, or_, select, tuple_, update
 from sqlalchemy.orm import Session
 
-from app.infrastructure.db.models import Anomaly, DailyAggregate, Machine, ProductionRecord
+from app.domain.columnar import MachineDailyFrame
+from app.domain.feature_state import MachineFeatureState
+from app.domain.quantile_sketch import LabelWindowSketch
+from app.infrastructure.db.models import (
+    Anomaly,
+    DailyAggregate,
+    DataGeneration,
+    Dataset,
+    Machine,
+    ProductionRecord,
+)
 
 
 class AnalyticsRepository:
+    # Machines per query when reading daily totals, well under SQLite's bound-parameter limit.
+    READ_BATCH = 500
+
     def __init__(self, db: Session) -> None:
         self.db = db
 
-    def recompute_daily_aggregates(self) -> None:
-        self.db.query(DailyAggregate).delete()
-        stmt = (
+    def recompute_daily_aggregates(
+        self,
+        label_window_days: int = 120,
+        feature_window_days: int = 120,
+        rolling_days: int = 14,
+        full: bool = False,
+    ) -> None:
+        """Brings daily aggregates, label sketches and feature states up to date after an upload.
+
+        Only the machine-days of the latest dataset are re-aggregated, and only the
+        machines it touched have their sketch and feature state advanced. ``full``
+        re-aggregates every production record and rebuilds every machine instead;
+        it is also what happens when there are no aggregates yet.
+        """
+        full = full or self.db.execute(select(DailyAggregate.id).limit(1)).first() is None
+        latest_dataset = select(func.max(Dataset.id)).scalar_subquery()
+        touched_pairs = (
+            select(ProductionRecord.machine_id, ProductionRecord.report_date)
+            .where(ProductionRecord.dataset_id == latest_dataset)
+            .distinct()
+        )
+        aggregate = (
             select(
                 ProductionRecord.report_date,
                 Machine.machine_code,
@@ -24,19 +60,311 @@ class AnalyticsRepository:
             .join(Machine, Machine.id == ProductionRecord.machine_id)
             .group_by(ProductionRecord.report_date, Machine.machine_code, ProductionRecord.shift)
         )
-        for row in self.db.execute(stmt):
-            self.db.add(
-                DailyAggregate(
-                    report_date=row[0],
-                    machine_code=row[1],
-                    shift=row[2],
-                    downtime_minutes=row[3],
-                    scrap_units=row[4],
-                    output_units=row[5],
+        if full:
+            self.db.execute(delete(DailyAggregate))
+        else:
+            touched_days = (
+                select(Machine.machine_code, ProductionRecord.report_date)
+                .join(Machine, Machine.id == ProductionRecord.machine_id)
+                .where(ProductionRecord.dataset_id == latest_dataset)
+            )
+            self.db.execute(
+                delete(DailyAggregate).where(
+                    tuple_(DailyAggregate.machine_code, DailyAggregate.report_date).in_(
+                        touched_days
+                    )
                 )
             )
+            aggregate = aggregate.where(
+                tuple_(ProductionRecord.machine_id, ProductionRecord.report_date).in_(touched_pairs)
+            )
+        self.db.execute(
+            insert(DailyAggregate).from_select(
+                [
+                    DailyAggregate.report_date,
+                    DailyAggregate.machine_code,
+                    DailyAggregate.shift,
+                    DailyAggregate.downtime_minutes,
+                    DailyAggregate.scrap_units,
+                    DailyAggregate.output_units,
+                ],
+                aggregate,
+            )
+        )
+        if full:
+            self._rebuild_machine_states(label_window_days, feature_window_days, rolling_days)
+        else:
+            self._advance_machine_states(label_window_days, feature_window_days, rolling_days)
+        self._bump_data_generation()
         self.db.commit()
 
+    def _touched_days(self) -> dict[str, tuple[date, date]]:
+        """First and last report date per machine in the latest uploaded dataset."""
+        latest_dataset = select(func.max(Dataset.id)).scalar_subquery()
+        touched_stmt = (
+            select(
+                Machine.machine_code,
+                func.min(ProductionRecord.report_date),
+                func.max(ProductionRecord.report_date),
+            )
+            .join(Machine, Machine.id == ProductionRecord.machine_id)
+            .where(ProductionRecord.dataset_id == latest_dataset)
+            .group_by(Machine.machine_code)
+        )
+        return {code: (first, last) for code, first, last in self.db.execute(touched_stmt)}
+
+    def _rebuild_machine_states(
+        self, label_window_days: int, feature_window_days: int, rolling_days: int
+    ) -> None:
+        """Builds every machine's sketch and feature state from its trailing windows."""
+        daily_totals = self._daily_totals(None)
+        for machine in self.db.execute(select(Machine)).scalars():
+            totals = daily_totals.get(machine.machine_code)
+            if not totals:
+                machine.label_sketch_json = None
+                machine.feature_state_json = None
+                continue
+            window_end = next(reversed(totals))
+            machine.label_sketch_json = self._built_sketch(
+                totals, window_end, label_window_days
+            ).to_dict()
+            machine.feature_state_json = self._built_state(
+                totals, window_end, feature_window_days, rolling_days
+            ).to_dict()
+
+    def _advance_machine_states(
+        self, label_window_days: int, feature_window_days: int, rolling_days: int
+    ) -> None:
+        """Advances the sketch and feature state of each machine the latest upload touched.
+
+        When the upload only added days after a machine's stored window, the
+        window slides forward and only the days entering or leaving it are read.
+        Uploads that touch a day inside the window rebuild it from the trailing
+        window instead, and so does a feature state that has slid a full window
+        since it was last built, which bounds the drift of its running moments.
+        """
+        touched = self._touched_days()
+        machines = (
+            self.db.execute(select(Machine).where(Machine.machine_code.in_(touched)))
+            .scalars()
+            .all()
+        )
+        plans = {}
+        reads: dict[str, list[tuple[date, date]]] = {}
+        for machine in machines:
+            first, last = touched[machine.machine_code]
+            sketch = (
+                LabelWindowSketch.from_dict(machine.label_sketch_json)
+                if machine.label_sketch_json
+                else None
+            )
+            state = self._stored_feature_state(machine.feature_state_json)
+            stored_end = max(
+                (item.window_end for item in (sketch, state) if item and item.window_end),
+                default=last,
+            )
+            window_end = max(last, stored_end)
+            if not (
+                sketch is not None
+                and sketch.window_days == label_window_days
+                and first > sketch.window_end
+            ):
+                sketch = None
+            if not (
+                state is not None
+                and state.window_end is not None
+                and state.window_days == feature_window_days
+                and state.rolling_days == rolling_days
+                and state.updates < state.window_days
+                and first > state.window_end
+            ):
+                state = None
+            plans[machine.machine_code] = (machine, sketch, state, window_end)
+            ranges = []
+            for item, window_days in ((sketch, label_window_days), (state, feature_window_days)):
+                if item is None:
+                    ranges.append((window_end - timedelta(days=window_days), window_end))
+                else:
+                    # The days leaving the window, then the days entering it.
+                    cutoff = window_end - timedelta(days=window_days)
+                    ranges.append((item.window_start, cutoff - timedelta(days=1)))
+                    ranges.append((item.window_end + timedelta(days=1), window_end))
+            reads[machine.machine_code] = ranges
+
+        daily_totals = self._daily_totals(reads)
+        for code, (machine, sketch, state, window_end) in plans.items():
+            totals = daily_totals.get(code, {})
+            if sketch is None:
+                sketch = self._built_sketch(totals, window_end, label_window_days)
+            else:
+                sketch.slide_to(self._label_days(totals, sketch.window_start), window_end)
+            if state is None:
+                state = self._built_state(totals, window_end, feature_window_days, rolling_days)
+            else:
+                state.slide_to(totals, window_end)
+            machine.label_sketch_json = sketch.to_dict()
+            machine.feature_state_json = state.to_dict()
+
+    def _daily_totals(
+        self, reads: dict[str, list[tuple[date, date]]] | None
+    ) -> dict[str, dict[date, list[float]]]:
+        """Daily downtime, scrap and output totals per machine, each machine's in date order.
+
+        ``reads`` limits the machines and their inclusive date ranges; machines
+        sharing the same ranges are read together. None reads everything.
+        """
+        stmt = (
+            select(
+                DailyAggregate.machine_code,
+                DailyAggregate.report_date,
+                func.sum(DailyAggregate.downtime_minutes),
+                func.sum(DailyAggregate.scrap_units),
+                func.sum(DailyAggregate.output_units),
+            )
+            .group_by(DailyAggregate.machine_code, DailyAggregate.report_date)
+            .order_by(DailyAggregate.machine_code, DailyAggregate.report_date)
+        )
+        if reads is None:
+            statements = [stmt]
+        else:
+            groups: dict[tuple[tuple[date, date], ...], list[str]] = defaultdict(list)
+            for code, ranges in reads.items():
+                groups[tuple(sorted({(lo, hi) for lo, hi in ranges if lo <= hi}))].append(code)
+            statements = [
+                stmt.where(
+                    DailyAggregate.machine_code.in_(codes[i : i + self.READ_BATCH]),
+                    or_(*(DailyAggregate.report_date.between(lo, hi) for lo, hi in ranges)),
+                )
+                for ranges, codes in groups.items()
+                if ranges
+                for i in range(0, len(codes), self.READ_BATCH)
+            ]
+        daily_totals: dict[str, dict[date, list[float]]] = defaultdict(dict)
+        for statement in statements:
+            for code, day, downtime, scrap, output in self.db.execute(statement):
+                daily_totals[code][day] = [
+                    float(downtime or 0.0),
+                    float(scrap or 0.0),
+                    float(output or 0.0),
+                ]
+        return daily_totals
+
+    @classmethod
+    def _built_sketch(
+        cls, totals: dict[date, list[float]], window_end: date, window_days: int
+    ) -> LabelWindowSketch:
+        window_start = window_end - timedelta(days=window_days)
+        return LabelWindowSketch.build(cls._label_days(totals, window_start), window_days)
+
+    @classmethod
+    def _built_state(
+        cls, totals: dict[date, list[float]], window_end: date, window_days: int, rolling_days: int
+    ) -> MachineFeatureState:
+        window_start = window_end - timedelta(days=window_days)
+        days = cls._days_after(totals, window_start - timedelta(days=1))
+        return MachineFeatureState.build(days, window_days, rolling_days, window_end)
+
+    @staticmethod
+    def _stored_feature_state(payload: dict | None) -> MachineFeatureState | None:
+        """The stored feature state, or None if there is none or it predates running moments."""
+        if not payload or "m2" not in payload:
+            return None
+        return MachineFeatureState.from_dict(payload)
+
+    @classmethod
+    def _label_days(
+        cls, totals: dict[date, list[float]], since: date
+    ) -> dict[date, tuple[float, float]]:
+        """Downtime and scrap percent of the days from ``since`` on."""
+        return {
+            day: (downtime, scrap * 100.0 / (scrap + output) if scrap + output else 0.0)
+            for day, downtime, scrap, output in cls._days_after(totals, since - timedelta(days=1))
+        }
+
+    @staticmethod
+    def _days_after(
+        totals: dict[date, list[float]], after: date
+    ) -> list[tuple[date, float, float, float]]:
+        """``(day, downtime, scrap, output)`` rows after ``after``, read back from the end."""
+        rows = []
+        for day in reversed(totals):
+            if day <= after:
+                break
+            rows.append((day, *totals[day]))
+        rows.reverse()
+        return rows
+
+    def get_feature_states(
+        self, window_days: int, as_of_date: date | None = None
+    ) -> dict[str, MachineFeatureState]:
+        """Stored rolling feature states tracking a ``window_days`` history, by machine code.
+
+        With ``as_of_date``, states ending before it are slid to end on it, reading
+        only the days that leave their windows.
+        """
+        stmt = select(Machine.machine_code, Machine.feature_state_json).where(
+            Machine.feature_state_json.is_not(None)
+        )
+        states = {}
+        for machine_code, payload in self.db.execute(stmt):
+            # A cleared state is stored as JSON null, which ``is_not(None)`` does not filter out.
+            state = self._stored_feature_state(payload)
+            if state is not None and state.window_days == window_days:
+                states[machine_code] = state
+        if as_of_date is None:
+            return states
+        behind = {
+            code: state
+            for code, state in states.items()
+            if state.window_end is not None and state.window_end < as_of_date
+        }
+        cutoff = as_of_date - timedelta(days=window_days)
+        daily_totals = self._daily_totals(
+            {
+                code: [
+                    (state.window_start, cutoff - timedelta(days=1)),
+                    (state.window_end + timedelta(days=1), as_of_date),
+                ]
+                for code, state in behind.items()
+            }
+        )
+        for code, state in behind.items():
+            states[code] = state.as_of(as_of_date, daily_totals.get(code, {}))
+        return states
+
+    def get_label_thresholds(
+        self, as_of_date: date, window_days: int, q: float = 0.85
+    ) -> dict[str, tuple[float, float]]:
+        """Downtime and scrap-percent thresholds of machines whose sketch ends on ``as_of_date``."""
+        stmt = select(Machine.machine_code, Machine.label_sketch_json).where(
+            Machine.label_sketch_json.is_not(None)
+        )
+        thresholds: dict[str, tuple[float, float]] = {}
+        for machine_code, payload in self.db.execute(stmt):
+            if not payload or payload.get("window_days") != window_days:
+                continue
+            if payload.get("window_end") != as_of_date.isoformat():
+                continue
+            thresholds[machine_code] = LabelWindowSketch.from_dict(payload).thresholds(q)
+        return thresholds
+
+    def _bump_data_generation(self) -> None:
+        bumped = self.db.execute(
+            update(DataGeneration)
+            .where(DataGeneration.id == 1)
+            .values(generation=DataGeneration.generation + 1, updated_at=datetime.utcnow())
+        )
+        if bumped.rowcount == 0:
+            self.db.add(DataGeneration(id=1, generation=1))
+
+    def data_generation(self) -> int:
+        """Counter bumped each time daily aggregates are rebuilt; 0 before the first upload."""
+        stmt = select(DataGeneration.generation).where(DataGeneration.id == 1)
+        return self.db.execute(stmt).scalar_one_or_none() or 0
+
+    def latest_report_date(self) -> date | None:
+        return self.db.execute(select(func.max(DailyAggregate.report_date))).scalar_one_or_none()
+
     def get_overview(self, report_date: date):
         stmt = select(
             func.sum(DailyAggregate.downtime_minutes),
@@ -46,7 +374,28 @@ class AnalyticsRepository:
         ).where(DailyAggregate.report_date == report_date)
         return self.db.execute(stmt).one()
 
-    def get_machine_timeseries(self, start: date, end: date, machine_id: str | None = None):
+    def get_overview_range(
+        self, start: date, end: date
+    ) -> list[tuple[date, float, float, float, int]]:
+        """``get_overview`` totals for every report date in ``[start, end]`` that has aggregates."""
+        stmt = (
+            select(
+                DailyAggregate.report_date,
+                func.sum(DailyAggregate.downtime_minutes),
+                func.sum(DailyAggregate.scrap_units),
+                func.sum(DailyAggregate.output_units),
+                func.count(DailyAggregate.id),
+            )
+            .where(and_(DailyAggregate.report_date >= start, DailyAggregate.report_date <= end))
+            .group_by(DailyAggregate.report_date)
+            .order_by(DailyAggregate.report_date)
+        )
+        return [
+            (r[0], r[1] or 0.0, r[2] or 0.0, r[3] or 0.0, r[4] or 0) for r in self.db.execute(stmt)
+        ]
+
+    @staticmethod
+    def _machine_timeseries_stmt(start: date, end: date, machine_id: str | None):
         scrap_percent_expr = (func.sum(DailyAggregate.scrap_units) * 100.0) / func.nullif(
             func.sum(DailyAggregate.scrap_units + DailyAggregate.output_units),
             0,
@@ -64,23 +413,37 @@ class AnalyticsRepository:
         if machine_id:
             stmt = stmt.where(DailyAggregate.machine_code == machine_id)
 
-        stmt = (
+        return (
             stmt.group_by(DailyAggregate.report_date, DailyAggregate.machine_code)
             .order_by(DailyAggregate.report_date, DailyAggregate.machine_code)
         )
 
-        return [
-            dict(
-                date=r[0],
-                machine_id=r[1],
-                downtime_minutes=r[2] or 0.0,
-                throughput_units=r[3] or 0.0,
-                scrap_percent=r[4] or 0.0,
-            )
-            for r in self.db.execute(stmt)
-        ]
+    @staticmethod
+    def _machine_timeseries_row(r) -> dict:
+        return dict(
+            date=r[0],
+            machine_id=r[1],
+            downtime_minutes=r[2] or 0.0,
+            throughput_units=r[3] or 0.0,
+            scrap_percent=r[4] or 0.0,
+        )
 
-    def get_shift_aggregates(self, start: date, end: date, machine_id: str | None = None):
+    def get_machine_timeseries(self, start: date, end: date, machine_id: str | None = None):
+        stmt = self._machine_timeseries_stmt(start, end, machine_id)
+        return [self._machine_timeseries_row(r) for r in self.db.execute(stmt)]
+
+    def iter_machine_timeseries(
+        self, start: date, end: date, machine_id: str | None = None, batch_size: int = 1000
+    ) -> Iterator[dict]:
+        """``get_machine_timeseries`` rows, ``batch_size`` at a time from a server-side cursor."""
+        stmt = self._machine_timeseries_stmt(start, end, machine_id).execution_options(
+            yield_per=batch_size
+        )
+        for r in self.db.execute(stmt):
+            yield self._machine_timeseries_row(r)
+
+    @staticmethod
+    def _shift_aggregates_stmt(start: date, end: date, machine_id: str | None):
         scrap_percent_expr = (func.sum(DailyAggregate.scrap_units) * 100.0) / func.nullif(
             func.sum(DailyAggregate.scrap_units + DailyAggregate.output_units),
             0,
@@ -99,21 +462,35 @@ class AnalyticsRepository:
         if machine_id:
             stmt = stmt.where(DailyAggregate.machine_code == machine_id)
 
-        stmt = (
+        return (
             stmt.group_by(DailyAggregate.report_date, DailyAggregate.shift, DailyAggregate.machine_code)
             .order_by(DailyAggregate.report_date, DailyAggregate.shift, DailyAggregate.machine_code)
         )
-        return [
-            dict(
-                date=r[0],
-                shift=r[1],
-                machine_id=r[2],
-                downtime_minutes=r[3] or 0.0,
-                throughput_units=r[4] or 0.0,
-                scrap_percent=r[5] or 0.0,
-            )
-            for r in self.db.execute(stmt)
-        ]
+
+    @staticmethod
+    def _shift_aggregate_row(r) -> dict:
+        return dict(
+            date=r[0],
+            shift=r[1],
+            machine_id=r[2],
+            downtime_minutes=r[3] or 0.0,
+            throughput_units=r[4] or 0.0,
+            scrap_percent=r[5] or 0.0,
+        )
+
+    def get_shift_aggregates(self, start: date, end: date, machine_id: str | None = None):
+        stmt = self._shift_aggregates_stmt(start, end, machine_id)
+        return [self._shift_aggregate_row(r) for r in self.db.execute(stmt)]
+
+    def iter_shift_aggregates(
+        self, start: date, end: date, machine_id: str | None = None, batch_size: int = 1000
+    ) -> Iterator[dict]:
+        """``get_shift_aggregates`` rows, ``batch_size`` at a time from a server-side cursor."""
+        stmt = self._shift_aggregates_stmt(start, end, machine_id).execution_options(
+            yield_per=batch_size
+        )
+        for r in self.db.execute(stmt):
+            yield self._shift_aggregate_row(r)
 
     def get_day_aggregates(self, start: date, end: date, machine_id: str | None = None):
         scrap_percent_expr = (func.sum(DailyAggregate.scrap_units) * 100.0) / func.nullif(
@@ -149,7 +526,13 @@ class AnalyticsRepository:
             query = query.filter(Anomaly.severity == severity)
         return query.order_by(Anomaly.report_date.desc()).limit(limit).offset(offset).all()
 
-    def get_machine_daily_metrics(self, start: date, end: date):
+    def get_machine_daily_metrics(
+        self,
+        start: date,
+        end: date,
+        machine_id: str | None = None,
+        machine_ids: Collection[str] | None = None,
+    ) -> MachineDailyFrame:
         scrap_percent_expr = (func.sum(DailyAggregate.scrap_units) * 100.0) / func.nullif(
             func.sum(DailyAggregate.scrap_units + DailyAggregate.output_units),
             0,
@@ -164,20 +547,42 @@ class AnalyticsRepository:
                 scrap_percent_expr,
             )
             .where(and_(DailyAggregate.report_date >= start, DailyAggregate.report_date <= end))
-            .group_by(DailyAggregate.report_date, DailyAggregate.machine_code)
+        )
+        if machine_id:
+            stmt = stmt.where(DailyAggregate.machine_code == machine_id)
+        if machine_ids is not None:
+            stmt = stmt.where(DailyAggregate.machine_code.in_(list(machine_ids)))
+
+        stmt = (
+            stmt.group_by(DailyAggregate.report_date, DailyAggregate.machine_code)
             .order_by(DailyAggregate.machine_code, DailyAggregate.report_date)
         )
-        return [
-            dict(
-                date=r[0],
-                machine_id=r[1],
-                downtime_minutes=float(r[2] or 0.0),
-                scrap_units=float(r[3] or 0.0),
-                output_units=float(r[4] or 0.0),
-                scrap_percent=float(r[5] or 0.0),
-            )
-            for r in self.db.execute(stmt)
-        ]
+        codes: list[str] = []
+        machine_index = array("i")
+        date_ordinal = array("i")
+        downtime = array("d")
+        scrap = array("d")
+        output = array("d")
+        scrap_percent = array("d")
+        for r in self.db.execute(stmt):
+            if not codes or codes[-1] != r[1]:
+                codes.append(r[1])
+            machine_index.append(len(codes) - 1)
+            date_ordinal.append(r[0].toordinal())
+            downtime.append(float(r[2] or 0.0))
+            scrap.append(float(r[3] or 0.0))
+            output.append(float(r[4] or 0.0))
+            scrap_percent.append(float(r[5] or 0.0))
+
+        return MachineDailyFrame.from_sorted(
+            machine_ids=codes,
+            machine_index=np.frombuffer(machine_index, dtype=np.int32),
+            date_ordinal=np.frombuffer(date_ordinal, dtype=np.int32),
+            downtime_minutes=np.frombuffer(downtime, dtype=float),
+            scrap_units=np.frombuffer(scrap, dtype=float),
+            output_units=np.frombuffer(output, dtype=float),
+            scrap_percent=np.frombuffer(scrap_percent, dtype=float),
+        )
 
     def get_machine_shift_scrap(self, start: date, end: date):
         scrap_percent_expr = (func.sum(DailyAggregate.scrap_units) * 100.0) / func.nullif(
@@ -0,0 +1,108 @@
+from collections.abc import Iterator
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.infrastructure.db.models import DailyAggregate, Machine, Operator, ProductionRecord
+
+# Column name to type (int, float, str, date or datetime), in row order.
+EXPORT_COLUMNS: dict[str, dict[str, str]] = {
+    "production_records": {
+        "record_id": "int",
+        "dataset_id": "int",
+        "machine_id": "str",
+        "operator_id": "str",
+        "shift": "str",
+        "timestamp": "datetime",
+        "report_date": "date",
+        "downtime_minutes": "float",
+        "scrap_units": "float",
+        "output_units": "float",
+    },
+    "daily_aggregates": {
+        "report_date": "date",
+        "machine_id": "str",
+        "shift": "str",
+        "downtime_minutes": "float",
+        "scrap_units": "float",
+        "output_units": "float",
+    },
+}
+
+
+class ExportRepository:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def iter_batches(
+        self,
+        table: str,
+        start: date | None = None,
+        end: date | None = None,
+        machine_id: str | None = None,
+        dataset_id: int | None = None,
+        batch_size: int = 5000,
+    ) -> Iterator[list[tuple]]:
+        """Rows of ``table`` in ``EXPORT_COLUMNS`` order, ``batch_size`` at a time from a cursor."""
+        if table == "production_records":
+            stmt = self._production_records_stmt(start, end, machine_id, dataset_id)
+        elif table == "daily_aggregates":
+            if dataset_id is not None:
+                raise ValueError("dataset_id filter applies only to production_records")
+            stmt = self._daily_aggregates_stmt(start, end, machine_id)
+        else:
+            raise ValueError(f"table must be one of {', '.join(EXPORT_COLUMNS)}")
+        result = self.db.execute(stmt.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+    @staticmethod
+    def _production_records_stmt(
+        start: date | None, end: date | None, machine_id: str | None, dataset_id: int | None
+    ):
+        stmt = (
+            select(
+                ProductionRecord.id,
+                ProductionRecord.dataset_id,
+                Machine.machine_code,
+                Operator.operator_code,
+                ProductionRecord.shift,
+                ProductionRecord.timestamp,
+                ProductionRecord.report_date,
+                ProductionRecord.downtime_minutes,
+                ProductionRecord.scrap_units,
+                ProductionRecord.output_units,
+            )
+            .join(Machine, Machine.id == ProductionRecord.machine_id)
+            .join(Operator, Operator.id == ProductionRecord.operator_id)
+        )
+        if start is not None:
+            stmt = stmt.where(ProductionRecord.report_date >= start)
+        if end is not None:
+            stmt = stmt.where(ProductionRecord.report_date <= end)
+        if machine_id:
+            stmt = stmt.where(Machine.machine_code == machine_id)
+        if dataset_id is not None:
+            stmt = stmt.where(ProductionRecord.dataset_id == dataset_id)
+        return stmt.order_by(ProductionRecord.id)
+
+    @staticmethod
+    def _daily_aggregates_stmt(start: date | None, end: date | None, machine_id: str | None):
+        stmt = select(
+            DailyAggregate.report_date,
+            DailyAggregate.machine_code,
+            DailyAggregate.shift,
+            DailyAggregate.downtime_minutes,
+            DailyAggregate.scrap_units,
+            DailyAggregate.output_units,
+        )
+        if start is not None:
+            stmt = stmt.where(DailyAggregate.report_date >= start)
+        if end is not None:
+            stmt = stmt.where(DailyAggregate.report_date <= end)
+        if machine_id:
+            stmt = stmt.where(DailyAggregate.machine_code == machine_id)
+        return stmt.order_by(
+            DailyAggregate.report_date, DailyAggregate.machine_code, DailyAggregate.shift
+        )
@@ -0,0 +1,28 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.infrastructure.db.models import ModelArtifact
+
+
+class ModelArtifactRepository:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def latest_version(self) -> int | None:
+        return self.db.execute(select(func.max(ModelArtifact.version))).scalar_one_or_none()
+
+    def latest(self) -> ModelArtifact | None:
+        stmt = select(ModelArtifact).order_by(ModelArtifact.version.desc()).limit(1)
+        return self.db.execute(stmt).scalar_one_or_none()
+
+    def save(self, fields: dict[str, object], keep_versions: int) -> ModelArtifact:
+        artifact = ModelArtifact(version=(self.latest_version() or 0) + 1, **fields)
+        self.db.add(artifact)
+        self.db.flush()
+        stale = select(ModelArtifact.id).where(
+            ModelArtifact.version <= artifact.version - keep_versions
+        )
+        self.db.query(ModelArtifact).filter(ModelArtifact.id.in_(stale)).delete(synchronize_session=False)
+        self.db.commit()
+        self.db.refresh(artifact)
+        return artifact
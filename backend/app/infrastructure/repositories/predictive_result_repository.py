@@ -0,0 +1,63 @@
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.infrastructure.db.models import MachineRiskResult, PredictiveRun
+
+
+class PredictiveResultRepository:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def get_run(self, as_of_date: date, data_generation: int) -> PredictiveRun | None:
+        stmt = select(PredictiveRun).where(
+            PredictiveRun.as_of_date == as_of_date,
+            PredictiveRun.data_generation == data_generation,
+        )
+        return self.db.execute(stmt).scalar_one_or_none()
+
+    def list_machine_results(self, run_id: int) -> list[MachineRiskResult]:
+        stmt = (
+            select(MachineRiskResult)
+            .where(MachineRiskResult.run_id == run_id)
+            .order_by(MachineRiskResult.health_score.desc(), MachineRiskResult.machine_code)
+        )
+        return list(self.db.execute(stmt).scalars())
+
+    def save(
+        self,
+        as_of_date: date,
+        data_generation: int,
+        run_fields: dict[str, object],
+        machine_rows: list[dict[str, object]],
+        keep_runs: int,
+    ) -> PredictiveRun:
+        """Stores a run and its machine results, replacing runs of older generations for that date.
+
+        Only the ``keep_runs`` most recently stored runs, one per date, are kept.
+        """
+        stale = select(PredictiveRun.id).where(
+            PredictiveRun.as_of_date == as_of_date,
+            PredictiveRun.data_generation < data_generation,
+        )
+        self._delete_runs(list(self.db.execute(stale).scalars()))
+
+        run = PredictiveRun(as_of_date=as_of_date, data_generation=data_generation, **run_fields)
+        self.db.add(run)
+        self.db.flush()
+        self.db.add_all(MachineRiskResult(run_id=run.id, **row) for row in machine_rows)
+        expired = (
+            select(PredictiveRun.id).order_by(PredictiveRun.id.desc()).offset(max(keep_runs, 1))
+        )
+        self._delete_runs(list(self.db.execute(expired).scalars()))
+        self.db.commit()
+        return run
+
+    def _delete_runs(self, run_ids: list[int]) -> None:
+        if not run_ids:
+            return
+        self.db.query(MachineRiskResult).filter(MachineRiskResult.run_id.in_(run_ids)).delete(
+            synchronize_session=False
+        )
+        self.db.query(PredictiveRun).filter(PredictiveRun.id.in_(run_ids)).delete(synchronize_session=False)
@@ -4,7 +4,7 @@ from datetime import UTC, datetime, timedelta
 import hashlib
 import secrets
 
-from jose import jwt
+from jose import JWTError, jwt
 from app.config import get_settings
 
 import hashlib
@@ -53,3 +53,14 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def create_access_token(subject: str, role: str) -> str:
     expire = datetime.now(UTC) + timedelta(minutes=settings.access_token_expire_minutes)
     return jwt.encode({"sub": subject, "role": role, "exp": expire}, settings.secret_key, algorithm=ALGORITHM)
+
+
+def bearer_role(authorization: str | None) -> str | None:
+    """The role claim of a valid ``Bearer`` token in an Authorization header, or None."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM]).get("role")
+    except JWTError:
+        return None
@@ -1,8 +1,10 @@
 import time
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 
+import structlog
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import PlainTextResponse
@@ -11,19 +13,52 @@ from sqlalchemy import text
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from app.api.routers.admin import router as admin_router
 from app.api.routers.analytics import router as analytics_router
 from app.api.routers.auth import router as auth_router
 from app.api.routers.ingest import router as ingest_router
+from app.application.use_cases import AnalyticsUseCase
 from app.config import get_settings
-from app.infrastructure.db.session import engine
+from app.infrastructure.db.session import SessionLocal, engine
 from app.infrastructure.logging.logger import setup_logging
-from app.infrastructure.metrics.prometheus import request_counter
+from app.infrastructure.metrics.prometheus import (
+    request_counter,
+    request_db_queries,
+    request_db_seconds,
+    request_latency_seconds,
+    requests_in_progress,
+)
+from app.infrastructure.metrics import stages
+from app.infrastructure.metrics.request_stats import begin_request_stats, end_request_stats
+from app.infrastructure.profiling import profiler
+from app.infrastructure.repositories.analytics_repository import AnalyticsRepository
+from app.infrastructure.security.auth import bearer_role
 
 settings = get_settings()
 limiter = Limiter(key_func=get_remote_address, default_limits=[settings.rate_limit])
 setup_logging()
+logger = structlog.get_logger(__name__)
+
+
+def load_predictive_model() -> None:
+    db = SessionLocal()
+    try:
+        version = AnalyticsUseCase(AnalyticsRepository(db)).load_latest_model()
+        logger.info("predictive_model_loaded", version=version)
+    except Exception as exc:
+        # Serve anyway; the first risk request trains and publishes a model.
+        logger.warning("predictive_model_load_failed", error=exc.__class__.__name__)
+    finally:
+        db.close()
+
 
-app = FastAPI(title="ShadowPlant AI", version="0.1.0")
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    load_predictive_model()
+    yield
+
+
+app = FastAPI(title="ShadowPlant AI", version="0.1.0", lifespan=lifespan)
 app.state.limiter = limiter
 app.add_middleware(
     CORSMiddleware,
@@ -34,14 +69,45 @@ app.add_middleware(
 )
 
 
+def route_template(scope) -> str:
+    """The path template of the route that served ``scope``, so metric labels stay bounded."""
+    return getattr(scope.get("route"), "path", "<unmatched>")
+
+
 @app.middleware("http")
 async def request_context_middleware(request: Request, call_next):
     req_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
-    start = time.time()
-    response = await call_next(request)
+    # The route is only known once routing has run, so in-flight requests are counted per method.
+    in_progress = requests_in_progress.labels(request.method)
+    in_progress.inc()
+    # Stage timings reveal internals: callers get them only when stage timing is on or as admins.
+    debug_timing = bool(request.headers.get("X-Debug-Timing")) and (
+        stages.enabled or bearer_role(request.headers.get("Authorization")) == "admin"
+    )
+    stats, token = begin_request_stats(trace_stages=debug_timing)
+    profiled = profiler.request_started(request.url.path) if profiler.armed else None
+    start = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+    finally:
+        elapsed = time.perf_counter() - start
+        if profiled is not None:
+            profiler.request_finished(profiled)
+        end_request_stats(token)
+        in_progress.dec()
+        route = route_template(request.scope)
+        request_counter.labels(request.method, route, status).inc()
+        request_latency_seconds.labels(request.method, route).observe(elapsed)
+        request_db_seconds.labels(request.method, route).observe(stats.db_seconds)
+        request_db_queries.labels(request.method, route).observe(stats.query_count)
     response.headers["X-Request-ID"] = req_id
-    request_counter.labels(request.method, request.url.path, str(response.status_code)).inc()
-    response.headers["X-Process-Time"] = str(round(time.time() - start, 5))
+    response.headers["X-Process-Time"] = str(round(elapsed, 5))
+    if debug_timing:
+        timings = [f'db;dur={stats.db_seconds * 1000:.2f};desc="queries={stats.query_count}"']
+        timings.extend(span.server_timing() for span in stats.stages)
+        response.headers["Server-Timing"] = ", ".join(timings)
     return response
 
 
@@ -105,3 +171,4 @@ def metrics():
 app.include_router(auth_router)
 app.include_router(ingest_router)
 app.include_router(analytics_router)
+app.include_router(admin_router)
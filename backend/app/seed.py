@@ -1,8 +1,9 @@
-from datetime import datetime, timedelta
-import random
+from datetime import date, datetime, timedelta
 
+import numpy as np
 import pandas as pd
 
+from app.domain.columnar import MachineDailyFrame
 from app.infrastructure.db.session import SessionLocal
 from app.infrastructure.security.auth import get_password_hash
 from app.infrastructure.db.models import User
@@ -10,25 +11,75 @@ from app.infrastructure.repositories.ingest_repository import IngestRepository
 from app.infrastructure.repositories.analytics_repository import AnalyticsRepository
 
 
-def generate_data(days: int = 180) -> pd.DataFrame:
-    base = datetime.utcnow() - timedelta(days=days)
-    rows = []
-    for d in range(days):
-        for machine in ["M-100", "M-200", "M-300", "M-400"]:
-            for shift in ["A", "B", "C"]:
-                ts = base + timedelta(days=d, hours=random.choice([0, 8, 16]))
-                rows.append(
-                    {
-                        "timestamp": ts.isoformat(),
-                        "machine_id": machine,
-                        "operator_id": f"OP-{random.randint(1,20):02d}",
-                        "shift": shift,
-                        "downtime": max(0, random.gauss(45, 18) + (40 if random.random() < 0.03 else 0)),
-                        "scrap": max(0, random.gauss(25, 10) + (35 if random.random() < 0.04 else 0)),
-                        "output": max(10, random.gauss(500, 60) - (80 if random.random() < 0.03 else 0)),
-                    }
-                )
-    return pd.DataFrame(rows)
+def generate_data(
+    days: int = 180,
+    machines: int = 4,
+    shifts: tuple[str, ...] = ("A", "B", "C"),
+    operators: int = 20,
+    seed: int | None = None,
+    end: datetime | None = None,
+    downtime_anomaly_rate: float = 0.03,
+    scrap_anomaly_rate: float = 0.04,
+    output_anomaly_rate: float = 0.03,
+) -> pd.DataFrame:
+    """Synthetic shift records, one per machine, day and shift, in day, machine, shift order."""
+    rng = np.random.default_rng(seed)
+    base = (end or datetime.utcnow()) - timedelta(days=days)
+    shape = (days, machines, len(shifts))
+    hours = rng.choice([0, 8, 16], size=shape)
+    timestamps = (
+        np.datetime64(base, "us")
+        + np.arange(days).reshape(-1, 1, 1) * np.timedelta64(1, "D")
+        + hours * np.timedelta64(1, "h")
+    )
+    codes = np.array([f"M-{100 * (m + 1)}" for m in range(machines)], dtype=object)
+    operator_codes = np.array([f"OP-{o:02d}" for o in range(1, operators + 1)], dtype=object)
+    downtime = rng.normal(45, 18, shape) + 40 * (rng.random(shape) < downtime_anomaly_rate)
+    scrap = rng.normal(25, 10, shape) + 35 * (rng.random(shape) < scrap_anomaly_rate)
+    output = rng.normal(500, 60, shape) - 80 * (rng.random(shape) < output_anomaly_rate)
+    return pd.DataFrame(
+        {
+            "timestamp": np.datetime_as_string(timestamps.ravel(), unit="us"),
+            "machine_id": np.broadcast_to(codes[None, :, None], shape).ravel(),
+            "operator_id": operator_codes[rng.integers(0, operators, shape)].ravel(),
+            "shift": np.broadcast_to(np.array(shifts, dtype=object)[None, None, :], shape).ravel(),
+            "downtime": np.maximum(0.0, downtime).ravel(),
+            "scrap": np.maximum(0.0, scrap).ravel(),
+            "output": np.maximum(10.0, output).ravel(),
+        }
+    )
+
+
+def generate_daily_frame(
+    machines: int = 4,
+    days: int = 121,
+    seed: int = 0,
+    end: date | None = None,
+    anomaly_rate: float = 0.03,
+) -> MachineDailyFrame:
+    """Seeded machine-day fleet with the same per-shift distributions as generate_data."""
+    rng = np.random.default_rng(seed)
+    end = end or date.today()
+    shape = (machines, days, 3)
+    downtime = np.maximum(
+        0.0, rng.normal(45, 18, shape) + 40 * (rng.random(shape) < anomaly_rate)
+    ).sum(axis=2)
+    scrap = np.maximum(
+        0.0, rng.normal(25, 10, shape) + 35 * (rng.random(shape) < anomaly_rate)
+    ).sum(axis=2)
+    output = np.maximum(
+        10.0, rng.normal(500, 60, shape) - 80 * (rng.random(shape) < anomaly_rate)
+    ).sum(axis=2)
+    ordinals = np.arange(end.toordinal() - days + 1, end.toordinal() + 1, dtype=np.int32)
+    return MachineDailyFrame.from_sorted(
+        machine_ids=[f"M-{100 * (m + 1)}" for m in range(machines)],
+        machine_index=np.repeat(np.arange(machines, dtype=np.int32), days),
+        date_ordinal=np.tile(ordinals, machines),
+        downtime_minutes=downtime.ravel(),
+        scrap_units=scrap.ravel(),
+        output_units=output.ravel(),
+        scrap_percent=(scrap * 100.0 / (scrap + output)).ravel(),
+    )
 
 
 def seed() -> None:
@@ -1,11 +1,16 @@
 import time
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from pathlib import Path
 
+import structlog
 from sqlalchemy import text
 
+from app.application.use_cases import AnalyticsUseCase
 from app.config import get_settings
-from app.infrastructure.db.session import engine
+from app.infrastructure.db.session import SessionLocal, engine
+from app.infrastructure.repositories.analytics_repository import AnalyticsRepository
+
+logger = structlog.get_logger(__name__)
 
 
 def write_heartbeat(path: Path) -> None:
@@ -13,16 +18,44 @@ def write_heartbeat(path: Path) -> None:
     path.write_text(datetime.now(timezone.utc).isoformat(), encoding="utf-8")
 
 
+def precompute_predictive_results(last_key: tuple[date, int] | None) -> tuple[date, int]:
+    """Refreshes stored predictive results when the date or the data generation changes."""
+    with SessionLocal() as db:
+        use_case = AnalyticsUseCase(AnalyticsRepository(db))
+        key = (date.today(), use_case.repo.data_generation())
+        if key == last_key:
+            return key
+        use_case.load_latest_model()
+        as_of_dates = {key[0]}
+        latest_report_date = use_case.repo.latest_report_date()
+        if latest_report_date is not None:
+            as_of_dates.add(latest_report_date)
+        for as_of_date in sorted(as_of_dates):
+            use_case.refresh_predictive_results(as_of_date)
+        if latest_report_date is not None:
+            mismatched = use_case.feature_state_mismatches(latest_report_date)
+            if mismatched:
+                logger.warning(
+                    "feature_state_mismatch",
+                    as_of_date=latest_report_date.isoformat(),
+                    machines=mismatched,
+                )
+    return key
+
+
 def run_worker() -> None:
     settings = get_settings()
     heartbeat = Path(settings.worker_heartbeat_file)
     last_analytics = 0.0
+    last_predictive_key: tuple[date, int] | None = None
+    AnalyticsUseCase.start_fleet_executor()
 
     while True:
         try:
             with engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
             write_heartbeat(heartbeat)
+            last_predictive_key = precompute_predictive_results(last_predictive_key)
             now = time.time()
             if now - last_analytics >= settings.worker_analytics_interval_seconds:
                 # Placeholder for periodic analytics jobs in OT-safe mode.
@@ -0,0 +1,166 @@
+"""Timings for the predictive engine on seeded synthetic fleets.
+
+Run from ``backend/``: ``python -m benchmarks.bench_engine``
+"""
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from datetime import date, timedelta
+from functools import partial
+
+from app.application.fleet_executor import FleetExecutor
+from app.application.predictive_engine import (
+    LogisticRegressionLite,
+    PredictiveIntelligenceEngine,
+    TrainingData,
+)
+from app.seed import generate_daily_frame
+
+
+def best_of(fn: Callable[[], object], repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_health_scores(machines: int = 5000, days: int = 121) -> float:
+    frame = generate_daily_frame(machines=machines, days=days, seed=1)
+    engine = PredictiveIntelligenceEngine()
+    return best_of(lambda: engine.machine_health_scores(frame, [], date.today()))
+
+
+def bench_detect_drift(machines: int = 1000, window_days: int = 30, method: str = "split") -> float:
+    frame = generate_daily_frame(machines=machines, days=window_days + 60, seed=2)
+    engine_cls = type(
+        "WindowedEngine",
+        (PredictiveIntelligenceEngine,),
+        {"CHANGE_POINT_WINDOW_DAYS": window_days, "DRIFT_BASELINE_DAYS": window_days},
+    )
+    engine = engine_cls()
+    return best_of(lambda: engine.detect_drift(frame, method=method))
+
+
+def _train(training: TrainingData, solver: str) -> PredictiveIntelligenceEngine:
+    engine = PredictiveIntelligenceEngine(solver=solver)
+    engine.train(training, date.today())
+    return engine
+
+
+def bench_train(
+    solver: str, seeds: tuple[int, ...] = (0, 1, 2), machines: int = 50
+) -> tuple[float, float]:
+    """Mean train() time and mean fine-tuned training loss over seeded fleets."""
+    timings = []
+    losses = []
+    for seed in seeds:
+        frame = generate_daily_frame(machines=machines, days=121, seed=seed)
+        training = PredictiveIntelligenceEngine().build_training_data(frame)
+        train = partial(_train, training, solver)
+        timings.append(best_of(train, repeat=3))
+        engine = train()
+        scaled = engine._standardize(training.X, engine.feature_mean, engine.feature_std)
+        losses.append(engine.model.loss(scaled, training.y))
+    return sum(timings) / len(timings), sum(losses) / len(losses)
+
+
+def bench_daily_retrain(machines: int = 500, incremental: bool = True) -> float:
+    """Cost of retraining for the next day after a full fit on the previous one."""
+    frame = generate_daily_frame(machines=machines, days=121, seed=4)
+    today = frame.date_at(frame.n_rows - 1)
+    engine = PredictiveIntelligenceEngine()
+    engine.train(engine.build_training_data(frame), today - timedelta(days=1))
+    snapshot = (engine.model.weights.copy(), engine.model.bias, engine.last_trained_on)
+
+    def retrain() -> None:
+        engine.model.weights, engine.model.bias, engine.last_trained_on = (
+            snapshot[0].copy(),
+            *snapshot[1:],
+        )
+        engine.last_full_refit_on = engine.last_trained_on
+        cutoff = engine.incremental_cutoff(today) if incremental else None
+        engine.train(engine.build_training_data(frame, closed_after=cutoff), today)
+
+    return best_of(retrain, repeat=3)
+
+
+def bench_health_trend(days: int = 90, per_date: bool = False) -> float:
+    """One machine's trend over ``days`` dates, in one pass or by scoring each date."""
+    frame = generate_daily_frame(machines=1, days=days + 120, seed=5)
+    machine_id = frame.machine_ids[0]
+    end = frame.date_at(frame.n_rows - 1)
+    start = end - timedelta(days=days - 1)
+    engine = PredictiveIntelligenceEngine()
+    if not per_date:
+        return best_of(lambda: engine.machine_health_trend(frame, machine_id, start, end))
+
+    rows = [
+        {
+            "date": frame.date_at(i),
+            "machine_id": machine_id,
+            "downtime_minutes": frame.downtime_minutes[i],
+            "scrap_units": frame.scrap_units[i],
+            "output_units": frame.output_units[i],
+            "scrap_percent": frame.scrap_percent[i],
+        }
+        for i in range(frame.n_rows)
+    ]
+
+    def score_each_date() -> None:
+        for offset in range(days):
+            as_of = start + timedelta(days=offset)
+            window = [r for r in rows if as_of - timedelta(days=120) <= r["date"] <= as_of]
+            engine.machine_health_scores(window, [], as_of)
+
+    return best_of(score_each_date, repeat=3)
+
+
+def bench_parallel_stages(machines: int = 3000, workers: int = 1) -> dict[str, float]:
+    """Training data generation, the one sharded stage, on one fleet over ``workers``."""
+    frame = generate_daily_frame(machines=machines, days=121, seed=6)
+    executor = FleetExecutor(max_workers=workers, min_machines=1) if workers > 1 else None
+    engine = PredictiveIntelligenceEngine(executor=executor)
+    try:
+        engine.build_training_data(frame)  # start the pool outside the timings
+        return {"training_data": best_of(lambda: engine.build_training_data(frame), repeat=3)}
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def main() -> None:
+    for machines in (100, 1000, 5000):
+        elapsed = bench_health_scores(machines=machines)
+        print(f"machine_health_scores machines={machines}: {elapsed * 1000:.1f} ms")
+    for method in ("split", "cusum"):
+        for window_days in (30, 90, 365):
+            elapsed = bench_detect_drift(window_days=window_days, method=method)
+            print(
+                f"detect_drift method={method} window_days={window_days}: {elapsed * 1000:.1f} ms"
+            )
+    for solver in LogisticRegressionLite.SOLVERS:
+        elapsed, loss = bench_train(solver)
+        print(f"train solver={solver}: {elapsed * 1000:.1f} ms, loss={loss:.5f}")
+    for incremental in (False, True):
+        elapsed = bench_daily_retrain(incremental=incremental)
+        print(f"daily retrain incremental={incremental}: {elapsed * 1000:.1f} ms")
+    for days in (1, 90):
+        elapsed = bench_health_trend(days=days)
+        print(f"health trend days={days}: {elapsed * 1000:.2f} ms")
+    elapsed = bench_health_trend(days=90, per_date=True)
+    print(f"health trend days=90 scored per date: {elapsed * 1000:.1f} ms")
+    serial = bench_parallel_stages(workers=1)
+    for workers in (1, 2, 4, 8, 16):
+        timings = serial if workers == 1 else bench_parallel_stages(workers=workers)
+        summary = ", ".join(
+            f"{stage}={elapsed * 1000:.1f} ms (x{serial[stage] / elapsed:.2f})"
+            for stage, elapsed in timings.items()
+        )
+        print(f"parallel stages machines=3000 workers={workers}: {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Timings for bulk ingest and the aggregate queries on a throwaway SQLite database.
+
+Run from ``backend/``: ``python -m benchmarks.bench_repositories``
+"""
+from __future__ import annotations
+
+import tempfile
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.infrastructure.db.base import Base
+from app.infrastructure.repositories.analytics_repository import AnalyticsRepository
+from app.infrastructure.repositories.ingest_repository import IngestRepository
+from app.seed import generate_data
+from benchmarks.bench_engine import best_of
+
+
+@contextmanager
+def sqlite_session() -> Iterator[Session]:
+    """Session on a fresh file-backed SQLite database that is deleted afterwards."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite+pysqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine, autoflush=False)()
+        try:
+            yield db
+        finally:
+            db.close()
+            engine.dispose()
+
+
+def bench_repositories(
+    machines: int = 20, days: int = 90, seed: int = 7, repeat: int = 3
+) -> dict[str, float]:
+    """Ingest one generated upload and rebuild aggregates, then time the read queries on it.
+
+    The write path runs ``repeat`` times on fresh databases and keeps the fastest run.
+    """
+    end = datetime.combine(date.today(), datetime.min.time())
+    df = generate_data(days=days, machines=machines, seed=seed, end=end)
+    start_date, end_date = (end - timedelta(days=days)).date(), end.date()
+    timings: dict[str, float] = {"ingest": float("inf"), "recompute_daily_aggregates": float("inf")}
+    for attempt in range(repeat):
+        with sqlite_session() as db:
+            repo = AnalyticsRepository(db)
+            started = time.perf_counter()
+            IngestRepository(db).ingest_dataframe("bench.csv", df)
+            timings["ingest"] = min(timings["ingest"], time.perf_counter() - started)
+
+            started = time.perf_counter()
+            repo.recompute_daily_aggregates()
+            timings["recompute_daily_aggregates"] = min(
+                timings["recompute_daily_aggregates"], time.perf_counter() - started
+            )
+            if attempt < repeat - 1:
+                continue
+
+            timings.update(_query_timings(repo, start_date, end_date))
+    return timings
+
+
+def _query_timings(repo: AnalyticsRepository, start_date: date, end_date: date) -> dict[str, float]:
+    return {
+        "overview": best_of(lambda: repo.get_overview(end_date - timedelta(days=1))),
+        "overview_range_30d": best_of(
+            lambda: repo.get_overview_range(end_date - timedelta(days=30), end_date)
+        ),
+        "machine_timeseries": best_of(lambda: repo.get_machine_timeseries(start_date, end_date)),
+        "shift_aggregates": best_of(lambda: repo.get_shift_aggregates(start_date, end_date)),
+        "day_aggregates": best_of(lambda: repo.get_day_aggregates(start_date, end_date)),
+        "machine_daily_metrics": best_of(
+            lambda: repo.get_machine_daily_metrics(start_date, end_date)
+        ),
+    }
+
+
+def main() -> None:
+    for machines in (4, 20):
+        timings = bench_repositories(machines=machines)
+        summary = ", ".join(f"{name}={elapsed * 1000:.1f} ms" for name, elapsed in timings.items())
+        print(f"repositories machines={machines} days=90: {summary}")
+
+
+if __name__ == "__main__":
+    main()
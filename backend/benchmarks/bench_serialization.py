@@ -0,0 +1,87 @@
+"""Response encoding for a large DTO list: ``response_model`` against ``dto_list_response``.
+
+Run from ``backend/``: ``python -m benchmarks.bench_serialization``
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.api.responses import dto_list_response
+from app.application.dtos import MachineTimeseriesPointDTO
+from benchmarks.bench_engine import best_of
+
+PATHS = ("jsonable-encoder", "response-model", "rows", "columns")
+
+
+def timeseries_points(machines: int, days: int) -> list[MachineTimeseriesPointDTO]:
+    start = date(2025, 1, 1)
+    return [
+        MachineTimeseriesPointDTO(
+            date=start + timedelta(days=day),
+            machine_id=f"M-{machine:04d}",
+            downtime_minutes=round(12.5 + (day * 7 + machine) % 40, 2),
+            throughput_units=round(480.0 + (day * 13 + machine) % 90, 2),
+            scrap_percent=round(1.0 + (day + machine * 3) % 7 / 3, 2),
+        )
+        for day in range(days)
+        for machine in range(machines)
+    ]
+
+
+def bench_serialization(machines: int = 50, days: int = 365, repeat: int = 3) -> dict[str, float]:
+    """Full GET round trips through an in-process app that returns the same prebuilt list four ways.
+
+    ``jsonable-encoder`` is how FastAPI releases before the pydantic-core
+    ``response_model`` serializer encode the list; recent releases match ``rows``.
+    """
+    points = timeseries_points(machines, days)
+    app = FastAPI()
+
+    @app.get("/jsonable-encoder")
+    def jsonable_encoder_path():
+        return JSONResponse(jsonable_encoder(points))
+
+    @app.get("/response-model", response_model=list[MachineTimeseriesPointDTO])
+    def response_model_path():
+        return points
+
+    @app.get("/rows")
+    def rows_path():
+        return dto_list_response(points, MachineTimeseriesPointDTO, "rows")
+
+    @app.get("/columns")
+    def columns_path():
+        return dto_list_response(points, MachineTimeseriesPointDTO, "columns")
+
+    client = TestClient(app)
+    assert client.get("/response-model").content == client.get("/rows").content
+    timings = {
+        f"{path}": best_of(lambda path=path: client.get(f"/{path}"), repeat=repeat)
+        for path in PATHS
+    }
+    timings["rows_bytes"] = float(len(client.get("/rows").content))
+    timings["columns_bytes"] = float(len(client.get("/columns").content))
+    return timings
+
+
+def main() -> None:
+    timings = bench_serialization()
+    base = timings["jsonable-encoder"]
+    for path in PATHS:
+        print(
+            f"serialization {path:<17} {timings[path] * 1000:8.1f} ms "
+            f" (x{base / timings[path]:.1f})"
+        )
+    print(
+        f"payload rows={timings['rows_bytes'] / 1e6:.2f} MB "
+        f"columns={timings['columns_bytes'] / 1e6:.2f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
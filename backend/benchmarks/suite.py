@@ -0,0 +1,218 @@
+"""Benchmark suite with JSON output and comparison against a baseline run.
+
+Run from ``backend/``::
+
+    python -m benchmarks.suite --json baseline.json
+    python -m benchmarks.suite --baseline baseline.json --tolerance 0.25
+
+Exits with status 1 when any benchmark is slower than the baseline by more
+than the tolerance.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+
+import numpy as np
+
+from app.application.predictive_engine import PredictiveIntelligenceEngine
+from app.domain.columnar import MachineDailyFrame
+from app.domain.feature_state import MachineFeatureState
+from app.domain.forecasting import holt_forecast, naive_trend_forecast, trailing_matrix
+from app.domain.services import detect_zscore_anomalies
+from app.seed import generate_daily_frame
+from benchmarks.bench_engine import best_of
+from benchmarks.bench_repositories import bench_repositories
+from benchmarks.bench_serialization import PATHS, bench_serialization
+
+SCALES: dict[str, dict[str, int]] = {
+    "quick": {
+        "machines": 200,
+        "days": 121,
+        "db_machines": 4,
+        "db_days": 60,
+        "json_machines": 20,
+        "repeat": 3,
+    },
+    "full": {
+        "machines": 2000,
+        "days": 121,
+        "db_machines": 20,
+        "db_days": 90,
+        "json_machines": 200,
+        "repeat": 5,
+    },
+}
+
+
+@dataclass(frozen=True)
+class Comparison:
+    name: str
+    baseline_seconds: float
+    current_seconds: float
+    ratio: float
+    regressed: bool
+
+
+def _daily_rows(frame: MachineDailyFrame) -> list[dict]:
+    """Frame rows in the dict shape ``detect_anomalies`` feeds to the z-score detector."""
+    dates = [date.fromordinal(int(d)) for d in frame.date_ordinal]
+    machine_ids = [frame.machine_ids[i] for i in frame.machine_index]
+    return [
+        {"report_date": d, "machine_id": m, "downtime": downtime, "scrap": scrap, "output": output}
+        for d, m, downtime, scrap, output in zip(
+            dates,
+            machine_ids,
+            frame.downtime_minutes.tolist(),
+            frame.scrap_units.tolist(),
+            frame.output_units.tolist(),
+            strict=True,
+        )
+    ]
+
+
+def _feature_states(
+    frame: MachineDailyFrame, rolling_days: int, as_of: date
+) -> dict[str, MachineFeatureState]:
+    states = {}
+    for machine, machine_id in enumerate(frame.machine_ids):
+        rows = frame.machine_slice(machine)
+        days = [
+            (date.fromordinal(int(d)), float(downtime), float(scrap), float(output))
+            for d, downtime, scrap, output in zip(
+                frame.date_ordinal[rows],
+                frame.downtime_minutes[rows],
+                frame.scrap_units[rows],
+                frame.output_units[rows],
+                strict=True,
+            )
+        ]
+        states[machine_id] = MachineFeatureState.build(
+            days, window_days=120, rolling_days=rolling_days, window_end=as_of
+        )
+    return states
+
+
+def engine_benchmarks(machines: int, days: int, repeat: int) -> dict[str, float]:
+    frame = generate_daily_frame(machines=machines, days=days, seed=11)
+    as_of = frame.date_at(frame.n_rows - 1)
+    engine = PredictiveIntelligenceEngine()
+    training = engine.build_training_data(frame)
+    rows = _daily_rows(frame)
+    states = _feature_states(frame, engine.ROLLING_WINDOW_DAYS, as_of)
+    history, counts = trailing_matrix(frame, frame.output_units, 56)
+
+    cases: dict[str, Callable[[], object]] = {
+        "engine.machine_health_scores": lambda: engine.machine_health_scores(frame, [], as_of),
+        "engine.machine_health_scores_from_state": lambda: engine.machine_health_scores_from_state(
+            states, [], as_of
+        ),
+        "engine.build_training_data": lambda: engine.build_training_data(frame),
+        "engine.train": lambda: PredictiveIntelligenceEngine().train(training, as_of),
+        "engine.detect_drift.split": lambda: engine.detect_drift(frame, method="split"),
+        "engine.detect_drift.cusum": lambda: engine.detect_drift(frame, method="cusum"),
+        "domain.naive_trend_forecast": lambda: naive_trend_forecast(history, counts, 7),
+        "domain.holt_forecast": lambda: holt_forecast(history, counts, 7),
+        "domain.detect_zscore_anomalies": lambda: (
+            detect_zscore_anomalies(rows, "downtime") + detect_zscore_anomalies(rows, "scrap")
+        ),
+    }
+    return {name: best_of(fn, repeat=repeat) for name, fn in cases.items()}
+
+
+def run_suite(scale: str = "quick") -> dict:
+    params = SCALES[scale]
+    results = engine_benchmarks(params["machines"], params["days"], params["repeat"])
+    repository = bench_repositories(
+        machines=params["db_machines"], days=params["db_days"], repeat=params["repeat"]
+    )
+    results.update({f"sqlite.{name}": elapsed for name, elapsed in repository.items()})
+    serialization = bench_serialization(
+        machines=params["json_machines"], days=365, repeat=params["repeat"]
+    )
+    results.update({f"serialization.{path}": serialization[path] for path in PATHS})
+    return {
+        "meta": {
+            "scale": scale,
+            "params": params,
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.25) -> list[Comparison]:
+    """Benchmarks in both runs; ``regressed`` when slower than baseline by over ``tolerance``."""
+    comparisons = []
+    for name, seconds in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = seconds / base if base > 0 else float("inf")
+        comparisons.append(
+            Comparison(
+                name=name,
+                baseline_seconds=base,
+                current_seconds=seconds,
+                ratio=round(ratio, 3),
+                regressed=ratio > 1.0 + tolerance,
+            )
+        )
+    return comparisons
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="quick")
+    parser.add_argument("--json", dest="json_path", help="Write this run's results to this file")
+    parser.add_argument("--baseline", help="Results file from an earlier run to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="Allowed slowdown as a fraction"
+    )
+    args = parser.parse_args(argv)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        if baseline["meta"]["scale"] != args.scale:
+            parser.error(
+                f"baseline was recorded at scale {baseline['meta']['scale']!r}, not {args.scale!r}"
+            )
+
+    report = run_suite(args.scale)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+    if not args.baseline:
+        for name, seconds in report["results"].items():
+            print(f"{name:<40} {seconds * 1000:10.2f} ms")
+        return 0
+
+    comparisons = compare(report, baseline, args.tolerance)
+    for c in comparisons:
+        flag = "REGRESSED" if c.regressed else ""
+        print(
+            f"{c.name:<40} {c.baseline_seconds * 1000:10.2f} ms "
+            f"-> {c.current_seconds * 1000:10.2f} ms "
+            f"(x{c.ratio:.2f}) {flag}".rstrip()
+        )
+    if args.json_path:
+        report["comparison"] = [asdict(c) for c in comparisons]
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    return 1 if any(c.regressed for c in comparisons) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,11 +10,14 @@ from sqlalchemy.orm import sessionmaker
 from app.infrastructure.db.base import Base
 from app.infrastructure.db.session import get_db
 from app.infrastructure.db.models import User
-from app.infrastructure.db.session import get_db
+from app.infrastructure.db.session import get_db, query_log
+from app.infrastructure.metrics.request_stats import instrument_engine
 from app.infrastructure.security.auth import get_password_hash
 from app.main import app
 
 engine = create_engine("sqlite+pysqlite:///./test.db", connect_args={"check_same_thread": False})
+instrument_engine(engine)
+query_log.install(engine)
 TestingSessionLocal = sessionmaker(bind=engine)
 Base.metadata.drop_all(bind=engine)
 Base.metadata.create_all(bind=engine)
@@ -1,6 +1,23 @@
+from datetime import date, datetime
 from pathlib import Path
 
-from app.infrastructure.db.models import DailyAggregate, Dataset, ProductionRecord
+import pytest
+
+from app.application.predictive_engine import PredictiveIntelligenceEngine
+from app.application.use_cases import AnalyticsUseCase
+from app.domain.feature_state import MachineFeatureState
+from app.domain.quantile_sketch import LabelWindowSketch
+from app.infrastructure.db.models import (
+    DailyAggregate,
+    Dataset,
+    Machine,
+    MachineRiskResult,
+    ModelArtifact,
+    PredictiveRun,
+    ProductionRecord,
+)
+from app.infrastructure.repositories.analytics_repository import AnalyticsRepository
+from app.seed import generate_data
 
 from .conftest import TestingSessionLocal, client
 
@@ -94,3 +111,667 @@ def test_risk_panel_and_monitoring_endpoints():
     assert "brier_score" in monitor
     assert "tracked_drift_machines" in monitor
     assert monitor["last_trained_on"] == "2026-01-10"
+
+
+def test_trained_model_is_persisted_and_reused_by_a_fresh_engine():
+    reset_ingest_tables()
+    db = TestingSessionLocal()
+    db.query(ModelArtifact).delete()
+    db.commit()
+    upload_sample_csv("sample_shift_a.csv")
+    AnalyticsUseCase.invalidate_predictive_cache()
+
+    first = client.get("/risk/failure-probabilities", params={"date": "2026-01-11"})
+    assert first.status_code == 200
+    artifact = db.query(ModelArtifact).order_by(ModelArtifact.version.desc()).first()
+    assert artifact is not None
+    assert artifact.trained_on.isoformat() == "2026-01-11"
+    assert len(artifact.weights_json) == 4
+
+    db.query(MachineRiskResult).delete()
+    db.query(PredictiveRun).delete()
+    db.commit()
+    AnalyticsUseCase._predictive_engine = PredictiveIntelligenceEngine()
+    AnalyticsUseCase.invalidate_predictive_cache()
+    assert AnalyticsUseCase(AnalyticsRepository(db)).load_latest_model() == artifact.version
+    second = client.get("/risk/failure-probabilities", params={"date": "2026-01-11"})
+    db.close()
+
+    assert second.json() == first.json()
+    assert AnalyticsUseCase._predictive_engine.model_version == artifact.version
+
+
+def test_risk_endpoints_serve_results_precomputed_by_the_worker():
+    reset_ingest_tables()
+    upload_sample_csv("sample_shift_a.csv")
+    db = TestingSessionLocal()
+    use_case = AnalyticsUseCase(AnalyticsRepository(db))
+    as_of = date(2026, 1, 12)
+    assert use_case.refresh_predictive_results(as_of)
+    assert not use_case.refresh_predictive_results(as_of)
+    db.close()
+
+    AnalyticsUseCase._predictive_engine = PredictiveIntelligenceEngine()
+    AnalyticsUseCase.invalidate_predictive_cache()
+    resp = client.get("/risk/panel", params={"date": as_of.isoformat()})
+    assert resp.status_code == 200
+    assert resp.json()["top_risk_machines"]
+    assert AnalyticsUseCase._predictive_engine.last_trained_on is None
+
+    upload_sample_csv("sample_shift_a.csv")
+    db = TestingSessionLocal()
+    assert AnalyticsUseCase(AnalyticsRepository(db)).refresh_predictive_results(as_of)
+    assert db.query(PredictiveRun).filter(PredictiveRun.as_of_date == as_of).count() == 1
+    db.close()
+
+
+def test_stored_predictive_runs_are_pruned_to_the_most_recent(monkeypatch):
+    from app.config import get_settings
+
+    reset_ingest_tables()
+    upload_sample_csv("sample_shift_a.csv")
+    monkeypatch.setattr(get_settings(), "predictive_keep_runs", 2)
+    db = TestingSessionLocal()
+    db.query(MachineRiskResult).delete()
+    db.query(PredictiveRun).delete()
+    db.commit()
+    use_case = AnalyticsUseCase(AnalyticsRepository(db))
+    for day in (10, 11, 12):
+        assert use_case.refresh_predictive_results(date(2026, 1, day))
+
+    runs = db.query(PredictiveRun).all()
+    assert sorted(run.as_of_date.day for run in runs) == [11, 12]
+    assert {result.run_id for result in db.query(MachineRiskResult)} == {run.id for run in runs}
+    db.close()
+
+
+def test_risk_dashboard_bundles_the_individual_risk_views():
+    reset_ingest_tables()
+    upload_sample_csv("sample_shift_a.csv")
+    params = {"date": "2026-01-10"}
+
+    full = client.get("/risk/dashboard", params=params)
+    assert full.status_code == 200
+    body = full.json()
+    assert body["health_scores"] == client.get("/risk/health-scores", params=params).json()
+    assert (
+        body["failure_probabilities"]
+        == client.get("/risk/failure-probabilities", params=params).json()
+    )
+    assert body["drift_signals"] == client.get("/risk/drift-signals", params=params).json()
+    assert body["recommendations"] == client.get("/risk/recommendations", params=params).json()
+    assert body["panel"] == client.get("/risk/panel", params=params).json()
+    assert body["model_monitoring"] == client.get("/risk/model-monitoring", params=params).json()
+
+    partial = client.get(
+        "/risk/dashboard", params={**params, "sections": "panel, model_monitoring"}
+    ).json()
+    assert partial["panel"] == body["panel"]
+    assert partial["health_scores"] is None
+
+    bad = client.get("/risk/dashboard", params={**params, "sections": "panel,forecast"})
+    assert bad.status_code == 400
+
+
+def test_risk_trend_scores_each_date_in_range_for_one_machine():
+    reset_ingest_tables()
+    upload_sample_csv("sample_shift_a.csv")
+
+    resp = client.get(
+        "/risk/trend", params={"machine_id": "M-100", "from": "2026-01-08", "to": "2026-01-11"}
+    )
+    assert resp.status_code == 200
+    points = resp.json()
+    assert [p["date"] for p in points] == ["2026-01-10", "2026-01-11"]
+    health = client.get("/risk/health-scores", params={"date": "2026-01-10"}).json()
+    expected = next(h for h in health if h["machine_id"] == "M-100")
+    assert points[0]["health_score"] == expected["health_score"]
+    assert 0.0 <= points[0]["failure_probability_next_7_days"] <= 1.0
+
+    reversed_range = client.get(
+        "/risk/trend", params={"machine_id": "M-100", "from": "2026-01-11", "to": "2026-01-08"}
+    )
+    assert reversed_range.status_code == 400
+
+
+def test_upload_maintains_label_threshold_sketches_per_machine():
+    reset_ingest_tables()
+    upload_sample_csv("sample_shift_a.csv")
+    db = TestingSessionLocal()
+    repo = AnalyticsRepository(db)
+
+    thresholds = repo.get_label_thresholds(date(2026, 1, 10), window_days=120)
+    daily = {
+        row["machine_id"]: row
+        for row in repo.get_machine_timeseries(date(2026, 1, 10), date(2026, 1, 10))
+    }
+    assert set(thresholds) == set(daily)
+    for machine_id, (downtime_p85, _) in thresholds.items():
+        assert downtime_p85 == pytest.approx(daily[machine_id]["downtime_minutes"], rel=0.01)
+    assert repo.get_label_thresholds(date(2026, 1, 11), window_days=120) == {}
+    db.close()
+
+
+def upload_dataframe(name: str, df) -> None:
+    token = get_token()
+    response = client.post(
+        "/datasets/upload",
+        files={"file": (name, df.to_csv(index=False).encode(), "text/csv")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+
+
+def test_upload_advances_feature_states_consistently_with_a_full_recompute(monkeypatch):
+    reset_ingest_tables()
+    df = generate_data(days=40, machines=3, seed=5, end=datetime(2026, 3, 1))
+    df = df[df["timestamp"].str[:10] != "2026-02-10"]
+    dates = df["timestamp"].str[:10]
+    upload_dataframe("first.csv", df[dates < "2026-02-05"])
+    db = TestingSessionLocal()
+    first_rows = {row.id for row in db.query(DailyAggregate)}
+    db.close()
+    slid: list[date] = []
+    real_slide_to = MachineFeatureState.slide_to
+
+    def recording_slide_to(self, days, window_end):
+        slid.extend(days)
+        real_slide_to(self, days, window_end)
+
+    monkeypatch.setattr(MachineFeatureState, "slide_to", recording_slide_to)
+    upload_dataframe("second.csv", df[dates >= "2026-02-05"])
+    assert min(slid) == date(2026, 2, 5)
+    db = TestingSessionLocal()
+    kept = db.query(DailyAggregate).filter(DailyAggregate.report_date < date(2026, 2, 5))
+    assert {row.id for row in kept} == first_rows
+    db.close()
+
+    db = TestingSessionLocal()
+    use_case = AnalyticsUseCase(AnalyticsRepository(db))
+    states = use_case.repo.get_feature_states(AnalyticsUseCase.PREDICTIVE_HISTORY_DAYS)
+    assert {state.window_end for state in states.values()} == {date(2026, 2, 28)}
+    assert use_case.feature_state_mismatches(date(2026, 2, 28)) == []
+    assert use_case.feature_state_mismatches(date(2026, 3, 15)) == []
+    db.close()
+
+    AnalyticsUseCase.invalidate_predictive_cache()
+    health = client.get("/risk/health-scores", params={"date": "2026-02-28"}).json()
+    assert {row["machine_id"] for row in health} == set(states)
+
+
+def test_incremental_recompute_matches_a_full_rebuild_after_overlapping_uploads():
+    reset_ingest_tables()
+    df = generate_data(days=30, machines=3, seed=6, end=datetime(2026, 3, 1))
+    dates = df["timestamp"].str[:10]
+    upload_dataframe("first.csv", df[dates < "2026-02-15"])
+    upload_dataframe("overlap.csv", df[(dates >= "2026-02-10") & (dates < "2026-02-20")])
+    upload_dataframe("tail.csv", df[dates >= "2026-02-20"])
+
+    def snapshot(db):
+        aggregates = sorted(
+            (a.report_date, a.machine_code, a.shift, a.downtime_minutes, a.scrap_units)
+            for a in db.query(DailyAggregate)
+        )
+        machines = {
+            m.machine_code: (m.label_sketch_json, m.feature_state_json)
+            for m in db.query(Machine)
+            if m.feature_state_json
+        }
+        return aggregates, machines
+
+    db = TestingSessionLocal()
+    incremental = snapshot(db)
+    AnalyticsRepository(db).recompute_daily_aggregates(full=True)
+    aggregates, machines = snapshot(db)
+    db.close()
+    assert incremental[0] == aggregates
+    assert incremental[1].keys() == machines.keys()
+    for code, (sketch, state) in machines.items():
+        assert incremental[1][code][0] == sketch
+        slid = MachineFeatureState.from_dict(incremental[1][code][1])
+        built = MachineFeatureState.from_dict(state)
+        assert (slid.window_end, slid.count, slid.recent) == (
+            built.window_end,
+            built.count,
+            built.recent,
+        )
+        assert slid.mean == pytest.approx(built.mean)
+        assert slid.m2 == pytest.approx(built.m2)
+
+
+def test_batch_forecast_covers_selected_machines_and_validates_inputs():
+    reset_ingest_tables()
+    upload_dataframe(
+        "fleet.csv", generate_data(days=20, machines=4, seed=8, end=datetime(2026, 3, 1))
+    )
+
+    resp = client.get("/forecasts/batch", params={"horizon_days": 3, "history_days": 14})
+    assert resp.status_code == 200
+    rows = resp.json()
+    assert {(r["machine_id"], r["metric"]) for r in rows} == {
+        (m, metric)
+        for m in ("M-100", "M-200", "M-300", "M-400")
+        for metric in ("downtime", "output")
+    }
+    assert all(
+        len(r["values"]) == 3 and r["history_points"] == 14 and r["method"] == "holt" for r in rows
+    )
+    assert (
+        client.get("/forecasts/batch", params={"horizon_days": 3, "history_days": 14}).json()
+        == rows
+    )
+
+    naive = client.get(
+        "/forecasts/batch", params={"machine_ids": "M-200, M-400", "method": "naive"}
+    ).json()
+    assert {r["machine_id"] for r in naive} == {"M-200", "M-400"}
+    assert client.get("/forecasts/batch", params={"method": "arima"}).status_code == 400
+
+
+def test_overview_range_matches_single_date_overviews():
+    reset_ingest_tables()
+    upload_dataframe(
+        "fleet.csv", generate_data(days=10, machines=3, seed=2, end=datetime(2026, 3, 1))
+    )
+
+    resp = client.get("/kpi/overview/range", params={"from": "2026-02-17", "to": "2026-03-02"})
+    assert resp.status_code == 200
+    days = resp.json()
+    assert len(days) == 14
+    for day in days:
+        assert client.get("/kpi/overview", params={"date": day["date"]}).json() == day
+    assert days[-1]["throughput_units"] == 0.0 and days[-1]["oee_proxy"] == 0.0
+
+    assert (
+        client.get(
+            "/kpi/overview/range", params={"from": "2026-03-02", "to": "2026-02-17"}
+        ).status_code
+        == 400
+    )
+
+    insights = client.get(
+        "/insights/range", params={"from": "2026-02-17", "to": "2026-03-02"}
+    ).json()
+    assert [insight["date"] for insight in insights] == [day["date"] for day in days]
+    for insight in insights:
+        assert client.get("/insights", params={"date": insight["date"]}).json() == {
+            "summary": insight["summary"]
+        }
+    assert (
+        client.get(
+            "/kpi/overview/range", params={"from": "2025-01-01", "to": "2026-03-02"}
+        ).status_code
+        == 400
+    )
+
+
+def test_machine_and_shift_kpis_stream_as_ndjson_and_csv():
+    import csv
+    import io
+    import json
+
+    reset_ingest_tables()
+    upload_dataframe(
+        "fleet.csv", generate_data(days=20, machines=3, seed=4, end=datetime(2026, 3, 1))
+    )
+    params = {"from": "2026-02-01", "to": "2026-03-01"}
+
+    for path in ("/kpi/machines", "/kpi/shifts"):
+        expected = client.get(path, params=params).json()
+        assert len(expected) > 50
+
+        ndjson = client.get(path, params=params, headers={"Accept": "application/x-ndjson"})
+        assert ndjson.status_code == 200
+        assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+        assert [json.loads(line) for line in ndjson.text.splitlines()] == expected
+
+        as_csv = client.get(path, params={**params, "format": "csv"})
+        assert as_csv.status_code == 200
+        assert "attachment" in as_csv.headers["content-disposition"]
+        rows = list(csv.DictReader(io.StringIO(as_csv.text)))
+        assert [r["machine_id"] for r in rows] == [r["machine_id"] for r in expected]
+        assert [float(r["throughput_units"]) for r in rows] == [
+            r["throughput_units"] for r in expected
+        ]
+
+    assert client.get("/kpi/machines", params={**params, "format": "xml"}).status_code == 400
+    columns_as_csv = client.get(
+        "/kpi/shifts", params={**params, "format": "csv", "layout": "columns"}
+    )
+    assert columns_as_csv.status_code == 422
+
+
+def test_admin_export_streams_gzip_csv_within_the_concurrency_limit():
+    import csv
+    import gzip
+    import io
+
+    from app.api.routers.admin import export_slots
+
+    reset_ingest_tables()
+    upload_dataframe(
+        "fleet.csv", generate_data(days=10, machines=3, seed=5, end=datetime(2026, 3, 1))
+    )
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    db = TestingSessionLocal()
+    record_count = db.query(ProductionRecord).count()
+    aggregate_count = (
+        db.query(DailyAggregate).filter(DailyAggregate.machine_code == "M-100").count()
+    )
+    db.close()
+
+    resp = client.get("/admin/export/production_records", params={"batch_size": 7}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/gzip"
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(resp.content).decode())))
+    assert len(rows) == record_count
+    assert [int(r["record_id"]) for r in rows] == sorted(int(r["record_id"]) for r in rows)
+
+    resp = client.get(
+        "/admin/export/daily_aggregates", params={"machine_id": "M-100"}, headers=headers
+    )
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(resp.content).decode())))
+    assert len(rows) == aggregate_count and {r["machine_id"] for r in rows} == {"M-100"}
+
+    assert client.get("/admin/export/users", headers=headers).status_code == 404
+    assert (
+        client.get(
+            "/admin/export/daily_aggregates", params={"dataset_id": 1}, headers=headers
+        ).status_code
+        == 400
+    )
+    viewer = {"Authorization": f"Bearer {get_token('viewer', 'viewer123')}"}
+    assert client.get("/admin/export/production_records", headers=viewer).status_code == 403
+
+    held = [export_slots.try_acquire() for _ in range(2)]
+    try:
+        assert client.get("/admin/export/production_records", headers=headers).status_code == 429
+    finally:
+        for slot in held:
+            slot.release()
+    assert client.get("/admin/export/production_records", headers=headers).status_code == 200
+
+
+def test_parquet_export_keeps_one_typed_schema_across_batches():
+    import io
+
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    reset_ingest_tables()
+    upload_sample_csv("sample_shift_b.csv")
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    resp = client.get(
+        "/admin/export/production_records",
+        params={"format": "parquet", "batch_size": 3},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    table = pq.read_table(io.BytesIO(resp.content))
+    assert [str(field.type) for field in table.schema] == [
+        "int64",
+        "int64",
+        "string",
+        "string",
+        "string",
+        "timestamp[us]",
+        "date32[day]",
+        "double",
+        "double",
+        "double",
+    ]
+    empty = client.get(
+        "/admin/export/daily_aggregates",
+        params={"format": "parquet", "machine_id": "none"},
+        headers=headers,
+    )
+    assert pq.read_table(io.BytesIO(empty.content)).num_rows == 0
+
+
+def test_kpi_lists_support_a_columnar_json_layout():
+    reset_ingest_tables()
+    upload_dataframe(
+        "fleet.csv", generate_data(days=10, machines=3, seed=6, end=datetime(2026, 3, 1))
+    )
+    params = {"from": "2026-02-20", "to": "2026-03-01"}
+
+    for path in ("/kpi/machines", "/kpi/shifts", "/kpi/days", "/kpi/overview/range"):
+        rows = client.get(path, params=params).json()
+        columns = client.get(path, params={**params, "layout": "columns"}).json()
+        assert rows and list(columns) == list(rows[0])
+        assert [
+            dict(zip(columns, values, strict=True))
+            for values in zip(*columns.values(), strict=True)
+        ] == rows
+
+    assert client.get("/kpi/days", params={**params, "layout": "nested"}).status_code == 400
+
+
+def test_request_metrics_are_labelled_by_route_template_with_db_time():
+    from prometheus_client import REGISTRY
+
+    reset_ingest_tables()
+    upload_sample_csv("sample_shift_b.csv")
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    labels = {"method": "GET", "route": "/admin/export/{table}"}
+    before = REGISTRY.get_sample_value("shadowplant_http_request_db_queries_count", labels) or 0.0
+    queries_before = (
+        REGISTRY.get_sample_value("shadowplant_http_request_db_queries_sum", labels) or 0.0
+    )
+
+    for table in ("production_records", "daily_aggregates"):
+        assert client.get(f"/admin/export/{table}", headers=headers).status_code == 200
+
+    assert (
+        REGISTRY.get_sample_value("shadowplant_http_request_db_queries_count", labels) == before + 2
+    )
+    assert (
+        REGISTRY.get_sample_value("shadowplant_http_request_db_queries_sum", labels)
+        > queries_before
+    )
+    assert REGISTRY.get_sample_value("shadowplant_http_request_duration_seconds_count", labels) >= 2
+    assert (
+        REGISTRY.get_sample_value("shadowplant_http_requests_in_progress", {"method": "GET"}) == 0
+    )
+    assert (
+        REGISTRY.get_sample_value(
+            "shadowplant_http_requests_total",
+            {"method": "GET", "path": "/admin/export/{table}", "status": "200"},
+        )
+        >= 2
+    )
+    assert (
+        REGISTRY.get_sample_value(
+            "shadowplant_http_request_duration_seconds_count",
+            {"method": "GET", "route": "/admin/export/users"},
+        )
+        is None
+    )
+
+
+def test_debug_timing_header_lists_pipeline_stages_for_admins_or_when_enabled(monkeypatch):
+    from app.infrastructure.metrics import stages
+
+    reset_ingest_tables()
+    upload_dataframe(
+        "fleet.csv", generate_data(days=40, machines=3, seed=8, end=datetime(2026, 3, 1))
+    )
+    monkeypatch.setattr(stages, "enabled", False)
+    params = {"date": "2026-02-28"}
+    debug = {"X-Debug-Timing": "1"}
+    admin = {**debug, "Authorization": f"Bearer {get_token()}"}
+    viewer = {**debug, "Authorization": f"Bearer {get_token('viewer', 'viewer123')}"}
+
+    resp = client.get("/risk/panel", params=params, headers=admin)
+    assert resp.status_code == 200
+    entries = {entry.split(";")[0]: entry for entry in resp.headers["Server-Timing"].split(", ")}
+    assert {"db", "get_machine_daily_metrics", "detect_drift", "infer_machine_risk"} <= set(entries)
+    assert 'desc="rows=' in entries["get_machine_daily_metrics"]
+    for headers in (debug, viewer, {"Authorization": admin["Authorization"]}):
+        assert (
+            "Server-Timing" not in client.get("/risk/panel", params=params, headers=headers).headers
+        )
+
+    monkeypatch.setattr(stages, "enabled", True)
+    AnalyticsUseCase.invalidate_predictive_cache()
+    resp = client.get("/risk/panel", params={"date": "2026-02-27"}, headers=debug)
+    assert "infer_machine_risk" in resp.headers["Server-Timing"]
+
+
+def test_query_diagnostics_attribute_statements_and_log_slow_ones_redacted(monkeypatch):
+    from structlog.testing import capture_logs
+
+    from app.infrastructure.db.session import query_log
+
+    reset_ingest_tables()
+    upload_sample_csv("sample_shift_b.csv")
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    assert client.delete("/admin/diagnostics/queries", headers=headers).status_code == 204
+    monkeypatch.setattr(query_log, "threshold_seconds", 0.0)
+    monkeypatch.setattr(query_log, "explain", True)
+
+    with capture_logs() as logs:
+        resp = client.get(
+            "/kpi/machines",
+            params={"from": "2026-01-10", "to": "2026-01-10", "machine_id": "M-100"},
+        )
+    assert resp.status_code == 200
+    slow = [
+        e for e in logs if e["event"] == "slow_query" and "get_machine_timeseries" in e["caller"]
+    ]
+    assert len(slow) == 1
+    assert slow[0]["parameters"] and "M-100" not in str(slow[0]["parameters"])
+    assert any("daily_aggregates" in line for line in slow[0]["plan"])
+
+    stats = client.get(
+        "/admin/diagnostics/queries", params={"order_by": "calls"}, headers=headers
+    ).json()
+    callers = {row["caller"]: row for row in stats["statements"]}
+    timeseries = callers["analytics_repository:AnalyticsRepository.get_machine_timeseries"]
+    assert timeseries["calls"] == 1 and timeseries["slow_calls"] == 1
+    assert (
+        client.get(
+            "/admin/diagnostics/queries", params={"order_by": "rows"}, headers=headers
+        ).status_code
+        == 400
+    )
+
+
+def test_query_log_explain_keeps_the_callers_transaction_intact():
+    from sqlalchemy import create_engine, text
+
+    from app.infrastructure.db.query_log import QueryLog
+
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        conn.commit()
+        conn.execute(text("INSERT INTO items (id) VALUES (1)"))
+        assert (
+            QueryLog._explain(conn, "SELECT * FROM missing", ())
+            == "<explain failed: OperationalError>"
+        )
+        plan = QueryLog._explain(conn, "SELECT * FROM items WHERE id = ?", (1,))
+        assert any("items" in line for line in plan)
+        assert conn.in_transaction()
+        conn.commit()
+        assert conn.execute(text("SELECT count(*) FROM items")).scalar_one() == 1
+
+
+def test_admin_profiling_of_route_requests_windows_and_memory():
+    import marshal
+    import time
+
+    reset_ingest_tables()
+    upload_sample_csv("sample_shift_b.csv")
+    headers = {"Authorization": f"Bearer {get_token()}"}
+
+    def poll(session, params=None):
+        deadline = time.time() + 30
+        while True:
+            resp = client.get(session["result"], params=params, headers=headers)
+            if resp.status_code != 202 or time.time() > deadline:
+                return resp
+            time.sleep(0.01)
+
+    started = client.post(
+        "/admin/profile/requests",
+        params={"route": "/kpi/days", "count": 2, "timeout": 30},
+        headers=headers,
+    )
+    assert started.status_code == 202
+    session = started.json()
+    assert session["status"] == "running"
+    assert client.get(session["result"], headers=headers).status_code == 202
+    assert (
+        client.post("/admin/profile/window", params={"seconds": 0.1}, headers=headers).status_code
+        == 409
+    )
+    for _ in range(2):
+        assert (
+            client.get("/kpi/days", params={"from": "2026-01-10", "to": "2026-01-10"}).status_code
+            == 200
+        )
+    resp = poll(session, {"output": "pstats"})
+    assert resp.status_code == 200 and resp.headers["X-Profiled-Requests"] == "2"
+    assert isinstance(marshal.loads(resp.content), dict)
+
+    window = client.post(
+        "/admin/profile/window", params={"seconds": 0.05, "engine": "cprofile"}, headers=headers
+    ).json()
+    text = poll(window)
+    assert text.status_code == 200 and text.headers["content-type"].startswith("text/plain")
+
+    sampling = client.post("/admin/profile/window", params={"seconds": 60}, headers=headers).json()
+    assert client.delete(sampling["result"], headers=headers).status_code == 204
+    assert poll(sampling).status_code == 200
+    assert poll(sampling, {"output": "pstats"}).status_code == 400
+    assert client.get("/admin/profile/sessions/0", headers=headers).status_code == 404
+    bad = client.post("/admin/profile/window", params={"engine": "perf"}, headers=headers)
+    assert bad.status_code == 400
+
+    first = client.post("/admin/profile/memory/snapshots", headers=headers).json()
+    retained = [bytearray(1024) for _ in range(2000)]
+    second = client.post("/admin/profile/memory/snapshots", headers=headers).json()
+    diff = client.get(
+        "/admin/profile/memory/diff",
+        params={"from": first["id"], "to": second["id"]},
+        headers=headers,
+    )
+    assert diff.status_code == 200
+    assert any(
+        "test_api.py" in row["location"] and row["size_diff_kb"] >= 1900 for row in diff.json()
+    )
+    assert (
+        client.get(
+            "/admin/profile/memory/diff", params={"from": 0, "to": 1}, headers=headers
+        ).status_code
+        == 400
+    )
+    assert client.delete("/admin/profile/memory", headers=headers).status_code == 204
+    del retained
+
+
+def test_upload_slides_label_sketches_consistently_with_a_rebuild(monkeypatch):
+    reset_ingest_tables()
+    df = generate_data(days=150, machines=3, seed=6, end=datetime(2026, 3, 1))
+    dates = df["timestamp"].str[:10]
+    upload_dataframe("first.csv", df[dates < "2026-02-05"])
+    slid: list[int] = []
+    real_slide_to = LabelWindowSketch.slide_to
+
+    def recording_slide_to(self, days, window_end):
+        slid.append(len(days))
+        real_slide_to(self, days, window_end)
+
+    monkeypatch.setattr(LabelWindowSketch, "slide_to", recording_slide_to)
+    upload_dataframe("second.csv", df[dates >= "2026-02-05"])
+    assert len(slid) == 3 and max(slid) < 150
+
+    db = TestingSessionLocal()
+    slid_sketches = {m.machine_code: m.label_sketch_json for m in db.query(Machine)}
+    for machine in db.query(Machine):
+        machine.label_sketch_json = None
+    db.commit()
+    AnalyticsRepository(db).recompute_daily_aggregates()
+    assert {m.machine_code: m.label_sketch_json for m in db.query(Machine)} == slid_sketches
+    db.close()
@@ -0,0 +1,21 @@
+from app.backtest import retrain_trigger_table, run_backtest
+from app.seed import generate_daily_frame
+
+
+def test_walk_forward_backtest_reports_consistent_breakdowns():
+    frame = generate_daily_frame(machines=5, days=90, seed=3)
+
+    report = run_backtest(frame, warmup_days=30)
+
+    assert len(report.per_date) == 90 - 30 - 7
+    assert set(report.per_machine) == set(frame.machine_ids)
+    assert sum(s.samples for s in report.per_date.values()) == report.overall.samples
+    assert sum(s.samples for s in report.per_machine.values()) == report.overall.samples
+    assert sum(b.samples for b in report.calibration) == report.overall.samples
+    assert 0.0 <= report.overall.brier <= 1.0
+    assert 1 <= report.full_refits < len(report.per_date)
+    assert run_backtest(frame, warmup_days=30).overall == report.overall
+
+    table = retrain_trigger_table(report, (0.0, 1.01))
+    assert table[0]["trigger_rate"] == 0.0
+    assert table[1]["trigger_rate"] == 1.0
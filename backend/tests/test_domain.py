@@ -1,6 +1,11 @@
-from datetime import date
+from datetime import date, timedelta
 
-from app.domain.services import detect_zscore_anomalies
+import numpy as np
+import pytest
+
+from app.domain.columnar import MachineDailyFrame
+from app.domain.forecasting import holt_forecast, naive_trend_forecast, trailing_matrix
+from app.domain.services import detect_zscore_anomalies, rolling_forecast
 
 
 def test_detect_anomaly_flags_outlier():
@@ -11,3 +16,46 @@ def test_detect_anomaly_flags_outlier():
     anomalies = detect_zscore_anomalies(records, "downtime", z_threshold=1.5)
     assert anomalies
     assert anomalies[0].severity in {"medium", "high"}
+
+
+def _uneven_frame() -> MachineDailyFrame:
+    rng = np.random.default_rng(4)
+    rows = [
+        {
+            "date": date(2026, 1, 1) + timedelta(days=d),
+            "machine_id": machine_id,
+            "downtime_minutes": float(rng.normal(100, 30)),
+            "scrap_units": 5.0,
+            "output_units": float(rng.normal(1500, 100)),
+            "scrap_percent": 0.3,
+        }
+        for machine_id, days in (("M-1", 1), ("M-2", 2), ("M-3", 5), ("M-4", 30))
+        for d in range(days)
+    ]
+    return MachineDailyFrame.from_records(rows)
+
+
+def test_vectorized_naive_forecast_matches_rolling_forecast_per_machine():
+    frame = _uneven_frame()
+    values, counts = trailing_matrix(frame, frame.downtime_minutes, 30)
+    forecast = naive_trend_forecast(values, counts, horizon=3)
+    for machine, _ in enumerate(frame.machine_ids):
+        history = frame.downtime_minutes[frame.machine_slice(machine)].tolist()
+        assert forecast[machine].tolist() == pytest.approx(rolling_forecast(history, 3))
+
+
+def test_vectorized_holt_forecast_matches_scalar_recursion():
+    frame = _uneven_frame()
+    values, counts = trailing_matrix(frame, frame.output_units, 30)
+    forecast = holt_forecast(values, counts, horizon=2, alpha=0.4, beta=0.2)
+    for machine, _ in enumerate(frame.machine_ids):
+        history = frame.output_units[frame.machine_slice(machine)].tolist()
+        level = history[0]
+        trend = history[1] - history[0] if len(history) > 1 else 0.0
+        for value in history[1:]:
+            previous = level
+            level = 0.4 * value + 0.6 * (level + trend)
+            trend = 0.2 * (level - previous) + 0.8 * trend
+        assert forecast[machine].tolist() == pytest.approx(
+            [max(0.0, level + trend * h) for h in (1, 2)]
+        )
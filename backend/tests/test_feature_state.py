@@ -0,0 +1,96 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.application.predictive_engine import PredictiveIntelligenceEngine
+from app.domain.feature_state import MachineFeatureState
+from app.seed import generate_daily_frame
+
+
+def _machine_days(rows: list[dict]) -> dict[str, dict[date, tuple[float, float, float]]]:
+    days: dict[str, dict[date, tuple[float, float, float]]] = {}
+    for row in sorted(rows, key=lambda r: r["date"]):
+        days.setdefault(row["machine_id"], {})[row["date"]] = (
+            row["downtime_minutes"],
+            row["scrap_units"],
+            row["output_units"],
+        )
+    return days
+
+
+def test_state_slid_day_by_day_matches_full_recompute_with_gaps_and_expiry():
+    frame = generate_daily_frame(machines=6, days=200, seed=9, end=date(2026, 3, 1))
+    keep = np.random.default_rng(1).random(frame.n_rows) > 0.25
+    rows = [
+        {
+            "date": frame.date_at(i),
+            "machine_id": frame.machine_ids[frame.machine_index[i]],
+            "downtime_minutes": float(frame.downtime_minutes[i]),
+            "scrap_units": float(frame.scrap_units[i]),
+            "output_units": float(frame.output_units[i]),
+            "scrap_percent": float(frame.scrap_percent[i]),
+        }
+        for i in np.flatnonzero(keep)
+    ]
+    machine_days = _machine_days(rows)
+    states: dict[str, MachineFeatureState] = {}
+    for machine_id, days in machine_days.items():
+        state = MachineFeatureState(window_days=120, rolling_days=14)
+        day = min(days)
+        while day <= date(2026, 3, 1):
+            state.slide_to(days, day)
+            day += timedelta(days=1)
+        states[machine_id] = MachineFeatureState.from_dict(state.to_dict())
+
+    engine = PredictiveIntelligenceEngine()
+    for as_of in (date(2026, 3, 1), date(2026, 3, 20), date(2026, 6, 25)):
+        window = [r for r in rows if as_of - timedelta(days=120) <= r["date"] <= as_of]
+        advanced = {
+            machine_id: state.as_of(as_of, machine_days[machine_id])
+            for machine_id, state in states.items()
+        }
+        assert engine.machine_health_scores_from_state(
+            advanced, [], as_of
+        ) == engine.machine_health_scores(window, [], as_of)
+
+
+def test_slid_moments_stay_centered_on_large_offsets():
+    rng = np.random.default_rng(3)
+    start = date(2026, 1, 1)
+    days = {
+        start + timedelta(days=i): (1e7 + rng.normal(0.0, 1.0), 1e6 + rng.normal(0.0, 0.1), 500.0)
+        for i in range(400)
+    }
+    state = MachineFeatureState(window_days=120, rolling_days=14)
+    for day in sorted(days):
+        state.slide_to(days, day)
+    window = np.array([days[d][:2] for d in sorted(days) if d >= state.window_start])
+    assert state.count == len(window)
+    assert state.mean == pytest.approx(list(window.mean(axis=0)), rel=1e-12)
+    assert state.m2 == pytest.approx(list(((window - window.mean(axis=0)) ** 2).sum(axis=0)))
+
+    rebuilt = MachineFeatureState.build(
+        [(d, *values) for d, values in days.items()], window_days=120, rolling_days=14
+    )
+    assert rebuilt.count == state.count
+    assert rebuilt.recent == state.recent
+    assert rebuilt.m2 == pytest.approx(state.m2)
+
+
+def test_state_rejects_moving_back_or_reading_before_its_window_end():
+    days = {date(2026, 1, 2): (10.0, 1.0, 100.0), date(2026, 1, 3): (12.0, 2.0, 90.0)}
+    state = MachineFeatureState.build(
+        [(date(2026, 1, 2), *days[date(2026, 1, 2)])], window_days=120, rolling_days=14
+    )
+    with pytest.raises(ValueError):
+        state.slide_to(days, date(2026, 1, 1))
+    with pytest.raises(ValueError):
+        state.as_of(date(2026, 1, 1), days)
+    state.slide_to({date(2026, 1, 1): (5.0, 1.0, 100.0), **days}, date(2026, 1, 3))
+    assert [row[0] for row in state.recent] == [
+        date(2026, 1, 2).toordinal(),
+        date(2026, 1, 3).toordinal(),
+    ]
+    assert state.count == 2
+    assert state.updates == 1
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+from app.application.predictive_cache import PredictiveStateCache
+
+
+def test_cache_evicts_least_recently_used_key():
+    cache = PredictiveStateCache(max_entries=2)
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("b", lambda: 2)
+    assert cache.get_or_compute("a", lambda: -1) == 1
+    cache.get_or_compute("c", lambda: 3)
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert len(cache) == 2
+
+
+def test_concurrent_callers_share_a_single_computation():
+    cache = PredictiveStateCache(max_entries=4)
+    calls = []
+    release = threading.Event()
+
+    def compute() -> dict:
+        calls.append(1)
+        release.wait(timeout=5)
+        return {"state": len(calls)}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("day", compute)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert results == [{"state": 1}] * 8
+
+
+def test_failed_computation_is_not_cached():
+    cache = PredictiveStateCache(max_entries=4)
+
+    def fail() -> dict:
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("day", fail)
+    assert cache.get_or_compute("day", lambda: {"ok": True}) == {"ok": True}
+
+
+def test_invalidate_drops_entries_and_results_computed_before_it():
+    cache = PredictiveStateCache(max_entries=4)
+    cache.get_or_compute("old", lambda: 1)
+
+    def compute_then_invalidate() -> int:
+        cache.invalidate()
+        return 2
+
+    assert cache.get_or_compute("day", compute_then_invalidate) == 2
+    assert len(cache) == 0
@@ -0,0 +1,315 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.application.fleet_executor import FleetExecutor
+from app.application.predictive_cache import PredictiveStateCache
+from app.application.predictive_engine import LogisticRegressionLite, PredictiveIntelligenceEngine
+from app.domain.columnar import MachineDailyFrame
+from app.domain.quantile_sketch import LabelWindowSketch, QuantileSketch
+
+
+def make_rows(machines: int = 3, days: int = 40, seed: int = 7) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    start = date(2026, 1, 1)
+    rows = []
+    for m in range(machines):
+        for d in range(days):
+            downtime = float(max(0.0, rng.normal(45, 18) + (60 if d > days - 10 and m == 0 else 0)))
+            scrap = float(max(0.0, rng.normal(25, 10)))
+            output = float(max(10.0, rng.normal(500, 60)))
+            rows.append(
+                {
+                    "date": start + timedelta(days=d),
+                    "machine_id": f"M-{m + 1}00",
+                    "downtime_minutes": downtime,
+                    "scrap_units": scrap,
+                    "output_units": output,
+                    "scrap_percent": scrap * 100.0 / (scrap + output),
+                }
+            )
+    return rows
+
+
+def test_frame_groups_rows_into_sorted_contiguous_slices():
+    rows = make_rows(machines=3, days=5)
+    frame = MachineDailyFrame.from_records(list(reversed(rows)))
+
+    assert frame.machine_ids == ("M-100", "M-200", "M-300")
+    assert frame.n_rows == 15
+    assert frame.lengths.tolist() == [5, 5, 5]
+    history = frame.machine_slice(1)
+    assert np.all(frame.machine_index[history] == 1)
+    assert np.all(np.diff(frame.date_ordinal[history]) == 1)
+    assert frame.date_at(history.start) == date(2026, 1, 1)
+
+
+def test_engine_accepts_frame_and_row_dicts_identically():
+    rows = make_rows()
+    frame = MachineDailyFrame.from_records(rows)
+    engine = PredictiveIntelligenceEngine()
+    as_of = date(2026, 2, 9)
+
+    assert engine.machine_health_scores(frame, [], as_of) == engine.machine_health_scores(
+        rows, [], as_of
+    )
+    assert engine.detect_drift(frame) == engine.detect_drift(rows)
+    from_frame = engine.build_training_data(frame)
+    from_rows = engine.build_training_data(rows)
+    assert from_frame.machine_ids == from_rows.machine_ids
+    assert np.array_equal(from_frame.X, from_rows.X)
+    assert np.array_equal(from_frame.y, from_rows.y)
+
+
+def test_fleet_health_scores_match_per_machine_reference_for_uneven_histories():
+    rows = [
+        r
+        for r in make_rows(machines=3, days=40)
+        if (r["machine_id"] != "M-200" or r["date"] >= date(2026, 1, 20))
+        and (r["machine_id"] != "M-300" or r["date"] < date(2026, 1, 10))
+    ]
+    engine = PredictiveIntelligenceEngine()
+    snapshots = {s.machine_id: s for s in engine.machine_health_scores(rows, [], date(2026, 2, 9))}
+
+    for machine_id, expected_points in (("M-100", 40), ("M-200", 21), ("M-300", 9)):
+        history = [r for r in rows if r["machine_id"] == machine_id]
+        downtime = np.array([r["downtime_minutes"] for r in history])
+        scrap = np.array([r["scrap_units"] for r in history])
+        output = np.array([r["output_units"] for r in history])[-14:]
+        d_window, s_window = downtime[-14:], scrap[-14:]
+        d_z = np.abs(d_window - downtime.mean()) / downtime.std()
+        s_z = np.abs(s_window - scrap.mean()) / scrap.std()
+        x = np.arange(output.size) - (output.size - 1) / 2.0
+        slope = np.sum(x * (output - output.mean())) / np.sum(x**2)
+
+        snapshot = snapshots[machine_id]
+        assert snapshot.data_points == expected_points
+        assert snapshot.rolling_downtime_variance == round(
+            min(1.0, d_window.var() / (abs(d_window.mean()) + 1.0) ** 2), 4
+        )
+        assert snapshot.anomaly_frequency == round(np.mean((d_z >= 2.0) | (s_z >= 2.0)), 4)
+        assert snapshot.output_degradation_trend == round(
+            min(1.0, max(0.0, -slope / output.mean())), 4
+        )
+
+
+def test_detect_drift_locates_step_change_in_split_and_cusum_modes():
+    rows = make_rows(machines=2, days=60)
+    step_date = date(2026, 2, 20)
+    for row in rows:
+        if row["machine_id"] == "M-100":
+            row["downtime_minutes"] = (
+                40.0 + (row["date"].day % 3) + (90.0 if row["date"] >= step_date else 0.0)
+            )
+
+    for method in ("split", "cusum"):
+        signals = {
+            s.machine_id: s
+            for s in PredictiveIntelligenceEngine().detect_drift(rows, method=method)
+        }
+        assert signals["M-100"].change_point_detected
+        assert signals["M-100"].change_point_date == step_date
+        assert signals["M-100"].concept_drift_detected
+
+
+def test_detect_drift_rejects_unknown_method():
+    with pytest.raises(ValueError, match="Unknown drift detection method"):
+        PredictiveIntelligenceEngine().detect_drift(make_rows(), method="bayesian")
+
+
+def test_newton_solver_converges_faster_to_an_equal_or_lower_loss():
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(400, 4))
+    y = (X @ np.array([1.5, -1.0, 0.8, 0.3]) + rng.normal(scale=0.7, size=400) > 0).astype(float)
+
+    gd = LogisticRegressionLite(solver="gd")
+    gd.fit(X, y)
+    newton = LogisticRegressionLite(solver="newton", tol=1e-8)
+    newton.fit(X, y)
+
+    assert newton.converged
+    assert newton.n_iter < 20 < gd.n_iter
+    assert newton.final_loss <= gd.final_loss + 1e-9
+
+
+def test_default_newton_solver_keeps_the_synthetic_prior_in_its_objective():
+    frame = MachineDailyFrame.from_records(make_rows(machines=4, days=60))
+    training = PredictiveIntelligenceEngine().build_training_data(frame)
+    engine = PredictiveIntelligenceEngine()
+    assert engine.model.solver == "newton"
+    engine.train(training, date(2026, 2, 28))
+    assert engine.model.converged
+
+    X_scaled = engine._standardize(training.X, engine.feature_mean, engine.feature_std)
+    split = max(1, int(0.8 * X_scaled.shape[0]))
+    cold = LogisticRegressionLite(solver="newton")
+    cold.fit(X_scaled[:split], training.y[:split])
+    assert np.max(np.abs(engine.model.weights - cold.weights)) > 1e-3
+
+    prior = PredictiveIntelligenceEngine.PRIOR_STRENGTH
+    gd = LogisticRegressionLite(solver="gd", prior_strength=prior, max_iter=20_000)
+    newton = LogisticRegressionLite(solver="newton", prior_strength=prior)
+    for model in (gd, newton):
+        model.fit(X_scaled[:split], training.y[:split], anchor=np.array([1.0, 1.0, 1.0, 1.0]))
+        assert model.converged
+    assert np.allclose(gd.weights, newton.weights, atol=1e-4)
+
+
+def test_logistic_regression_rejects_unknown_solver():
+    with pytest.raises(ValueError, match="Unknown solver"):
+        LogisticRegressionLite(solver="adam")
+
+
+def test_daily_training_appends_only_new_windows_until_full_refit_is_due():
+    engine = PredictiveIntelligenceEngine()
+    first_day = date(2026, 2, 21)
+
+    def train_on(as_of: date) -> int:
+        visible = MachineDailyFrame.from_records(
+            [r for r in make_rows(machines=3, days=60) if r["date"] <= as_of]
+        )
+        training = engine.build_training_data(
+            visible, closed_after=engine.incremental_cutoff(as_of)
+        )
+        engine.train(training, as_of)
+        return training.X.shape[0]
+
+    assert train_on(first_day) > 100
+    assert engine.last_full_refit_on == first_day
+    weights = engine.model.weights.copy()
+    holdout = list(engine.recent_hits)
+    assert holdout and engine.last_accuracy == round(float(np.mean(holdout)), 4)
+
+    assert train_on(first_day + timedelta(days=1)) == 3
+    assert engine.last_full_refit_on == first_day
+    assert engine.last_trained_on == first_day + timedelta(days=1)
+    assert not np.array_equal(weights, engine.model.weights)
+    # Accuracy covers the rolling window, not just the three new windows.
+    assert list(engine.recent_hits)[:-3] == holdout[-(len(engine.recent_hits) - 3) :]
+    assert engine.last_accuracy == round(float(np.mean(engine.recent_hits)), 4)
+    restored = PredictiveIntelligenceEngine()
+    restored.restore_state(1, engine.export_state())
+    assert restored.recent_hits == engine.recent_hits
+
+    refit_day = first_day + timedelta(days=PredictiveIntelligenceEngine.FULL_REFIT_INTERVAL_DAYS)
+    assert train_on(refit_day) > 100
+    assert engine.last_full_refit_on == refit_day
+
+
+def test_training_is_deterministic_and_reuses_the_cached_prior(monkeypatch):
+    frame = MachineDailyFrame.from_records(make_rows(machines=4, days=60))
+    training = PredictiveIntelligenceEngine().build_training_data(frame)
+    as_of = date(2026, 2, 28)
+    prior_cache = PredictiveStateCache(max_entries=4, name="prior")
+
+    np.random.seed(1)
+    first = PredictiveIntelligenceEngine(prior_cache=prior_cache)
+    first.train(training, as_of)
+    assert len(prior_cache) == 1
+    assert len(PredictiveIntelligenceEngine().prior_cache) == 0
+
+    fits = []
+    real_fit = LogisticRegressionLite.fit
+
+    def recording_fit(self, X, y, reset=True, anchor=None):
+        fits.append(reset)
+        real_fit(self, X, y, reset=reset, anchor=anchor)
+
+    monkeypatch.setattr(LogisticRegressionLite, "fit", recording_fit)
+    np.random.seed(2)
+    second = PredictiveIntelligenceEngine(prior_cache=prior_cache)
+    second.train(training, as_of)
+
+    assert fits == [False]
+    assert np.array_equal(first.model.weights, second.model.weights)
+    assert first.model.bias == second.model.bias
+    assert first.infer_machine_risk(
+        first.machine_health_scores(frame, [], as_of)
+    ) == second.infer_machine_risk(second.machine_health_scores(frame, [], as_of))
+
+
+def test_health_trend_matches_scoring_each_date_separately():
+    rows = [r for i, r in enumerate(make_rows(machines=2, days=60)) if i % 9 != 4]
+    engine = PredictiveIntelligenceEngine()
+    start, end = date(2026, 1, 20), date(2026, 3, 5)
+
+    trend = engine.machine_health_trend(rows, "M-100", start, end, history_days=30)
+
+    assert [s.as_of_date for s in trend] == [
+        start + timedelta(days=i) for i in range((end - start).days + 1)
+    ]
+    for snapshot in trend:
+        window = [
+            r
+            for r in rows
+            if snapshot.as_of_date - timedelta(days=30) <= r["date"] <= snapshot.as_of_date
+        ]
+        scored = engine.machine_health_scores(window, [], snapshot.as_of_date)
+        assert snapshot == next(s for s in scored if s.machine_id == "M-100")
+
+
+def test_training_labels_use_supplied_thresholds_when_present():
+    rows = make_rows(machines=2, days=40)
+    engine = PredictiveIntelligenceEngine()
+    frame = MachineDailyFrame.from_records(rows)
+    history = frame.machine_slice(0)
+    exact = (
+        float(np.percentile(frame.downtime_minutes[history], 85)),
+        float(np.percentile(frame.scrap_percent[history], 85)),
+    )
+
+    baseline = engine.build_training_data(frame)
+    same = engine.build_training_data(frame, label_thresholds={"M-100": exact})
+    strict = engine.build_training_data(frame, label_thresholds={"M-100": (1e9, 1e9)})
+
+    assert np.array_equal(baseline.y, same.y)
+    first = np.array(strict.machine_ids) == "M-100"
+    assert strict.y[first].sum() < baseline.y[first].sum()
+    assert np.array_equal(strict.y[~first], baseline.y[~first])
+
+
+def test_sketch_thresholds_label_like_exact_percentiles_within_the_error_bound():
+    rows = make_rows(machines=3, days=60)
+    engine = PredictiveIntelligenceEngine()
+    frame = MachineDailyFrame.from_records(rows)
+    alpha = QuantileSketch().relative_accuracy
+    exact, sketched = {}, {}
+    for machine, machine_id in enumerate(frame.machine_ids):
+        history = frame.machine_slice(machine)
+        days = {
+            frame.date_at(i): (frame.downtime_minutes[i], frame.scrap_percent[i])
+            for i in range(history.start, history.stop)
+        }
+        sketched[machine_id] = LabelWindowSketch.build(days, window_days=59).thresholds()
+        exact[machine_id] = (
+            float(np.percentile(frame.downtime_minutes[history], 85)),
+            float(np.percentile(frame.scrap_percent[history], 85)),
+        )
+        for estimate, value in zip(sketched[machine_id], exact[machine_id], strict=True):
+            assert abs(estimate - value) <= alpha * value
+
+    def labels(scale: float, thresholds: dict) -> np.ndarray:
+        scaled = {m: (d * scale, s * scale) for m, (d, s) in thresholds.items()}
+        return engine.build_training_data(frame, label_thresholds=scaled).y
+
+    from_sketch = labels(1.0, sketched)
+    assert np.array_equal(labels(1.0, exact), engine.build_training_data(frame).y)
+    assert np.all(labels(1.0 + alpha, exact) <= from_sketch)
+    assert np.all(from_sketch <= labels(1.0 - alpha, exact))
+
+
+def test_process_pool_shards_training_data_like_a_single_process():
+    frame = MachineDailyFrame.from_records(make_rows(machines=7, days=45))
+    serial = PredictiveIntelligenceEngine()
+    executor = FleetExecutor(max_workers=3, min_machines=1)
+    parallel = PredictiveIntelligenceEngine(executor=executor)
+    try:
+        assert [b - a for a, b in executor.shard_bounds(frame)] == [3, 2, 2]
+        sharded, single = parallel.build_training_data(frame), serial.build_training_data(frame)
+        assert sharded.machine_ids == single.machine_ids
+        assert np.array_equal(sharded.X, single.X)
+        assert np.array_equal(sharded.y, single.y)
+        assert np.array_equal(sharded.label_dates, single.label_dates)
+    finally:
+        executor.shutdown()
@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.domain.quantile_sketch import LabelWindowSketch, QuantileSketch
+
+
+def sample(seed: int, size: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    values = np.abs(rng.normal(45, 18, size))
+    values[rng.random(size) < 0.1] = 0.0
+    return values
+
+
+@pytest.mark.parametrize("alpha", [0.005, 0.01, 0.05])
+def test_quantiles_stay_within_relative_error_of_np_percentile(alpha):
+    for seed in range(50):
+        values = sample(seed, 1 + seed * 7)
+        sketch = QuantileSketch(alpha)
+        sketch.add(values)
+        for q in np.linspace(0.0, 1.0, 21):
+            exact = float(np.percentile(values, q * 100))
+            assert abs(sketch.quantile(q) - exact) <= alpha * exact + 1e-12
+
+
+def test_remove_and_merge_match_a_sketch_built_from_scratch():
+    values = sample(1, 200)
+    left, right = QuantileSketch(), QuantileSketch()
+    left.add(values[:120])
+    right.add(values[120:])
+    left.merge(right)
+    left.remove(values[:40])
+
+    fresh = QuantileSketch()
+    fresh.add(values[40:])
+    assert left.to_dict() == fresh.to_dict()
+    assert QuantileSketch.from_dict(left.to_dict()).quantile(0.85) == fresh.quantile(0.85)
+
+
+def test_sketch_rejects_negative_values_and_unknown_removals():
+    sketch = QuantileSketch()
+    with pytest.raises(ValueError):
+        sketch.add([-1.0])
+    sketch.add([5.0])
+    with pytest.raises(ValueError):
+        sketch.remove([500.0])
+    assert sketch.count == 1
+
+
+def test_label_window_slides_like_a_rebuild():
+    start = date(2026, 1, 1)
+    downtime, scrap = sample(2, 300), sample(3, 300) / 10.0
+    days = {start + timedelta(days=i): (downtime[i], scrap[i]) for i in range(300) if i % 11 != 5}
+
+    sketch = LabelWindowSketch.build(
+        {d: v for d, v in days.items() if d <= date(2026, 5, 1)}, window_days=120
+    )
+    sketch.slide_to(days, date(2026, 6, 15))
+    sketch.slide_to(days, date(2026, 10, 27))
+
+    assert sketch.to_dict() == LabelWindowSketch.build(days, window_days=120).to_dict()
+    with pytest.raises(ValueError):
+        sketch.slide_to(days, date(2026, 9, 1))
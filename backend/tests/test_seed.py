@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from app.seed import generate_data
+
+
+def test_generate_data_covers_every_machine_day_and_shift():
+    end = datetime(2026, 2, 1)
+    df = generate_data(
+        days=10, machines=6, shifts=("A", "B"), seed=3, end=end, scrap_anomaly_rate=1.0
+    )
+
+    assert len(df) == 10 * 6 * 2
+    assert df.groupby(["machine_id", "shift"]).size().eq(10).all()
+    assert sorted(df["machine_id"].unique()) == [f"M-{100 * m}" for m in range(1, 7)]
+    timestamps = df["timestamp"].map(datetime.fromisoformat)
+    assert timestamps.min() >= datetime(2026, 1, 22) and timestamps.max() < end
+    assert (df["downtime"] >= 0).all() and (df["output"] >= 10).all()
+    assert df["scrap"].mean() > 50
+    assert df.equals(
+        generate_data(
+            days=10, machines=6, shifts=("A", "B"), seed=3, end=end, scrap_anomaly_rate=1.0
+        )
+    )